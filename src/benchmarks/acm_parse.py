@@ -0,0 +1,55 @@
+"""
+Benchmark the parsing of saved ACM landing pages.
+
+Compares building the tree of the whole page against parsing only the
+classification fragment, for every available BeautifulSoup tree builder.
+
+Usage (from `src/`):
+    python -m benchmarks.acm_parse path/to/pages/ [repeat]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from classifiers.acm import parse_classification
+
+PARSERS = ["html.parser", "lxml", "html5lib"]
+
+
+def full_parse(html: str, parser: str) -> list:
+    """The classification parsed from the tree of the whole page"""
+    soup = BeautifulSoup(html, parser)
+    return [element.text for element in soup.find_all("ol", class_="rlist organizational-chart")]
+
+
+def run(pages: list[str], func, parser: str, repeat: int) -> float:
+    """Returns the mean time to parse a page in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html, parser)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+
+def main(pages_path: str, repeat: int = 3):
+    pages = [path.read_text() for path in sorted(Path(pages_path).glob("*.html"))]
+    if not pages:
+        raise Exception(f"No html files found in {pages_path}.")
+    print(f"{len(pages)} pages, {repeat} repetitions")
+
+    for parser in PARSERS:
+        try:
+            BeautifulSoup("", parser)
+        except FeatureNotFound:
+            print(f"{parser:<12} not installed")
+            continue
+        full = run(pages, full_parse, parser, repeat)
+        fragment = run(pages, parse_classification, parser, repeat)
+        print(f"{parser:<12} full page: {full:8.3f} ms  fragment: {fragment:8.3f} ms  speed-up: {full / fragment:6.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], *[int(arg) for arg in sys.argv[2:3]])
@@ -0,0 +1,52 @@
+"""
+Benchmark the import time of the packages, each one in a fresh interpreter.
+
+Also lists the heavy dependencies that each import pulls in.
+
+Usage (from `src/`):
+    python -m benchmarks.startup [repeat]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_PATH = Path(__file__).parent.parent
+MODULES = ["config", "reader", "downloader", "classifiers.acm", "classifiers.dbpedia", "ontology"]
+HEAVY_DEPENDENCIES = ["pandas", "numpy", "tqdm", "fitz", "pdfminer", "requests", "bs4"]
+
+SCRIPT = (
+    "import sys; import {module}; "
+    f"print(','.join(m for m in {HEAVY_DEPENDENCIES!r} if m in sys.modules))"
+)
+
+
+def import_time(module: str) -> tuple[float, str]:
+    """Returns the wall time in milliseconds to start the interpreter and import the module,
+    along with the heavy dependencies that were loaded"""
+    start = time.perf_counter()
+    res = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(module=module)],
+        cwd=SRC_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return (time.perf_counter() - start) * 1000, res.stdout.strip()
+
+
+def main(repeat: int = 5):
+    baseline = statistics.median(import_time("sys")[0] for _ in range(repeat))
+    print(f"{'interpreter':<20} {baseline:8.1f} ms")
+    for module in MODULES:
+        times = []
+        for _ in range(repeat):
+            elapsed, loaded = import_time(module)
+            times.append(elapsed)
+        print(f"{module:<20} {statistics.median(times):8.1f} ms  loaded: {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
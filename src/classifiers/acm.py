@@ -1,31 +1,158 @@
-import requests
-from bs4 import BeautifulSoup
-from ratelimit import limits, sleep_and_retry
+import re
+from urllib.parse import urljoin
 
+from config import get_config
+from utils import http
 
-@sleep_and_retry
-@limits(calls=10, period=60)
-@limits(calls=1, period=2)
-def get_classification_from_doi(doi: str) -> list:
+ORGANIZATIONAL_CHART_PATTERN = re.compile(r'<ol\b[^>]*class="rlist organizational-chart"')
+OL_TAG_PATTERN = re.compile(r"<(/?)ol\b", re.IGNORECASE)
+
+
+def _slice_element(html: str, start_pattern: re.Pattern) -> str:
+    """
+    Scan the html for the element opened at `start_pattern` and return only its
+    markup, stopping right after the matching closing tag.
+    Only `ol` elements are balanced, since they nest in the classification tree.
+
+    Returns (str): The element markup or an empty string if it was not found.
+    """
+    start = start_pattern.search(html)
+    if not start:
+        return ""
+
+    depth = 0
+    for tag in OL_TAG_PATTERN.finditer(html, start.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            end = html.find(">", tag.end())
+            return html[start.start(): end + 1]
+    return html[start.start():]
+
+
+def parse_classification(html: str, parser: str | None = None) -> list:
+    """
+    Parse the CCS classification out of an ACM landing page.
+
+    Instead of building the tree of the whole page, only the
+    `ol.rlist.organizational-chart` fragment is sliced out of the html and parsed.
+
+    Args:
+        html (str): The html of the ACM landing page.
+        parser (str, optional): The BeautifulSoup tree builder, e.g. "html.parser" or "lxml".
+            Defaults to the one in the config file.
+
+    Returns (list): The title of the paper followed by its topics, all lower case.
+    """
     classification = []
-    url = f"https://dl.acm.org/doi/{doi}"
+    fragment = _slice_element(html, ORGANIZATIONAL_CHART_PATTERN)
+    if not fragment:
+        return classification
 
-    res = requests.get(url, timeout=30)
-    res.raise_for_status()
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(fragment, parser or get_config().get_acm_html_parser())
+    return _classification_from_tree(soup.ol)
 
-    soup = BeautifulSoup(res.text, "html.parser")
-    kw_tree_elements = soup.find_all("ol", class_="rlist organizational-chart")
-
-    if kw_tree_elements:
-        root = kw_tree_elements[0].find("div", {"id": "organizational-chart__title"})
-        if not root:
-            raise Exception("Title not found!")
-        classification.append(root.text)
-
-        keywords = kw_tree_elements[0].find_all("p")
-        if keywords:
-            for kw in keywords:
-                classification.append(kw.text)
-    if classification:
-        classification = [topic.lower() for topic in classification]
+
+def _classification_from_tree(kw_tree) -> list:
+    """Title and topics from the `ol.rlist.organizational-chart` element"""
+    classification = []
+    root = kw_tree.find("div", {"id": "organizational-chart__title"})
+    if not root:
+        raise Exception("Title not found!")
+    classification.append(root.text)
+
+    keywords = kw_tree.find_all("p")
+    if keywords:
+        for kw in keywords:
+            classification.append(kw.text)
+    classification = [topic.lower() for topic in classification]
     return classification
+
+
+def _has_class(attrs: dict, class_name: str) -> bool:
+    classes = attrs.get("class") or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return class_name in classes
+
+
+def _is_harvested(name: str, attrs: dict) -> bool:
+    """Filter of the elements of the landing page that are kept in the tree"""
+    match name:
+        case "meta":
+            return attrs.get("name", "").startswith("dc.")
+        case "ol":
+            return _has_class(attrs, "organizational-chart")
+        case "div":
+            return _has_class(attrs, "abstractSection") or _has_class(attrs, "tags-widget__content")
+        case "a":
+            return attrs.get("href", "").startswith("/doi/pdf/")
+    return False
+
+
+def parse_landing_page(html: str, parser: str | None = None) -> dict:
+    """
+    Parse everything used from an ACM landing page in a single pass.
+    Only the elements holding these fields are kept in the tree.
+
+    Args:
+        html (str): The html of the ACM landing page.
+        parser (str, optional): The BeautifulSoup tree builder, e.g. "html.parser" or "lxml".
+            Defaults to the one in the config file.
+
+    Returns (dict): With the keys "classification", "title", "author", "doi", "publisher",
+        "year", "month", "abstract", "keywords" and "pdf_url". Missing fields are empty.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    config = get_config()
+    soup = BeautifulSoup(
+        html,
+        parser or config.get_acm_html_parser(),
+        parse_only=SoupStrainer(_is_harvested),
+    )
+
+    meta = {}
+    for tag in soup.find_all("meta"):
+        if tag["name"] == "dc.Identifier" and tag.get("scheme") != "doi":
+            continue
+        meta.setdefault(tag["name"], []).append(tag.get("content", "").strip())
+    date = (meta.get("dc.Date") or [""])[0].split("-")
+
+    kw_tree = soup.find("ol", class_="organizational-chart")
+    abstract = soup.find("div", class_="abstractSection")
+    tags = soup.find("div", class_="tags-widget__content")
+    pdf_link = soup.find("a", href=re.compile(r"^/doi/pdf/"))
+
+    return {
+        "classification": _classification_from_tree(kw_tree) if kw_tree else [],
+        "title": (meta.get("dc.Title") or [""])[0],
+        "author": meta.get("dc.Creator", []),
+        "doi": (meta.get("dc.Identifier") or [""])[0].lower(),
+        "publisher": (meta.get("dc.Publisher") or [""])[0],
+        "year": date[0],
+        "month": date[1] if len(date) > 1 else "",
+        "abstract": " ".join(abstract.get_text(" ").split()) if abstract else "",
+        "keywords": [a.text.strip().lower() for a in tags.find_all("a")] if tags else [],
+        "pdf_url": urljoin(config.get_acm_api_url(), pdf_link["href"]) if pdf_link else "",
+    }
+
+
+def fetch_landing_page(doi: str) -> str:
+    """`GET` the html of the ACM landing page of the DOI"""
+    url = get_config().get_acm_api_url() + doi
+
+    res = http.get(url, timeout=30)
+    res.raise_for_status()
+    return res.text
+
+
+def harvest_from_doi(doi: str) -> dict:
+    """Fetch the ACM landing page once and parse all its fields,
+    see `parse_landing_page`."""
+    return parse_landing_page(fetch_landing_page(doi))
+
+
+def get_classification_from_doi(doi: str) -> list:
+    return parse_classification(fetch_landing_page(doi))
@@ -1,19 +1,121 @@
-import requests
-import urllib.parse
-from ratelimit import limits, sleep_and_retry
-
-
-@sleep_and_retry
-@limits(calls=10, period=60)
-@limits(calls=1, period=2)
-def get_classification_from_text(text: str, kwargs: dict = {}) -> dict:
-    kwargs["text"] = text
-    base_url = "https://api.dbpedia-spotlight.org/en/annotate?"
-    url_query = urllib.parse.urlencode(kwargs)
-    url = base_url + url_query
+import bisect
+
+from config import get_config
+from utils import http
+
+# Punctuation only, so Spotlight never spots anything across two texts.
+SEPARATOR = "\n\n|||\n\n"
+
+
+def _annotate(text: str, params: dict, api_url: str) -> dict:
+    """`POST` the text to the DBpedia Spotlight annotate endpoint"""
+    data = dict(params, text=text)
     header = {"accept": "application/json"}
 
-    res = requests.get(url, headers=header)
+    res = http.post(api_url, data=data, headers=header, timeout=300)
     res.raise_for_status()
 
     return res.json()
+
+
+def get_classification_from_text(
+    text: str, kwargs: dict | None = None, api_url: str | None = None
+) -> dict:
+    """
+    Annotate a single text with DBpedia Spotlight.
+
+    Args:
+        text (str): Text to be annotated.
+        kwargs (dict, optional): Extra parameters passed to the API, e.g. `{"confidence": 0.5}`.
+        api_url (str, optional): Annotate endpoint. Defaults to the one in the config file.
+
+    Returns (dict): The json response of the API.
+    """
+    api_url = api_url or get_config().get_dbpedia_api_url()
+    return _annotate(text, kwargs or {}, api_url)
+
+
+def _make_batches(texts: list[str], max_chars: int) -> list[list[int]]:
+    """Group the indexes of `texts` so each joined batch fits in `max_chars`"""
+    batches = []
+    batch, size = [], 0
+    for i, text in enumerate(texts):
+        length = len(text) + len(SEPARATOR)
+        if batch and size + length > max_chars:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(i)
+        size += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _split_annotation(texts: list[str], res_dict: dict) -> list[dict]:
+    """Map each resource of a batched response back to the text it was found in
+    using its `@offset`. The offsets are made relative to that text."""
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + len(SEPARATOR)
+
+    results = [{"@text": text, "Resources": []} for text in texts]
+    for resource in res_dict.get("Resources") or []:
+        offset = int(resource["@offset"])
+        i = bisect.bisect_right(starts, offset) - 1
+        local_offset = offset - starts[i]
+        if local_offset + len(resource["@surfaceForm"]) > len(texts[i]):
+            # spotted inside a separator
+            continue
+        results[i]["Resources"].append(dict(resource, **{"@offset": str(local_offset)}))
+    return results
+
+
+def _annotate_batch(
+    texts: list[str], params: dict, api_url: str
+) -> list[dict | Exception]:
+    """Annotate a batch with a single request. If the request fails, the batch is
+    split in two halves which are tried separately, down to single texts."""
+    try:
+        res_dict = _annotate(SEPARATOR.join(texts), params, api_url)
+    except Exception as err:
+        if len(texts) == 1:
+            return [err]
+        half = len(texts) // 2
+        return _annotate_batch(texts[:half], params, api_url) + _annotate_batch(
+            texts[half:], params, api_url
+        )
+    return _split_annotation(texts, res_dict)
+
+
+def get_classification_from_texts(
+    texts: list[str],
+    kwargs: dict | None = None,
+    max_chars: int | None = None,
+    api_url: str | None = None,
+) -> list[dict | Exception]:
+    """
+    Annotate many texts with DBpedia Spotlight, packing as many of them as possible
+    in each request.
+
+    Args:
+        texts (list[str]): Texts to be annotated, e.g. the abstracts of the papers.
+        kwargs (dict, optional): Extra parameters passed to the API, e.g. `{"confidence": 0.5}`.
+        max_chars (int, optional): Maximum size of the text sent in one request.
+            Defaults to the one in the config file.
+        api_url (str, optional): Annotate endpoint. Defaults to the one in the config file.
+
+    Returns (list[dict | Exception]): One item per text, in the same order. Either a dictionary
+        shaped like the response of `get_classification_from_text`, or the exception raised
+        when that text could not be annotated.
+    """
+    config = get_config()
+    api_url = api_url or config.get_dbpedia_api_url()
+    max_chars = max_chars or config.get_dbpedia_batch_max_chars()
+    params = kwargs or {}
+
+    results = []
+    for batch in _make_batches(texts, max_chars):
+        results += _annotate_batch([texts[i] for i in batch], params, api_url)
+    return results
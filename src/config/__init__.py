@@ -1,6 +1,19 @@
+from functools import lru_cache
+
 from .config import Config
 
-config = Config()
 
-DATA_PATH = config.get_data_path()
-PAPERS_PATH = config.get_papers_path()
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Returns the config, read once on the first call and shared afterwards"""
+    return Config()
+
+
+def __getattr__(name: str):
+    """Resolves `DATA_PATH` and `PAPERS_PATH` on first access instead of at import time"""
+    match name:
+        case "DATA_PATH":
+            return get_config().get_data_path()
+        case "PAPERS_PATH":
+            return get_config().get_papers_path()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -24,6 +24,10 @@ class Config:
         """Returns the path where the data are stored"""
         return Path.resolve(self.dir / self.config["data"]["data_path"])
 
+    def get_store_path(self) -> PosixPath:
+        """Returns the path of the content-addressed store of papers"""
+        return Path.resolve(self.dir / self.config["data"]["store_path"])
+
     # =============================================================================
     #     METADATA
     # =============================================================================
@@ -44,6 +48,83 @@ class Config:
 
         return headers
 
+    # =============================================================================
+    #     ACM
+    # =============================================================================
+    def get_acm_api_url(self) -> str:
+        """Returns the url base of the ACM landing pages"""
+        return self.config["acm"]["api_url"]
+
+    def get_acm_html_parser(self) -> str:
+        """Returns the name of the BeautifulSoup tree builder used to parse ACM pages,
+        e.g. "html.parser" or "lxml" """
+        return self.config["acm"]["html_parser"]
+
+    # =============================================================================
+    #     DBPEDIA
+    # =============================================================================
+    def get_dbpedia_api_url(self) -> str:
+        """Returns the url of the DBpedia Spotlight annotate endpoint"""
+        return self.config["dbpedia"]["api_url"]
+
+    def get_dbpedia_batch_max_chars(self) -> int:
+        """Returns the maximum number of characters sent in a single
+        batched request to DBpedia Spotlight"""
+        return self.config["dbpedia"].getint("batch_max_chars")
+
+    # =============================================================================
+    #     EXECUTOR
+    # =============================================================================
+    def get_executor_timeout(self) -> float:
+        """Returns the maximum time in seconds to extract the content of a PDF"""
+        return self.config["executor"].getfloat("timeout")
+
+    def get_executor_memory_limit(self) -> int:
+        """Returns the maximum address space in megabytes of an extraction worker, 0 for no limit"""
+        return self.config["executor"].getint("memory_limit")
+
+    def get_executor_max_tasks_per_worker(self) -> int:
+        """Returns the number of PDFs extracted by a worker before it's replaced"""
+        return self.config["executor"].getint("max_tasks_per_worker")
+
+    def get_executor_workers(self) -> int:
+        """Returns the number of extraction workers, 0 for the number of CPUs"""
+        return self.config["executor"].getint("workers")
+
+    # =============================================================================
+    #     RATE LIMIT
+    # =============================================================================
+    def get_ratelimit_state_path(self) -> PosixPath:
+        """Returns the path of the rate limiter state shared between processes"""
+        return Path.resolve(self.dir / self.config["ratelimit"]["state_path"])
+
+    def get_ratelimit_default(self) -> str:
+        """Returns the limits of the hosts without specific ones, e.g. "10/60, 1/2" """
+        return self.config["ratelimit"]["default"]
+
+    def get_ratelimit_max_retries(self) -> int:
+        """Returns how many times a request answered with 429 or 503 is retried"""
+        return self.config["ratelimit"].getint("max_retries")
+
+    def get_ratelimit_hosts(self) -> dict[str, str]:
+        """Returns the limits of each host, e.g. {"dl.acm.org": "10/60, 1/2"}"""
+        return dict(self.config["ratelimit.hosts"])
+
+    # =============================================================================
+    #     FAILURE LEDGER
+    # =============================================================================
+    def get_ledger_path(self) -> PosixPath:
+        """Returns the directory of the failure ledgers of the lists"""
+        return Path.resolve(self.dir / self.config["ledger"]["path"])
+
+    def get_ledger_base_backoff(self) -> float:
+        """Returns the seconds before the first retry of a failed stage"""
+        return self.config["ledger"].getfloat("base_backoff")
+
+    def get_ledger_max_backoff(self) -> float:
+        """Returns the maximum seconds before the retry of a failed stage"""
+        return self.config["ledger"].getfloat("max_backoff")
+
     # =============================================================================
     #     READ AND WRITE CONFIG FILE
     # =============================================================================
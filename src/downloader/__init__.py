@@ -1 +1 @@
-from .downloader import download, download_from_doi
+from .downloader import download, download_from_doi, load_named_list
@@ -1,23 +1,29 @@
-import requests
-
 from pathlib import Path
-from ratelimit import limits, sleep_and_retry
 
 from downloader.name_encode_decode import encode
-from config import PAPERS_PATH
+from config import get_config
 from utils.errors import ExistingFileError, NotPDFContentError
+from utils import http
 
 
 ACM_BASE_URL = "https://dl.acm.org/doi/pdf/"
 
 
-@sleep_and_retry
-@limits(calls=10, period=60)
-@limits(calls=1, period=1)
-def fetch_from_doi(doi: str, sub_dir: str = "misc", overwrite: bool = False):
-    url = ACM_BASE_URL + doi
+def fetch_from_doi(
+    doi: str, sub_dir: str = "misc", overwrite: bool = False, url: str = ""
+):
+    """
+    Fetch the PDF of a paper from ACM.
+
+    Args:
+        doi (str): DOI of the paper.
+        sub_dir (str, optional): Subdirectory to save the paper. Defaults to "misc".
+        overwrite (bool, optional): Flag to overwrite existing files. Defaults to False.
+        url (str, optional): Link to the PDF, e.g. the `pdf_url` harvested from the
+            landing page. Defaults to the ACM PDF url of the DOI.
+    """
     file_name = encode(doi)
-    sub_dir_path = PAPERS_PATH / sub_dir
+    sub_dir_path = get_config().get_papers_path() / sub_dir
     path = sub_dir_path / file_name
 
     if not Path.is_dir(sub_dir_path):
@@ -28,7 +34,23 @@ def fetch_from_doi(doi: str, sub_dir: str = "misc", overwrite: bool = False):
             "This file already exists! To overwrite it, use `overwrite=True`."
         )
 
-    res = requests.get(url, timeout=60)
+    content = fetch_pdf(doi, url)
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(content)
+
+
+def fetch_pdf(doi: str, url: str = "") -> bytes:
+    """
+    Fetch the content of the PDF of a paper from ACM.
+
+    Args:
+        doi (str): DOI of the paper.
+        url (str, optional): Link to the PDF. Defaults to the ACM PDF url of the DOI.
+
+    Returns (bytes): The PDF content.
+    """
+    url = url or ACM_BASE_URL + doi
+    res = http.get(url, timeout=60)
     if res.ok:
 
         if b"<!DOCTYPE html>" in res.content:
@@ -37,7 +59,5 @@ def fetch_from_doi(doi: str, sub_dir: str = "misc", overwrite: bool = False):
             )
 
         else:
-            with open(path, "wb") as pdf_file:
-                pdf_file.write(res.content)
-            return
+            return res.content
     res.raise_for_status()
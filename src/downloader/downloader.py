@@ -1,45 +1,83 @@
-from requests import HTTPError
 import downloader.acm as acm
-from config import DATA_PATH
-from tqdm import tqdm
+from config import get_config
+from store import PaperStore
+from utils.errors import ExistingFileError
+from utils.ledger import FailureLedger
 
 
-def _load_named_list(name: str) -> list:
-    path = DATA_PATH / "data" / "lists" / (name + ".txt")
+def load_named_list(name: str) -> list:
+    """Returns (list): The DOIs of the named list, the first column of `DATA_PATH/data/lists/<name>.txt`."""
+    path = get_config().get_data_path() / "data" / "lists" / (name + ".txt")
     with open(path, "r") as f:
         named_list = f.read().strip().split("\n")
-    dois = [row.split()[0] for row in named_list]
+    dois = [row.split()[0] for row in named_list if row.strip()]
     return dois
 
 
-def download_from_doi(*dois: str, sub_dir: str, overwrite: bool = False):
+def download_from_doi(
+    *dois: str,
+    sub_dir: str,
+    overwrite: bool = False,
+    store: PaperStore | None = None,
+    ledger: FailureLedger | None = None,
+):
     """
     Download papers from DOIs.
 
     Args:
         *dois (str): DOIs of papers to download.
         sub_dir (str): Subdirectory to save downloaded papers.
+            When a store is used, the name of the list they are added to.
         overwrite (bool, optional): Flag to overwrite existing files. Defaults to False.
+        store (PaperStore, optional): Content-addressed store to save the papers in, instead of
+            the subdirectory. Papers already in the store are not downloaded again. Defaults to None.
+        ledger (FailureLedger, optional): Records the failed downloads, see `Reader.retry_failed`.
+            Defaults to None.
     """
+    from requests import HTTPError
+    from tqdm import tqdm
+
     for doi in tqdm(dois):
+        error = None
         try:
-            acm.fetch_from_doi(doi, sub_dir, overwrite)
+            if store is None:
+                acm.fetch_from_doi(doi, sub_dir, overwrite)
+            elif store.has_doi(doi) and not overwrite:
+                store.add_to_manifest(sub_dir, doi)
+                print(f"{doi}: Already in the store.")
+                continue
+            else:
+                store.add_pdf(acm.fetch_pdf(doi), doi)
+                store.add_to_manifest(sub_dir, doi)
 
+        except ExistingFileError as err:
+            print(f"{doi}: {err.args[0]}")
         except HTTPError as err:
             print(f"{doi}: {err}")
+            error = err
         except Exception as err:
             print(f"{doi}: {err.args[0]}")
+            error = err
         else:
             print(f"{doi}: Fetched!")
+        finally:
+            if ledger is not None:
+                ledger.record(doi, "download", error)
 
 
-def download(named_list: str, overwrite: bool = False):
+def download(named_list: str, overwrite: bool = False, store: PaperStore | None = None):
     """
     Download papers from a named list.
 
     Args:
         named_list (str): Name of the list containing DOIs of papers to download.
         overwrite (bool, optional): Flag to overwrite existing files. Defaults to False.
+        store (PaperStore, optional): Content-addressed store to save the papers in.
+            Defaults to None.
+
+    The failed downloads are recorded in the ledger of the list, see `Reader.retry_failed`.
     """
-    dois = _load_named_list(named_list)
-    download_from_doi(*dois, sub_dir=named_list, overwrite=overwrite)
+    dois = load_named_list(named_list)
+    download_from_doi(
+        *dois, sub_dir=named_list, overwrite=overwrite, store=store, ledger=FailureLedger.for_list(named_list)
+    )
@@ -0,0 +1,356 @@
+"""
+Incremental Klink input: the keyword -> entity incidence of each relation and the top `m`
+co-occurrences of each keyword, as built by klink2/input.R, kept between runs and updated
+with the papers added to or removed from a list. Each update writes only the changes, which
+klink2/input.R:read_incremental applies in order, instead of reading the dataset and
+recomputing all the co-occurrences.
+"""
+
+import heapq
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from config import get_config
+from .tuning import RELATIONS, _split
+
+# Number of co-occurrences kept per keyword and relation, `m` in klink2/input.R
+TOP_M = 100
+DELTA_DIR_PATTERN = "delta-{:06d}"
+KLINK_COLUMNS = ("DE", "TI", "AU", "SO", "SC", "PY")
+
+
+def _klink_row(row: dict) -> dict:
+    """Returns (dict): The columns of a Klink input row used by klink2/input.R, as strings."""
+    return {column: str(row.get(column) or "") for column in KLINK_COLUMNS}
+
+
+def _paper_links(row: dict) -> tuple[list[str], dict[str, list[tuple[str, str]]]]:
+    """
+    Returns (tuple[list[str], dict[str, list[tuple[str, str]]]]): The keywords of a Klink input
+        row and the (name, year) of its entities in each relation, as read by klink2/input.R.
+    """
+    keywords = _split(row.get("DE"), lower=True)
+    year = str(row.get("PY") or "").split(".")[0]
+    names = {
+        "publication": [str(row.get("TI") or "")],
+        "author": _split(row.get("AU")),
+        "venue": [str(row.get("SO") or "").lower()],
+        "area": _split(row.get("SC"), lower=True),
+    }
+    return keywords, {relation: [(name, year) for name in names[relation]] for relation in RELATIONS}
+
+
+class KlinkState:
+    """The Klink input of a list, updated paper by paper.
+
+    For each relation, a link between a keyword and an entity is counted once per paper with both,
+    so it's removed with the last of them. The co-occurrence of two keywords is the number of
+    entities linked to both, and each keyword keeps its `m` highest co-occurrences as
+    klink2/input.R:cache_cooccurrence does. An update only recomputes the co-occurrences of the
+    keywords whose links changed, and patches the tables of the keywords sharing an entity with them.
+    """
+
+    def __init__(self, m: int = TOP_M) -> None:
+        """
+        Args:
+            m (int, optional): Number of co-occurrences kept per keyword and relation. Defaults to 100.
+        """
+        self.m = m
+        self.sequence = 0
+        self.papers: dict[str, dict] = {}
+        self.keywords: list[str] = []
+        self._keyword_index: dict[str, int] = {}
+        self.entities: dict[str, list[tuple[str, str]]] = {relation: [] for relation in RELATIONS}
+        self._entity_index: dict[str, dict[tuple[str, str], int]] = {relation: {} for relation in RELATIONS}
+        # entity -> keyword -> number of papers, and keyword -> entities, per relation
+        self._links: dict[str, dict[int, Counter]] = {relation: {} for relation in RELATIONS}
+        self._keyword_entities: dict[str, dict[int, set[int]]] = {relation: {} for relation in RELATIONS}
+        # keyword -> [(partner, co-occurrence)] in decreasing order, per relation
+        self._tables: dict[str, dict[int, list[tuple[int, int]]]] = {relation: {} for relation in RELATIONS}
+        # tables loaded by `load`, read when used: keyword -> (start, end) of its rows, keyword and pair of the rows
+        self._stored: dict[str, tuple[dict[int, tuple[int, int]], "np.ndarray", "np.ndarray"]] = {}
+
+    def table(self, relation: str, keyword: int) -> list[tuple[int, int]]:
+        """Returns (list[tuple[int, int]]): The highest co-occurrences of the keyword, as (partner, value)."""
+        table = self._tables[relation].get(keyword)
+        if table is None:
+            bounds, _, pairs = self._stored.get(relation, ({}, None, None))
+            table = [(partner, value) for partner, value in pairs[slice(*bounds[keyword])].tolist()] if keyword in bounds else []
+            self._tables[relation][keyword] = table
+        return table
+
+    def tables(self, relation: str) -> dict[int, list[tuple[int, int]]]:
+        """Returns (dict[int, list[tuple[int, int]]]): The co-occurrence tables of the relation by keyword."""
+        for keyword in self._stored.get(relation, ({},))[0]:
+            self.table(relation, keyword)
+        return self._tables[relation]
+
+    def _keyword(self, keyword: str, new: list) -> int:
+        index = self._keyword_index.get(keyword)
+        if index is None:
+            index = self._keyword_index[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+            new.append(index)
+        return index
+
+    def _entity(self, relation: str, entity: tuple[str, str], new: list) -> int:
+        index = self._entity_index[relation].get(entity)
+        if index is None:
+            index = self._entity_index[relation][entity] = len(self.entities[relation])
+            self.entities[relation].append(entity)
+            new.append((relation, index))
+        return index
+
+    def _link_changes(self, row: dict, sign: int, changes: Counter, new_keywords: list, new_entities: list):
+        """Count the links of a paper, +1 when added and -1 when removed, in `changes`."""
+        keywords, entities = _paper_links(row)
+        if not keywords:
+            return
+        keyword_ids = [self._keyword(keyword, new_keywords) for keyword in keywords]
+        for relation in RELATIONS:
+            for entity in entities[relation]:
+                entity_id = self._entity(relation, entity, new_entities)
+                for keyword_id in keyword_ids:
+                    changes[(relation, entity_id, keyword_id)] += sign
+
+    def _cooccurrences(self, relation: str, keyword: int) -> list[tuple[int, int]]:
+        """Returns (list[tuple[int, int]]): The `m` highest co-occurrences of the keyword, computed from the links."""
+        links = self._links[relation]
+        counts = Counter()
+        for entity in self._keyword_entities[relation].get(keyword, ()):
+            counts.update(links[entity].keys())
+        counts.pop(keyword, None)
+        return heapq.nsmallest(self.m, ((partner, value) for partner, value in counts.items()), key=_rank)
+
+    def _cooccurrence(self, relation: str, keyword: int, partner: int) -> int:
+        entities = self._keyword_entities[relation]
+        first, second = entities.get(keyword, set()), entities.get(partner, set())
+        return len(first & second) if len(first) < len(second) else len(second & first)
+
+    def update(self, added: dict[str, dict] | None = None, removed: Iterable[str] = ()) -> dict:
+        """
+        Add, replace and remove papers.
+
+        Args:
+            added (dict[str, dict], optional): Klink input rows (DE, TI, AU, SO, SC, PY) by paper key,
+                e.g. DOI. A paper already in the state is replaced. Defaults to None.
+            removed (Iterable[str], optional): Keys of the papers to remove. Defaults to ().
+
+        Returns (dict): The delta: the new `keywords` and `entities` (index, name), the `links` that
+            appeared (+1) or disappeared (-1) as (relation, op, keyword, entity), and the new
+            `cooccurrence` tables of the keywords whose table changed, by (relation, keyword).
+        """
+        added = added or {}
+        changes: Counter = Counter()
+        new_keywords: list[int] = []
+        new_entities: list[tuple[str, int]] = []
+        for key in list(removed) + [key for key in added if key in self.papers]:
+            row = self.papers.pop(key, None)
+            if row is not None:
+                self._link_changes(row, -1, changes, new_keywords, new_entities)
+        for key, row in added.items():
+            row = _klink_row(row)
+            self.papers[key] = row
+            self._link_changes(row, 1, changes, new_keywords, new_entities)
+
+        link_delta = []
+        for (relation, entity, keyword), change in changes.items():
+            if not change:
+                continue
+            counts = self._links[relation].setdefault(entity, Counter())
+            before = counts[keyword]
+            counts[keyword] += change
+            if before == 0 and counts[keyword] > 0:
+                self._keyword_entities[relation].setdefault(keyword, set()).add(entity)
+                link_delta.append((relation, 1, keyword, entity))
+            elif before > 0 and counts[keyword] <= 0:
+                del counts[keyword]
+                self._keyword_entities[relation][keyword].discard(entity)
+                link_delta.append((relation, -1, keyword, entity))
+
+        cooccurrence = {}
+        for relation in RELATIONS:
+            changed = [(op, keyword, entity) for rel, op, keyword, entity in link_delta if rel == relation]
+            recompute = {keyword for _, keyword, _ in changed}
+            patch: dict[int, set[int]] = {}
+            for op, keyword, entity in changed:
+                for partner in self._links[relation].get(entity, ()):
+                    if partner in recompute or partner == keyword:
+                        continue
+                    if op > 0:
+                        patch.setdefault(partner, set()).add(keyword)
+                    elif any(other == keyword for other, _ in self.table(relation, partner)):
+                        # a co-occurrence of the table decreased, another one may take its place
+                        recompute.add(partner)
+            for keyword in recompute:
+                patch.pop(keyword, None)
+                self._tables[relation][keyword] = self._cooccurrences(relation, keyword)
+                cooccurrence[(relation, keyword)] = self._tables[relation][keyword]
+            for partner, keywords in patch.items():
+                table = dict(self.table(relation, partner))
+                before = sorted(table.items(), key=_rank)
+                for keyword in keywords:
+                    table[keyword] = self._cooccurrence(relation, partner, keyword)
+                after = heapq.nsmallest(self.m, table.items(), key=_rank)
+                if after != before:
+                    self._tables[relation][partner] = after
+                    cooccurrence[(relation, partner)] = after
+
+        self.sequence += 1
+        return {
+            "sequence": self.sequence,
+            "keywords": [(index, self.keywords[index]) for index in new_keywords],
+            "entities": [(relation, index, *self.entities[relation][index]) for relation, index in new_entities],
+            "links": link_delta,
+            "cooccurrence": cooccurrence,
+        }
+
+    def save(self, path: str | Path):
+        """Save the state to a directory: the papers and names as json, the co-occurrence tables as npz."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        state = {
+            "m": self.m,
+            "sequence": self.sequence,
+            "keywords": self.keywords,
+            "entities": self.entities,
+            "papers": self.papers,
+        }
+        with open(path / "state.json", "w") as f:
+            json.dump(state, f)
+
+        arrays = {}
+        for relation in RELATIONS:
+            tables = self._tables[relation]
+            sizes = np.array([len(table) for table in tables.values()], dtype=np.int64)
+            keywords = np.repeat(np.fromiter(tables.keys(), dtype=np.int64, count=len(tables)), sizes)
+            pairs = np.array([pair for table in tables.values() for pair in table], dtype=np.int64).reshape(-1, 2)
+            if relation in self._stored:
+                # the loaded tables not used since are copied as they are, the used ones even if emptied
+                _, stored_keywords, stored_pairs = self._stored[relation]
+                used = np.fromiter(tables.keys(), dtype=np.int64, count=len(tables))
+                unused = ~np.isin(stored_keywords, used)
+                keywords = np.concatenate([stored_keywords[unused], keywords])
+                pairs = np.concatenate([stored_pairs[unused], pairs])
+            order = np.argsort(keywords, kind="stable")
+            arrays[f"{relation}_keywords"] = keywords[order]
+            arrays[f"{relation}_pairs"] = pairs[order]
+        np.savez(path / "cooccurrence.npz", **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "KlinkState":
+        """
+        Load a state saved with `save`. The links are rebuilt from the papers,
+        the co-occurrence tables are only read when an update uses them.
+
+        Returns (KlinkState): The state, empty if the directory has none.
+        """
+        path = Path(path)
+        if not (path / "state.json").is_file():
+            return cls()
+        with open(path / "state.json", "r") as f:
+            state = json.load(f)
+        self = cls(state["m"])
+        self.keywords = state["keywords"]
+        self._keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        for relation in RELATIONS:
+            self.entities[relation] = [tuple(entity) for entity in state["entities"][relation]]
+            self._entity_index[relation] = {entity: i for i, entity in enumerate(self.entities[relation])}
+        changes: Counter = Counter()
+        for key, row in state["papers"].items():
+            self.papers[key] = row
+            self._link_changes(row, 1, changes, [], [])
+        for (relation, entity, keyword), count in changes.items():
+            self._links[relation].setdefault(entity, Counter())[keyword] = count
+            self._keyword_entities[relation].setdefault(keyword, set()).add(entity)
+        self.sequence = state["sequence"]
+
+        with np.load(path / "cooccurrence.npz") as arrays:
+            for relation in RELATIONS:
+                keywords, pairs = arrays[f"{relation}_keywords"], arrays[f"{relation}_pairs"]
+                starts = np.flatnonzero(np.r_[True, keywords[1:] != keywords[:-1]]) if len(keywords) else keywords
+                ends = np.r_[starts[1:], len(keywords)]
+                bounds = dict(zip(keywords[starts].tolist(), zip(starts.tolist(), ends.tolist())))
+                self._stored[relation] = (bounds, keywords, pairs)
+        return self
+
+
+def _rank(pair: tuple[int, int]) -> tuple[int, int]:
+    """Order of the co-occurrence tables: decreasing value, then increasing index as in klink2/input.R."""
+    partner, value = pair
+    return (-value, partner)
+
+
+def write_delta(delta: dict, path: str | Path):
+    """
+    Write a delta of `KlinkState.update` as tsv files read by klink2/input.R:read_incremental.
+    The indexes are 0 based.
+
+    Args:
+        delta (dict): The delta.
+        path (str | Path): The directory of the delta, created if needed.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    tables = {
+        "keywords.tsv": (["index", "keyword"], delta["keywords"]),
+        "entities.tsv": (["relation", "index", "name", "year"], delta["entities"]),
+        "links.tsv": (["relation", "op", "keyword", "entity"], delta["links"]),
+        "cooccurrence.tsv": (
+            ["relation", "keyword", "rank", "partner", "value"],
+            [
+                (relation, keyword, rank, partner, value)
+                for (relation, keyword), table in delta["cooccurrence"].items()
+                for rank, (partner, value) in enumerate(table, 1)
+            ]
+            # keywords whose table is now empty
+            + [(relation, keyword, 0, -1, 0) for (relation, keyword), table in delta["cooccurrence"].items() if not table],
+        ),
+    }
+    for file_name, (header, rows) in tables.items():
+        lines = ["\t".join(header)]
+        lines += ["\t".join(_tsv_value(value) for value in row) for row in rows]
+        with open(path / file_name, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _tsv_value(value) -> str:
+    """Returns (str): The value without the tab and new line characters, read by R with `quote = ""`."""
+    return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+
+def update_klink_input(named_list: str, rows: dict[str, dict], m: int = TOP_M) -> dict:
+    """
+    Update the incremental Klink input of a named list, in `DATA_PATH/klink2/<named_list>/incremental`,
+    with the current papers of the list: the new and changed papers are added, the missing ones removed,
+    and the changes are written to the next `delta-<sequence>` directory.
+
+    Args:
+        named_list (str): The name of the list.
+        rows (dict[str, dict]): All the Klink input rows of the list by DOI, see `Reader.update_klink_input`.
+        m (int, optional): Number of co-occurrences kept per keyword, used when the state is created.
+            Defaults to 100.
+
+    Returns (dict): The delta, see `KlinkState.update`. Nothing is written when nothing changed.
+    """
+    path = get_config().get_data_path() / "klink2" / named_list / "incremental"
+    state = KlinkState.load(path)
+    if not state.papers:
+        state.m = m
+    added = {key: row for key, row in rows.items() if _klink_row(row) != state.papers.get(key)}
+    removed = [key for key in state.papers if key not in rows]
+    if not added and not removed:
+        return {"sequence": state.sequence, "keywords": [], "entities": [], "links": [], "cooccurrence": {}}
+
+    delta = state.update(added, removed)
+    write_delta(delta, path / DELTA_DIR_PATTERN.format(delta["sequence"]))
+    state.save(path)
+    print(
+        f"{named_list}: {len(added)} papers added or changed, {len(removed)} removed, "
+        f"{len(delta['links'])} links and {len(delta['cooccurrence'])} co-occurrence tables updated."
+    )
+    return delta
@@ -0,0 +1,135 @@
+"""
+The input variables of Klink-2 grouped by keyword, built from the Klink input with vectorized
+group-bys instead of the row by row klink2/input.R:read_dataset, and written as a columnar
+binary file that klink2/input.R:read_tables loads in one shot with `readBin`.
+"""
+
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .tuning import RELATIONS
+
+MAGIC = b"KLNK"
+FORMAT_VERSION = 1
+# type codes of the columns: little-endian int32, float64, and NUL terminated UTF-8 strings
+INT, DOUBLE, STRING = 0, 1, 2
+
+
+def _explode(values: "pd.Series", lower: bool = False, unique: bool = True) -> "pd.Series":
+    """Returns (pd.Series): The `;` separated items of each paper, stripped, non empty, and unique per paper if set."""
+    values = values.str.lower() if lower else values
+    items = values.str.split(";").explode().str.strip()
+    items = items[items.notna() & (items != "")]
+    if not unique:
+        return items
+    return items[~pd.DataFrame({"paper": items.index, "item": items.values}).duplicated().to_numpy()]
+
+
+def build_klink_tables(data: "pd.DataFrame") -> dict[str, "np.ndarray | list[str]"]:
+    """
+    Group the papers by keyword as klink2/input.R:read_dataset does, for all the papers at once.
+    As in R, the papers are processed from the last to the first one, which sets the indexes of the
+    keywords and the order of the rows of `reldb_df`, the publications of a keyword are kept even when
+    repeated, and the authors of a paper are not made unique in `reldb_df`.
+    Unlike R, empty items, e.g. in "a;;b", are dropped, the entities are sorted by code point instead
+    of the collation of the locale, and a paper listing an author twice has it once in `reldb_l`.
+
+    Args:
+        data (pd.DataFrame): The Klink input, with the columns DE, TI, AU, SO, SC, PY,
+            see `Reader.export_as_klink_input`. Papers without keywords are ignored.
+
+    Returns (dict[str, np.ndarray | list[str]]): The columns, with 0 based indexes:
+        - `keywords`: the keywords, in order of first appearance from the last paper.
+        - `<relation>_entities`, `<relation>_keyword`, `<relation>_entity`: the distinct entities
+          (`<name>_<year>`) of each relation, and the links of the keywords to them, sorted by
+          keyword then entity. They are `reldb_l`.
+        - `df_keyword`, `df_relation` (1 based as in R), `df_entity` (in `df_names`), `df_year`:
+          the entities of each paper for each of its keywords, which are `reldb_df`.
+    """
+    data = data.iloc[::-1].reset_index(drop=True).fillna("").astype(str)
+    keywords = _explode(data["DE"], lower=True)
+    data = data.loc[keywords.index.unique()].sort_index()
+    keywords = keywords.sort_index(kind="stable")
+    keyword_ids, keyword_names = pd.factorize(keywords.values)
+    paper_keywords = pd.DataFrame({"paper": keywords.index.to_numpy(), "keyword": keyword_ids})
+
+    year = data["PY"].str.split(".").str[0]
+    names = {
+        "publication": data["TI"],
+        "author": _explode(data["AU"], unique=False),
+        "venue": data["SO"].str.lower(),
+        "area": _explode(data["SC"], lower=True),
+    }
+    tables: dict[str, np.ndarray | list[str]] = {"keywords": list(keyword_names)}
+    frames = []
+    for relation_id, relation in enumerate(RELATIONS, 1):
+        entities = pd.DataFrame({"paper": names[relation].index.to_numpy(), "name": names[relation].values})
+        entities["year"] = year.loc[entities["paper"]].to_numpy()
+        entities["order"] = np.arange(len(entities))
+        links = paper_keywords.merge(entities, on="paper")
+        frames.append(links.assign(relation=relation_id))
+
+        labels = pd.DataFrame({"keyword": links["keyword"], "entity": links["name"] + "_" + links["year"]})
+        if relation != "publication":
+            labels = labels.drop_duplicates()
+        labels = labels.sort_values(["keyword", "entity"], kind="stable")
+        entity_ids, entity_names = pd.factorize(labels["entity"])
+        tables[f"{relation}_entities"] = list(entity_names)
+        tables[f"{relation}_keyword"] = labels["keyword"].to_numpy()
+        tables[f"{relation}_entity"] = entity_ids
+
+    # rows of a keyword: its papers in order, each with its entities in the order of the relations
+    frame = pd.concat(frames).sort_values(["keyword", "paper", "relation", "order"], kind="stable")
+    df_entity, df_names = pd.factorize(frame["name"])
+    tables["df_keyword"] = frame["keyword"].to_numpy()
+    tables["df_relation"] = frame["relation"].to_numpy()
+    tables["df_entity"] = df_entity
+    tables["df_names"] = list(df_names)
+    tables["df_year"] = pd.to_numeric(frame["year"], errors="coerce").to_numpy(dtype=float)
+    return tables
+
+
+def write_klink_tables(tables: dict, path: str | Path):
+    """
+    Write the columns to a binary file: the magic number `KLNK`, the format version and the number
+    of columns as int32, then for each column its NUL terminated name, its type and length as int32,
+    and its values. See klink2/input.R:read_tables.
+    """
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<ii", FORMAT_VERSION, len(tables)))
+        for name, values in tables.items():
+            if isinstance(values, np.ndarray) and values.dtype.kind in "iub":
+                kind, content = INT, values.astype("<i4").tobytes()
+            elif isinstance(values, np.ndarray):
+                kind, content = DOUBLE, values.astype("<f8").tobytes()
+            else:
+                kind, content = STRING, b"".join(value.replace("\0", "").encode("utf-8") + b"\0" for value in values)
+            f.write(name.encode("utf-8") + b"\0" + struct.pack("<ii", kind, len(values)) + content)
+
+
+def read_klink_tables(path: str | Path) -> dict[str, "np.ndarray | list[str]"]:
+    """Returns (dict[str, np.ndarray | list[str]]): The columns written by `write_klink_tables`."""
+    content = Path(path).read_bytes()
+    if content[:4] != MAGIC:
+        raise Exception(f"{path} is not a Klink tables file.")
+    version, num_columns = struct.unpack_from("<ii", content, 4)
+    if version != FORMAT_VERSION:
+        raise Exception(f"Unsupported Klink tables format version {version}.")
+    offset, tables = 12, {}
+    for _ in range(num_columns):
+        end = content.index(b"\0", offset)
+        name = content[offset:end].decode("utf-8")
+        kind, length = struct.unpack_from("<ii", content, end + 1)
+        offset = end + 9
+        if kind == STRING:
+            values = content[offset:].split(b"\0", length)[:length]
+            offset += sum(map(len, values)) + length
+            tables[name] = [value.decode("utf-8") for value in values]
+        else:
+            dtype = "<i4" if kind == INT else "<f8"
+            tables[name] = np.frombuffer(content, dtype=dtype, count=length, offset=offset)
+            offset += length * np.dtype(dtype).itemsize
+    return tables
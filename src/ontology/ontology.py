@@ -1,13 +1,20 @@
-from config import DATA_PATH
+import hashlib
+import json
 
+from config import get_config
 
-HEADER = (
+
+PREFIXES = (
     "@prefix : <http://http://aiod.eu/schema/aiod#> .\n"
+    "@prefix dc: <http://purl.org/dc/elements/1.1/> .\n"
     "@prefix owl: <http://www.w3.org/2002/07/owl#> .\n"
     "@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .\n"
     "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n"
     "@base <http://http://aiod.eu/schema/aiod#> .\n"
-    "\n"
+)
+
+HEADER = (
+    PREFIXES + "\n"
     "<http://http://aiod.eu/schema/aiod#> rdf:type owl:Ontology ;\n"
     '                                         dc:title "AIoD Ontology"@en ;\n'
     '                                         dc:description "AI on demand"@en .\n'
@@ -19,48 +26,120 @@ PREDICATE_DICT = {
     "klink:contributesTo": "Contributes To",
 }
 
+INDEX_VERSION = 1
+# Name of the triples added and removed by an export, numbered from 1, see `export_ontology`
+DELTA_FILE_PATTERN = "{}.delta-{:06d}.{}.ttl"
+
+
+def keyword_iri(keyword: str) -> str:
+    """Returns (str): The prefixed IRI of a keyword, derived from its name."""
+    return ":" + keyword.strip().replace(" ", "_").replace(".", "").replace("(", "_").replace(")", "_")
 
-def export_ontology(named_list: str):
+
+def relation_iri(kw1: str, kw2: str, predicate: str) -> str:
+    """Returns (str): The prefixed IRI of a relation, derived from its keywords and predicate."""
+    content = "\t".join([kw1.strip(), predicate.strip(), kw2.strip()])
+    return f":RE_{hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]}"
+
+
+def relation_triples(iri: str, kw1: str, kw2: str, predicate: str) -> list[str]:
+    """Returns (list[str]): The triples describing a relation, one per line."""
+    return [
+        f"{iri} a owl:ObjectProperty .",
+        f"{iri} rdfs:domain {keyword_iri(kw1)} .",
+        f"{iri} rdfs:range {keyword_iri(kw2)} .",
+        f'{iri} rdfs:label "{PREDICATE_DICT[predicate.strip()]}"@en .',
+    ]
+
+
+def _read_relations(triples_path) -> dict[str, list[str]]:
+    """Returns (dict[str, list[str]]): The [keyword 1, keyword 2, predicate] of each relation by IRI."""
+    with open(triples_path, "r") as f:
+        lines = f.readlines()
+    relations = {}
+    for line in lines[1:]:
+        kw1, kw2, predicate = [value.strip() for value in line.split(";")]
+        relations[relation_iri(kw1, kw2, predicate)] = [kw1, kw2, predicate]
+    return dict(sorted(relations.items()))
+
+
+def _write_triples(path, relations: dict[str, list[str]]):
+    with open(path, "w") as f:
+        f.write(PREFIXES + "\n")
+        for iri, relation in relations.items():
+            f.write("\n".join(relation_triples(iri, *relation)) + "\n")
+
+
+def export_ontology(named_list: str, full: bool = False) -> dict[str, int]:
     """
     Export ontology from a named list.
 
+    The relations are named after a hash of their keywords and predicate, so that the same relation
+    keeps its IRI across exports. The relations of each export are saved in an index
+    (`<named_list>.index.json`) with the sequence number of the export, and the triples added and
+    removed since the previous export are written to `<named_list>.delta-<sequence>.added.ttl` and
+    `<named_list>.delta-<sequence>.removed.ttl`, sequence padded to 6 digits. The triple stores apply
+    the deltas in order after the last one they applied, instead of reloading the whole ontology.
+
     Args:
         named_list (str): Name of the list.
+        full (bool): Whether to write the whole ontology (`<named_list>.ttl`). It is always written
+            when there is no previous export.
 
     Raises:
         Exception: If the triples file is not found.
 
-    Prints:
-        str: Confirmation message with the exported file path.
+    Returns (dict[str, int]): The sequence number of the export, and the number of relations
+        "added" and "removed" since the previous one.
     """
-    body = "\n"
-
-    triples_path = DATA_PATH / "klink2" / named_list / f"{named_list}_triples.csv"
+    data_path = get_config().get_data_path()
+    triples_path = data_path / "klink2" / named_list / f"{named_list}_triples.csv"
     if not triples_path.is_file():
         raise Exception(
             f"File {triples_path} not found. Make sure the triples were generated and saved correctly."
         )
-    with open(triples_path, "r") as f:
-        lines = f.readlines()
-    i = 1
-    for line in lines[1:]:
-        kw1, kw2, predicate = line.split(";")
-        label = PREDICATE_DICT[predicate.strip()]
-        kw1 = kw1.replace(" ", "_").replace(".", "").replace("(", "_").replace(")", "_")
-        kw2 = kw2.replace(" ", "_").replace(".", "").replace("(", "_").replace(")", "_")
-
-        relation = (
-            f":RE{i} a owl:ObjectProperty ;\n"
-            f"   rdfs:domain :{kw1.strip()} ;\n"
-            f"   rdfs:range :{kw2.strip()} ;\n"
-            f'   rdfs:label "{label}"@en .\n'
-        )
-        body += "\n" + relation
-        i += 1
-    ontology_str = HEADER + body
+    relations = _read_relations(triples_path)
+
+    ontology_path = data_path / "ontology"
+    ontology_path.mkdir(parents=True, exist_ok=True)
+    index_path = ontology_path / f"{named_list}.index.json"
+    previous = {}
+    sequence = 1
+    if index_path.is_file():
+        with open(index_path, "r") as f:
+            index = json.load(f)
+        sequence = index.get("sequence", 0) + 1
+        if index.get("version") == INDEX_VERSION:
+            previous = index["relations"]
+        else:
+            print(f"Ignoring {index_path}: unsupported version {index.get('version')}.")
+            full = True
+    else:
+        full = True
+
+    added = {iri: relation for iri, relation in relations.items() if iri not in previous}
+    removed = {iri: relation for iri, relation in previous.items() if iri not in relations}
+    _write_triples(ontology_path / DELTA_FILE_PATTERN.format(named_list, sequence, "added"), added)
+    _write_triples(ontology_path / DELTA_FILE_PATTERN.format(named_list, sequence, "removed"), removed)
+    print(
+        f"{len(added)} relations added and {len(removed)} removed, see "
+        f"{ontology_path / DELTA_FILE_PATTERN.format(named_list, sequence, '*')}"
+    )
 
-    ontology_file_path = DATA_PATH / "ontology" / f"{named_list}.ttl"
-    with open(ontology_file_path, "w") as f:
-        f.write(ontology_str)
+    if full:
+        ontology_file_path = ontology_path / f"{named_list}.ttl"
+        with open(ontology_file_path, "w") as f:
+            f.write(HEADER + "\n")
+            for iri, relation in relations.items():
+                kw1, kw2, predicate = relation
+                f.write(
+                    f"\n{iri} a owl:ObjectProperty ;\n"
+                    f"   rdfs:domain {keyword_iri(kw1)} ;\n"
+                    f"   rdfs:range {keyword_iri(kw2)} ;\n"
+                    f'   rdfs:label "{PREDICATE_DICT[predicate]}"@en .\n'
+                )
+        print(f"File exported to {ontology_file_path}")
 
-    print(f"File exported to {ontology_file_path}")
+    with open(index_path, "w") as f:
+        json.dump({"version": INDEX_VERSION, "sequence": sequence, "relations": relations}, f)
+    return {"sequence": sequence, "added": len(added), "removed": len(removed)}
@@ -0,0 +1,293 @@
+"""
+Estimation of the Klink-2 thresholds of `klink2/param.R` from the Klink input, in a single pass
+over the papers and with a sample of the keyword co-occurrences, instead of a full Klink-2 run.
+"""
+
+import csv
+import time
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from config import get_config
+
+# Input relations of Klink-2, see klink2/input.R
+RELATIONS = ["publication", "author", "venue", "area"]
+
+# The values of klink2/param.R, used when there is not enough data to estimate one
+DEFAULT_PARAMS = {
+    "relkeyT": [2, 4, 4, 2],
+    "relkeyAmbig": [1, 4, 2, 2],
+    "tR": [0.6, 0.6, 0.6, 0.1],
+    "tS": 0.95,
+}
+
+
+# constants of the splitmix64 finalizer
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _hash(keys: "np.ndarray") -> "np.ndarray":
+    """Returns (np.ndarray): Well distributed 64 bits hashes of the integer keys, see splitmix64."""
+    x = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def _split(value, lower: bool = False) -> list[str]:
+    values = str(value or "").lower() if lower else str(value or "")
+    return list(dict.fromkeys(item.strip() for item in values.split(";") if item.strip()))
+
+
+def read_klink_input(path: str | Path) -> Iterable[dict]:
+    """Stream the papers of a Klink input tsv file, see `Reader.export_as_klink_input`."""
+    with open(path, "r", newline="") as f:
+        yield from csv.DictReader(f, delimiter="\t")
+
+
+def _incidence(rows: Iterable[dict]) -> tuple[list[str], dict[str, "np.ndarray"], int]:
+    """
+    Read the papers once, as klink2/input.R does: a keyword is linked to the entities of each
+    relation of the paper, the title, the authors, the venue and the areas, each with the year.
+
+    Returns (tuple[list[str], dict[str, np.ndarray], int]): The keywords, the distinct
+        (entity, keyword) pairs of each relation encoded as `entity * number of keywords + keyword`,
+        and the number of papers with keywords.
+    """
+    keywords: dict[str, int] = {}
+    entities: dict[str, dict[str, int]] = {relation: {} for relation in RELATIONS}
+    links: dict[str, list[tuple[int, int]]] = {relation: [] for relation in RELATIONS}
+    papers = 0
+    for row in rows:
+        paper_keywords = [keywords.setdefault(k, len(keywords)) for k in _split(row.get("DE"), lower=True)]
+        if not paper_keywords:
+            continue
+        papers += 1
+        year = str(row.get("PY") or "").split(".")[0]
+        paper_entities = {
+            "publication": [str(row.get("TI") or "")],
+            "author": _split(row.get("AU")),
+            "venue": [str(row.get("SO") or "").lower()],
+            "area": _split(row.get("SC"), lower=True),
+        }
+        for relation, names in paper_entities.items():
+            for name in names:
+                entity = entities[relation].setdefault(f"{name}_{year}", len(entities[relation]))
+                links[relation] += [(entity, keyword) for keyword in paper_keywords]
+
+    num_keywords = max(len(keywords), 1)
+    incidence = {
+        relation: np.unique(
+            np.array([entity * num_keywords + keyword for entity, keyword in links[relation]], dtype=np.int64)
+        )
+        for relation in RELATIONS
+    }
+    return list(keywords), incidence, papers
+
+
+def _pair_chunks(
+    entity_of: "np.ndarray", keyword_of: "np.ndarray", sampled: "np.ndarray", num_keywords: int, chunk_size: int
+):
+    """
+    Yield the co-occurrences of the sampled keywords, i.e. their pairs with the keywords linked
+    to a same entity, once per shared entity. A pair is encoded as `keyword * number of keywords
+    + other keyword` with keyword < other keyword, and yielded from one side only when both are sampled.
+
+    Args:
+        entity_of (np.ndarray): Entity of each link, sorted by entity then keyword.
+        keyword_of (np.ndarray): Keyword of each link.
+        sampled (np.ndarray): Whether each keyword is sampled.
+        num_keywords (int): Number of keywords.
+        chunk_size (int): Maximum number of candidate pairs yielded at once.
+    """
+    starts = np.flatnonzero(np.r_[True, entity_of[1:] != entity_of[:-1]])
+    sizes = np.diff(np.r_[starts, len(entity_of)])
+    group_start = np.repeat(starts, sizes)
+    group_size = np.repeat(sizes, sizes)
+
+    positions = np.flatnonzero(sampled[keyword_of] & (group_size > 1))
+    total = np.cumsum(group_size[positions])
+    begin = 0
+    while begin < len(positions):
+        done = total[begin - 1] if begin else 0
+        end = max(int(np.searchsorted(total, done + chunk_size, side="right")), begin + 1)
+        chunk = positions[begin:end]
+        position = np.repeat(chunk, group_size[chunk])
+        first = np.repeat(np.cumsum(np.r_[0, group_size[chunk][:-1]]), group_size[chunk])
+        other = group_start[position] + np.arange(len(position)) - first
+        keyword, partner = keyword_of[position], keyword_of[other]
+        keep = (partner != keyword) & (~sampled[partner] | (partner > keyword))
+        low = np.minimum(keyword, partner)[keep].astype(np.uint64)
+        high = np.maximum(keyword, partner)[keep].astype(np.uint64)
+        yield low * np.uint64(num_keywords) + high
+        begin = end
+
+
+def cooccurrence_statistics(
+    rows: Iterable[dict],
+    max_pairs: int = 1 << 23,
+    sample_rate: float = 1.0,
+    top: int = 10,
+    chunk_size: int = 1 << 22,
+) -> dict:
+    """
+    Approximate the keyword frequencies and co-occurrence distributions of each relation.
+
+    The co-occurrence of two keywords in a relation is the number of entities they share,
+    as computed by klink2/input.R:cache_cooccurrence. Computing all of them grows with the square
+    of the keywords per entity, so only the pairs of a sample of the keywords are counted.
+    The keywords are sampled by hash, so the samples of lower rates are included in the higher ones.
+    The rate of each relation is chosen to count at most about `max_pairs` co-occurrences:
+    all of them on small lists, a fraction on the dense relations of large ones, e.g. area.
+
+    Args:
+        rows (Iterable[dict]): The papers with the columns of the Klink input: DE, TI, AU, SO, SC, PY,
+            e.g. `read_klink_input(path)` or the records of `Reader.export_as_klink_input`.
+        max_pairs (int, optional): Maximum expected number of co-occurrences counted per relation.
+            Defaults to 2^23.
+        sample_rate (float, optional): Maximum fraction of the keywords sampled. Defaults to 1.
+        top (int, optional): Number of most co-occurring sampled pairs reported. Defaults to 10.
+        chunk_size (int, optional): Maximum number of pairs processed at once. Defaults to 2^22.
+
+    Returns (dict): The number of papers and keywords, and for each relation: the entities per keyword
+        (`frequency`), the sampling `rate`, the co-occurrences of the sampled pairs with the frequencies
+        of their keywords (`sample`) and the `top` pairs.
+    """
+    keywords, incidence, papers = _incidence(rows)
+    num_keywords = max(len(keywords), 1)
+    keyword_hashes = _hash(np.arange(len(keywords)))
+    statistics = {"papers": papers, "keywords": len(keywords), "relations": {}}
+
+    for relation in RELATIONS:
+        entity_of, keyword_of = np.divmod(incidence[relation], num_keywords)
+        frequency = np.bincount(keyword_of, minlength=len(keywords))
+        group_sizes = np.bincount(entity_of).astype(float)
+        rate = min(sample_rate, max_pairs / max(1.0, float((group_sizes * (group_sizes - 1)).sum())))
+        sampled = keyword_hashes < np.uint64(min(rate * 2.0**64, 2.0**64 - 4096))
+
+        chunks, chunk_counts = [], []
+        for pairs in _pair_chunks(entity_of, keyword_of, sampled, num_keywords, chunk_size):
+            pairs, counts = np.unique(pairs, return_counts=True)
+            chunks.append(pairs)
+            chunk_counts.append(counts)
+        pairs = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint64)
+        pairs, index = np.unique(pairs, return_inverse=True)
+        cooccurrence = np.bincount(
+            index.reshape(-1), weights=np.concatenate(chunk_counts) if chunks else None, minlength=len(pairs)
+        ).astype(np.int64)
+
+        first, second = (part.astype(np.int64) for part in np.divmod(pairs, np.uint64(num_keywords)))
+        strongest = np.argsort(-cooccurrence, kind="stable")[:top]
+        statistics["relations"][relation] = {
+            "frequency": frequency,
+            "rate": rate,
+            "sample": {
+                "cooccurrence": cooccurrence,
+                "frequency": np.stack([frequency[first], frequency[second]], axis=1),
+            },
+            "top": [
+                (keywords[first[i]], keywords[second[i]], int(cooccurrence[i])) for i in strongest
+            ],
+        }
+    return statistics
+
+
+def suggest_params(statistics: dict, related_quantile: float = 0.9) -> dict:
+    """
+    Suggest the thresholds of klink2/param.R from the co-occurrence statistics.
+    They are heuristics to start from, instead of trial runs:
+
+    - relkeyT: the pairs co-occurring more than it are about the top `1 - related_quantile` of the pairs.
+    - relkeyAmbig: twice relkeyT, the ratio of the values of the original Klink-2 parameters.
+    - tR: the upper quartile of the asymmetry of the conditional probabilities, |P(x|y) - P(y|x)|,
+      of the related pairs. It bounds the hierarchical metric, which is weighted by similarities <= 1.
+    - tS: the 95th percentile of the Jaccard index of the entities of the related pairs.
+
+    Args:
+        statistics (dict): See `cooccurrence_statistics`.
+        related_quantile (float, optional): Quantile of the co-occurrences used for relkeyT. Defaults to 0.9.
+
+    Returns (dict): The parameters, lists with a value per relation as in `RELATIONS`, except tS.
+    """
+    params = {key: list(value) if isinstance(value, list) else value for key, value in DEFAULT_PARAMS.items()}
+    jaccard = []
+    for i, relation in enumerate(RELATIONS):
+        sample = statistics["relations"][relation]["sample"]
+        cooccurrence = sample["cooccurrence"]
+        if not len(cooccurrence):
+            continue
+        threshold = max(1, int(np.quantile(cooccurrence, related_quantile)))
+        params["relkeyT"][i] = threshold
+        params["relkeyAmbig"][i] = 2 * threshold
+
+        related = cooccurrence > threshold
+        if not related.any():
+            related = cooccurrence >= threshold
+        shared = cooccurrence[related].astype(float)
+        frequency = sample["frequency"][related].astype(float)
+        asymmetry = np.abs(shared / frequency[:, 0] - shared / frequency[:, 1])
+        params["tR"][i] = round(float(np.clip(np.quantile(asymmetry, 0.75), 0.05, 0.95)), 2)
+        jaccard.append(shared / (frequency.sum(axis=1) - shared))
+
+    if jaccard:
+        params["tS"] = round(float(np.clip(np.quantile(np.concatenate(jaccard), 0.95), 0.05, 0.99)), 2)
+    return params
+
+
+def write_param_file(params: dict, path: str | Path, statistics: dict | None = None):
+    """Write the parameters as R code overriding the ones of klink2/param.R, see klink2/main.R."""
+
+    def r_vector(values) -> str:
+        return "c(" + ", ".join(str(value) for value in values) + ")"
+
+    lines = [
+        f"# Klink-2 parameters suggested by ontology/tuning.py on {time.strftime('%Y-%m-%d %H:%M')}",
+        f"# relations: {', '.join(RELATIONS)}",
+    ]
+    if statistics is not None:
+        lines.append(f"# {statistics['papers']} papers, {statistics['keywords']} keywords")
+        for relation in RELATIONS:
+            cooccurrence = statistics["relations"][relation]["sample"]["cooccurrence"]
+            if len(cooccurrence):
+                quantiles = np.quantile(cooccurrence, [0.5, 0.9, 0.99])
+                lines.append(
+                    f"# {relation} co-occurrence: median {quantiles[0]:g}, 90% {quantiles[1]:g}, 99% {quantiles[2]:g}"
+                )
+    lines += [
+        f"relkeyT <- {r_vector(params['relkeyT'])}",
+        f"relkeyAmbig <- {r_vector(params['relkeyAmbig'])}",
+        f"tR <- {r_vector(params['tR'])}",
+        f"tS <- {params['tS']}",
+    ]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def tune_klink_params(named_list: str, rows: Iterable[dict] | None = None, **kwargs) -> dict:
+    """
+    Suggest the Klink-2 thresholds of a named list and write them to
+    `DATA_PATH/klink2/<named_list>/<named_list>_param.R`, used by klink2/main.R.
+
+    Args:
+        named_list (str): The name of the list.
+        rows (Iterable[dict], optional): The papers. Defaults to the Klink input of the list,
+            see `Reader.export_as_klink_input`.
+        **kwargs: See `cooccurrence_statistics`.
+
+    Returns (dict): The suggested parameters, see `suggest_params`.
+    """
+    dir_path = get_config().get_data_path() / "klink2" / named_list
+    if rows is None:
+        input_path = dir_path / f"{named_list}.tsv"
+        if not input_path.is_file():
+            raise Exception(f"File {input_path} not found. Export the Klink input of the list first.")
+        rows = read_klink_input(input_path)
+
+    statistics = cooccurrence_statistics(rows, **kwargs)
+    params = suggest_params(statistics)
+    dir_path.mkdir(parents=True, exist_ok=True)
+    write_param_file(params, dir_path / f"{named_list}_param.R", statistics)
+    return params
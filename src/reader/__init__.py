@@ -1 +1,2 @@
 from .reader import Paper, Reader
+from .executor import ExtractionExecutor
@@ -0,0 +1,267 @@
+"""
+Single pass BibTeX parser and streaming reader for BibTeX dumps
+"""
+
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from utils.utils import normalize_doi
+
+ENTRY_START_PATTERN = re.compile(r"\s*@\s*(\w+)\s*[{(]")
+# A line starting an entry, even inside an unclosed value of the previous one
+ENTRY_HEADER_PATTERN = re.compile(r"@\w+\s*[{(]")
+FIELD_NAME_PATTERN = re.compile(r"\s*([^\s=,{}()\"#]+)\s*=\s*")
+BARE_VALUE_PATTERN = re.compile(r"[^\s,{}()\"#]+")
+AUTHORS_SEPARATOR_PATTERN = re.compile(r"\s+and\s+", re.IGNORECASE)
+KEYWORDS_SEPARATOR_PATTERN = re.compile(r"[,;]")
+
+
+class BibtexSyntaxError(Exception):
+    """Raised when an entry does not follow the BibTeX syntax"""
+
+
+class _EntryParser:
+    """Parses a single entry scanning its characters once."""
+
+    def __init__(self, text: str, macros: dict[str, str]) -> None:
+        self.text = text
+        self.macros = macros
+        self.pos = 0
+
+    def _skip_spaces(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def _error(self, msg: str) -> BibtexSyntaxError:
+        return BibtexSyntaxError(f"{msg} at position {self.pos}: {self.text[:50]}...")
+
+    def _delimited(self, closing: str) -> str:
+        """Reads a value delimited by braces or quotes, keeping the inner braces."""
+        start = self.pos
+        depth = 0
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == "\\":
+                self.pos += 2
+                continue
+            if char == "{":
+                depth += 1
+            elif char == "}" and depth > 0:
+                depth -= 1
+            elif char == closing and depth == 0:
+                self.pos += 1
+                return self.text[start: self.pos - 1]
+            self.pos += 1
+        raise self._error("Unbalanced value")
+
+    def _value(self) -> str:
+        """Reads a value, which can be a concatenation of pieces with `#`."""
+        pieces = []
+        while True:
+            self._skip_spaces()
+            char = self.text[self.pos: self.pos + 1]
+            if char == "{":
+                self.pos += 1
+                pieces.append(self._delimited("}"))
+            elif char == '"':
+                self.pos += 1
+                pieces.append(self._delimited('"'))
+            else:
+                match = BARE_VALUE_PATTERN.match(self.text, self.pos)
+                if not match:
+                    raise self._error("Missing value")
+                self.pos = match.end()
+                word = match.group()
+                pieces.append(self.macros.get(word.lower(), word))
+            self._skip_spaces()
+            if self.text[self.pos: self.pos + 1] != "#":
+                return "".join(pieces)
+            self.pos += 1
+
+    def _fields(self) -> dict[str, str]:
+        """Reads `name = value` pairs until the end of the entry."""
+        fields = {}
+        while True:
+            self._skip_spaces()
+            if self.text[self.pos: self.pos + 1] in ("}", ")", ""):
+                return fields
+            match = FIELD_NAME_PATTERN.match(self.text, self.pos)
+            if not match:
+                raise self._error("Missing field name")
+            self.pos = match.end()
+            fields[match.group(1).lower()] = self._value()
+            self._skip_spaces()
+            if self.text[self.pos: self.pos + 1] == ",":
+                self.pos += 1
+
+    def parse(self) -> dict[str, str] | None:
+        """
+        Returns (dict[str, str] | None): The fields of the entry with lower case names,
+            along with "ENTRYTYPE" and "ID". None for `@comment`, `@preamble` and `@string`,
+            the latter being added to the macros.
+        """
+        match = ENTRY_START_PATTERN.match(self.text)
+        if not match:
+            raise self._error("Missing entry type")
+        self.pos = match.end()
+        entry_type = match.group(1).lower()
+
+        match entry_type:
+            case "comment" | "preamble":
+                return None
+            case "string":
+                self.macros.update(self._fields())
+                return None
+
+        key_end = self.text.find(",", self.pos)
+        if key_end == -1:
+            raise self._error("Missing entry key")
+        entry = {"ENTRYTYPE": entry_type, "ID": self.text[self.pos: key_end].strip()}
+        self.pos = key_end + 1
+        entry.update(self._fields())
+        return entry
+
+
+def _clean(value: str) -> str:
+    """Removes the protecting braces, escapes and extra spaces from a value"""
+    value = value.replace("\\&", "&").replace("{", "").replace("}", "")
+    return " ".join(value.split())
+
+
+def _split_at_depth_zero(value: str, pattern: re.Pattern) -> list[str]:
+    """Splits the value where the pattern matches out of any braces"""
+    depth_at = []
+    depth = 0
+    for char in value:
+        depth_at.append(depth)
+        depth += (char == "{") - (char == "}")
+
+    parts = []
+    start = 0
+    for match in pattern.finditer(value):
+        if depth_at[match.start()] == 0:
+            parts.append(value[start: match.start()])
+            start = match.end()
+    parts.append(value[start:])
+    return parts
+
+
+def split_authors(value: str) -> list[str]:
+    """Splits the raw `author` field on the `and` separating the names"""
+    authors = [_clean(name) for name in _split_at_depth_zero(value, AUTHORS_SEPARATOR_PATTERN)]
+    return [name for name in authors if name]
+
+
+def parse(text: str, macros: dict[str, str] | None = None) -> list[dict[str, str]]:
+    """
+    Parse all the entries of a BibTeX string.
+
+    Args:
+        text (str): The BibTeX content.
+        macros (dict[str, str], optional): The `@string` definitions, updated in place.
+
+    Returns (list[dict[str, str]]): The raw entries, see `_EntryParser.parse`.
+    """
+    return list(iter_entries(text.splitlines(keepends=True), macros))
+
+
+def _brace_depth_change(line: str) -> int:
+    """Returns (int): The braces opened minus the ones closed in a line, ignoring the escaped ones."""
+    line = line.replace("\\\\", "").replace("\\{", "").replace("\\}", "")
+    return line.count("{") - line.count("}")
+
+
+def iter_entries(
+    lines: Iterable[str], macros: dict[str, str] | None = None, skip_invalid: bool = False
+) -> Iterator[dict[str, str]]:
+    """
+    Stream the entries from lines of BibTeX, e.g. an open file.
+    Entries are expected to start at the beginning of a line, as in any exported dump.
+    A line starting with `@` inside the braces of an entry, e.g. in an abstract, doesn't start
+    a new entry, unless it's an entry header at the very beginning of the line, e.g. `@article{`,
+    so that an unclosed brace only affects its own entry.
+
+    Args:
+        lines (Iterable[str]): The lines of BibTeX.
+        macros (dict[str, str], optional): The `@string` definitions, updated in place.
+        skip_invalid (bool, optional): Whether to print and skip the entries with a syntax error
+            instead of raising `BibtexSyntaxError`. Defaults to False.
+
+    Yields (dict[str, str]): The raw entries, see `_EntryParser.parse`.
+    """
+    macros = {} if macros is None else macros
+
+    def parse_buffer() -> dict[str, str] | None:
+        try:
+            return _EntryParser("".join(buffer), macros).parse()
+        except BibtexSyntaxError as err:
+            if not skip_invalid:
+                raise
+            print(f"Skipped invalid entry: {err}")
+            return None
+
+    buffer: list[str] = []
+    depth = 0
+    for line in lines:
+        starts_entry = (line.lstrip().startswith("@") and depth <= 0) or ENTRY_HEADER_PATTERN.match(line) is not None
+        if starts_entry and buffer:
+            entry = parse_buffer()
+            if entry:
+                yield entry
+            buffer = []
+        if buffer or starts_entry:
+            depth = (depth if buffer else 0) + _brace_depth_change(line)
+            buffer.append(line)
+    if buffer:
+        entry = parse_buffer()
+        if entry:
+            yield entry
+
+
+def index_file(path: str | Path, dois: Iterable[str] | None = None) -> dict[str, dict]:
+    """
+    Stream a BibTeX dump of any size and index its entries by normalized DOI.
+    The entries with a syntax error are printed and skipped.
+
+    Args:
+        path (str | Path): The `.bib` file.
+        dois (Iterable[str], optional): Only keep the entries of these DOIs. Defaults to all.
+
+    Returns (dict[str, dict]): The raw entries indexed by their normalized DOI.
+    """
+    wanted = None if dois is None else {normalize_doi(doi) for doi in dois}
+    index = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for entry in iter_entries(f, skip_invalid=True):
+            doi = normalize_doi(entry.get("doi", ""))
+            if doi and (wanted is None or doi in wanted):
+                index[doi] = entry
+    return index
+
+
+def to_metadata(entry: dict[str, str]) -> dict:
+    """Convert a raw entry to the metadata dictionary used by `Paper`"""
+
+    def field(name: str) -> str:
+        return _clean(entry.get(name, ""))
+
+    return {
+        "title": field("title"),
+        "volume": field("volume"),
+        "issn": field("issn"),
+        "url": field("url"),
+        "doi": normalize_doi(field("doi")),
+        "number": field("number"),
+        "journal": field("journal") or field("booktitle"),
+        "publisher": field("publisher"),
+        "author": split_authors(entry.get("author", "")),
+        "year": field("year"),
+        "month": field("month"),
+        "pages": field("pages"),
+        "keywords": [
+            keyword.strip().lower()
+            for keyword in KEYWORDS_SEPARATOR_PATTERN.split(field("keywords"))
+            if keyword.strip()
+        ],
+    }
@@ -0,0 +1,167 @@
+"""
+Near-duplicate detection with MinHash signatures and locality sensitive hashing (LSH),
+e.g. a preprint and the published version of a paper under different DOIs.
+"""
+
+import zlib
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAX_HASH = (1 << 32) - 1
+
+
+def minhash_signatures(
+    texts: list[str], num_perm: int = 128, shingle_size: int = 5, seed: int = 1
+) -> "np.ndarray":
+    """
+    MinHash signatures of the word shingles of the texts, with one permutation hashing:
+    the shingles are hashed once and split in `num_perm` bins by hash, each value of the
+    signature is the minimum of a bin. See `similarity` to compare two signatures.
+
+    The corpus is hashed at once: each word is hashed once, the shingles are combined
+    from the word hashes and the minimums of the bins of all the texts are found with a single sort.
+
+    Args:
+        texts (list[str]): The texts, e.g. `Paper.text`.
+        num_perm (int, optional): Length of the signatures. Defaults to 128.
+        shingle_size (int, optional): Number of words of a shingle. Texts with less words
+            have a single shingle. Defaults to 5.
+        seed (int, optional): Seed of the hash functions, signatures are only
+            comparable with the same seed. Defaults to 1.
+
+    Returns (np.ndarray): Array of shape (number of texts, num_perm), `MAX_HASH` in the empty bins.
+    """
+    import numpy as np
+
+    words_of_texts = [(text or "").split() for text in texts]
+    lengths = np.array([len(words) for words in words_of_texts], dtype=np.int64)
+    tokens = [word for words in words_of_texts for word in words]
+    vocabulary = {word: i for i, word in enumerate(dict.fromkeys(tokens))}
+    word_hashes = np.array([zlib.crc32(word.encode("utf-8")) for word in vocabulary], dtype=np.uint64)
+    token_hashes = word_hashes[
+        np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    ]
+
+    # shingle i of a text combines the hashes of its words i to i + shingle_size - 1
+    num_shingles = np.where(lengths > 0, np.maximum(lengths - shingle_size + 1, 1), 0)
+    text_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    shingle_text = np.repeat(np.arange(len(texts)), num_shingles)
+    first_shingle = np.concatenate([[0], np.cumsum(num_shingles)[:-1]])
+    shingle_starts = text_starts[shingle_text] + np.arange(len(shingle_text)) - first_shingle[shingle_text]
+    shingle_hashes = np.zeros(len(shingle_text), dtype=np.uint64)
+    for offset in range(shingle_size):
+        position = shingle_starts + offset
+        in_text = position < (text_starts + lengths)[shingle_text]
+        shingle_hashes = shingle_hashes * np.uint64(1_000_003) + np.where(
+            in_text, token_hashes[np.minimum(position, len(tokens) - 1)] if len(tokens) else 0, 0
+        ).astype(np.uint64)
+
+    # multiply-shift hash: (a * x + b) mod 2^64 with an odd a, its high bits choose the bin
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 64, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 1 << 64, dtype=np.uint64)
+    hashed = a * shingle_hashes + b
+    bins = (hashed >> np.uint64(32)) % np.uint64(num_perm)
+    values = hashed & np.uint64(MAX_HASH)
+
+    # sorted by (text, bin, value), the first entry of each (text, bin) is its minimum
+    cells = shingle_text.astype(np.uint64) * np.uint64(num_perm) + bins
+    keys = np.sort((cells << np.uint64(32)) | values)
+    cells, first = np.unique(keys >> np.uint64(32), return_index=True)
+    signatures = np.full((len(texts), num_perm), MAX_HASH, dtype=np.uint64)
+    signatures.reshape(-1)[cells.astype(np.int64)] = keys[first] & np.uint64(MAX_HASH)
+    return signatures
+
+
+def similarity(signature: "np.ndarray", other: "np.ndarray") -> float:
+    """Returns (float): The Jaccard similarity estimated from two signatures, ignoring the bins empty in both."""
+    import numpy as np
+
+    used = (signature != MAX_HASH) | (other != MAX_HASH)
+    if not used.any():
+        return 0.0
+    return float(np.count_nonzero((signature == other) & used) / np.count_nonzero(used))
+
+
+def choose_bands(num_perm: int, threshold: float) -> int:
+    """
+    The number of LSH bands such that pairs with a similarity above `threshold` are
+    very likely to share a band. The similarity from which a pair is more likely than
+    not to be a candidate, about (1 / bands) ** (1 / rows), is kept just below the threshold.
+
+    Returns (int): The number of bands, a divisor of `num_perm`.
+    """
+    options = [bands for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    below = [bands for bands in options if (1 / bands) ** (bands / num_perm) <= threshold]
+    return min(below) if below else num_perm
+
+
+def find_duplicates(
+    texts: list[str],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int | None = None,
+    shingle_size: int = 5,
+) -> list[list[int]]:
+    """
+    Find the clusters of near-duplicate texts without comparing all pairs: only the texts
+    sharing an LSH band of their signatures are compared, then linked when their estimated
+    similarity reaches the threshold. The empty texts are ignored.
+
+    Args:
+        texts (list[str]): The texts, e.g. `Paper.text`.
+        threshold (float, optional): Minimum estimated Jaccard similarity of the shingles. Defaults to 0.8.
+        num_perm (int, optional): Length of the signatures. Defaults to 128.
+        bands (int, optional): Number of LSH bands, a divisor of `num_perm`.
+            Defaults to the one chosen for the threshold, see `choose_bands`.
+        shingle_size (int, optional): Number of words of a shingle. Defaults to 5.
+
+    Returns (list[list[int]]): The clusters of 2 texts or more, as sorted indexes of the texts.
+    """
+    import numpy as np
+
+    bands = bands or choose_bands(num_perm, threshold)
+    if num_perm % bands:
+        raise ValueError("The number of bands must divide num_perm.")
+    rows = num_perm // bands
+    signatures = minhash_signatures(texts, num_perm, shingle_size)
+    indexes = np.flatnonzero([bool((text or "").strip()) for text in texts])
+    signatures_of = signatures[indexes]
+
+    parent = list(range(len(texts)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    compared = set()
+    for band in range(bands):
+        band_values = np.ascontiguousarray(signatures_of[:, band * rows:(band + 1) * rows])
+        _, buckets, sizes = np.unique(
+            band_values.view(np.dtype((np.void, rows * 8))).reshape(-1),
+            return_inverse=True,
+            return_counts=True,
+        )
+        buckets = buckets.reshape(-1)
+        shared = np.flatnonzero(sizes[buckets] > 1)
+        order = shared[np.argsort(buckets[shared], kind="stable")]
+        groups = np.split(order, np.flatnonzero(np.diff(buckets[order])) + 1) if len(order) else []
+        for group in groups:
+            first = group[0]
+            for other in group[1:]:
+                pair = (int(indexes[first]), int(indexes[other]))
+                if pair in compared or root(pair[0]) == root(pair[1]):
+                    continue
+                compared.add(pair)
+                if similarity(signatures_of[first], signatures_of[other]) >= threshold:
+                    parent[root(pair[1])] = root(pair[0])
+
+    clusters: dict[int, list[int]] = {}
+    for i in indexes.tolist():
+        clusters.setdefault(root(i), []).append(i)
+    return [cluster for cluster in clusters.values() if len(cluster) > 1]
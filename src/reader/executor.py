@@ -0,0 +1,237 @@
+"""
+Extraction of the PDF contents in worker processes, so that a malformed or huge PDF
+can't stall a whole run. Each paper has a time and memory budget, the workers are
+replaced after a number of papers, and the papers exceeding their budget are quarantined.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from config import get_config
+from store import TextStore
+from utils.errors import RecordError
+from .paper import Paper
+
+
+def _work(conn, memory_limit: int):
+    """
+    Worker process: extract the papers received until it gets None. The papers of the text store come
+    with their PDF keywords and first pages, from which only the abstract and keywords are extracted.
+    The results are sent as bytes, a status line then the extraction or the error, see `Paper.export_extraction`.
+    """
+    if memory_limit:
+        import resource
+
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while (task := conn.recv()) is not None:
+        files_path, file_name, doi, stored = task
+        try:
+            paper = Paper(files_path, file_name, filename_has_doi=False)
+            paper.doi = doi
+            if stored is None:
+                paper.load()
+            else:
+                pdf_keywords, *pages = stored
+                paper.load_pages(pages, pdf_keywords)
+            conn.send_bytes(b"ok\n" + paper.export_extraction())
+        except MemoryError:
+            conn.send_bytes(b"memory\nMemory limit exceeded.")
+        except Exception as err:
+            conn.send_bytes(f"error\n{type(err).__name__}: {err}".encode("utf-8", errors="replace"))
+
+
+class _Worker:
+    """A worker process and the paper it's extracting"""
+
+    def __init__(self, context, memory_limit: int) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_work, args=(child_conn, memory_limit), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        self.index = -1
+        self.paper: Paper | None = None
+        self.deadline = 0.0
+
+    def submit(self, index: int, paper: Paper, timeout: float, stored: list[str] | None = None):
+        self.conn.send((str(paper.full_path.parent), paper.file_name, paper.doi, stored))
+        self.index = index
+        self.paper = paper
+        self.deadline = time.monotonic() + timeout
+        self.tasks += 1
+
+    def stop(self):
+        """Let the worker exit, killing it if it doesn't."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExtractionExecutor:
+    """Loads papers in worker processes with a time and a memory limit per paper.
+
+    The papers are loaded as with `Paper.load`, but a paper whose extraction takes longer
+    than the timeout, exceeds the memory limit, fails or crashes its worker is skipped and
+    added to the quarantine list instead. A stuck worker is killed and replaced, so the time
+    of a run is bounded by the budget of each paper. The workers are also replaced after
+    `max_tasks_per_worker` papers, releasing the memory kept by the PDF libraries.
+
+    The workers are started with `spawn`, scripts using the executor need
+    the `if __name__ == "__main__":` guard.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        memory_limit: int | None = None,
+        max_tasks_per_worker: int | None = None,
+        workers: int | None = None,
+    ) -> None:
+        """
+        Args:
+            timeout (float, optional): Maximum time in seconds to extract a paper.
+                Defaults to the one in the config file.
+            memory_limit (int, optional): Maximum address space of a worker in megabytes, 0 for no limit.
+                Defaults to the one in the config file.
+            max_tasks_per_worker (int, optional): Papers extracted by a worker before it's replaced.
+                Defaults to the one in the config file.
+            workers (int, optional): Number of worker processes. Defaults to the one in the config file,
+                or the number of CPUs if it's 0.
+        """
+        config = get_config()
+        self.timeout = timeout if timeout is not None else config.get_executor_timeout()
+        self.memory_limit = (
+            memory_limit if memory_limit is not None else config.get_executor_memory_limit()
+        )
+        self.max_tasks_per_worker = (
+            max_tasks_per_worker or config.get_executor_max_tasks_per_worker()
+        )
+        self.workers = workers or config.get_executor_workers() or os.cpu_count() or 1
+        self.quarantine: list[dict] = []
+        self._context = multiprocessing.get_context("spawn")
+
+    def _quarantine(self, paper: Paper, reason: str, detail: str = ""):
+        print(f"{paper.doi or paper.file_name}: Quarantined ({reason}). {detail}".strip())
+        self.quarantine.append(
+            {"doi": paper.doi, "file": str(paper.full_path), "reason": reason, "detail": detail}
+        )
+
+    def _collect(self, worker: _Worker, ready: list, text_store: TextStore | None) -> tuple[Paper | None, bool]:
+        """
+        Handle the paper of a busy worker if it's done, failed or timed out.
+
+        Returns (tuple[Paper | None, bool]): The loaded paper if any, and whether the worker can be reused.
+        """
+        paper = worker.paper
+        if worker.conn in ready:
+            try:
+                status, _, value = worker.conn.recv_bytes().partition(b"\n")
+                status = status.decode()
+                if status != "ok":
+                    value = value.decode("utf-8", errors="replace")
+            except (EOFError, OSError):
+                status, value = "crash", f"Worker exited with code {worker.process.exitcode}."
+        elif worker.process.sentinel in ready:
+            status, value = "crash", f"Worker exited with code {worker.process.exitcode}."
+        else:
+            status, value = "timeout", f"Extraction took more than {self.timeout} seconds."
+
+        if status == "ok":
+            try:
+                paper.import_extraction(value, text_store)
+                return paper, worker.tasks < self.max_tasks_per_worker
+            except RecordError as err:
+                status, value = "error", f"{type(err).__name__}: {err}"
+        self._quarantine(paper, status, value)
+        return None, status == "error" and worker.tasks < self.max_tasks_per_worker
+
+    def load(self, papers: Iterable[Paper], text_store: TextStore | None = None) -> Iterator[Paper]:
+        """
+        Load the papers in the worker processes.
+
+        Args:
+            papers (Iterable[Paper]): The papers to load.
+            text_store (TextStore, optional): The pages of the papers already in it are read from it,
+                and only their abstract and keywords are extracted by the workers, within the same limits.
+                The others are added to it. Defaults to None.
+
+        Returns (Iterator[Paper]): The loaded papers, in the same order. The quarantined ones are skipped.
+        """
+        papers = iter(papers)
+        results: dict[int, Paper | None] = {}
+        submitted = 0
+        next_index = 0
+        exhausted = False
+        idle: list[_Worker] = []
+        busy: list[_Worker] = []
+
+        try:
+            while True:
+                while not exhausted and len(busy) < self.workers:
+                    paper = next(papers, None)
+                    if paper is None:
+                        exhausted = True
+                        break
+                    index, submitted = submitted, submitted + 1
+                    stored = None
+                    if text_store is not None and paper.doi and text_store.has(paper.doi):
+                        # the first two pages are the ones searched for the abstract and keywords
+                        stored = [text_store.pdf_keywords(paper.doi), *text_store.pages(paper.doi)[:2]]
+                    worker = idle.pop() if idle else _Worker(self._context, self.memory_limit)
+                    worker.submit(index, paper, self.timeout, stored)
+                    busy.append(worker)
+
+                while next_index in results:
+                    paper = results.pop(next_index)
+                    next_index += 1
+                    if paper is not None:
+                        yield paper
+
+                if not busy:
+                    if exhausted:
+                        break
+                    continue
+
+                timeout = max(0.0, min(worker.deadline for worker in busy) - time.monotonic())
+                ready = wait(
+                    [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                    timeout,
+                )
+                now = time.monotonic()
+                for worker in list(busy):
+                    if worker.conn not in ready and worker.process.sentinel not in ready and now < worker.deadline:
+                        continue
+                    busy.remove(worker)
+                    results[worker.index], reusable = self._collect(worker, ready, text_store)
+                    if reusable:
+                        idle.append(worker)
+                    elif worker.process.is_alive() and results[worker.index] is not None:
+                        worker.stop()
+                    else:
+                        worker.kill()
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy:
+                worker.kill()
+
+    def dump_quarantine(self, path: str | Path):
+        """Write the quarantined papers to a json file."""
+        with open(path, "w") as f:
+            json.dump(self.quarantine, f, indent=2)
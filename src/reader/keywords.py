@@ -0,0 +1,130 @@
+"""
+Corpus level keyphrase extraction, used as a fallback for the papers without keywords.
+"""
+
+import re
+
+# Words that can't be part of a keyphrase, they split the text in candidate phrases.
+STOPWORDS = frozenset(
+    """
+    a about above after again against all also although am among an and any are as at be
+    because been before being below between both but by can could did do does doing done down
+    due during each either et etc few for from further had has have having he her here hers
+    him his how however i if in into is it its itself just many may me might more most much
+    must my new no nor not novel of off often on once one only or other our ours out over own
+    paper per present propose proposed provide provides rather same several she should show
+    shows since so some such than that the their theirs them then there therefore these they
+    this those though through thus to too two under until up upon us use used uses using very
+    via was we well were what when where whether which while who whom why will with within
+    without would yet you your
+    """.split()
+)
+
+# A word is a run of letters of any script and digits, maybe hyphenated, e.g. "5g" or "3d-printing".
+# Any other character but spaces is a token on its own.
+TOKEN_PATTERN = re.compile(r"\w+(?:-\w+)*|\S")
+# Joins the texts, it's tokenized as a separator so phrases don't span two texts.
+# It's removed from the texts first, so that it only marks their boundaries.
+TEXT_SEPARATOR = " \x00 "
+
+
+def extract_keyphrases(
+    texts: list[str],
+    top_k: int = 5,
+    max_words: int = 3,
+    min_chars: int = 3,
+    min_df: int = 2,
+    max_df: float = 0.5,
+) -> list[list[str]]:
+    """
+    Extract the key phrases of each text scored by TF-IDF over the whole corpus.
+
+    The candidate phrases are the n-grams of up to `max_words` words between stopwords,
+    punctuation and numbers, i.e. words without letters. The corpus is tokenized at once, then the candidates, the sparse
+    document-phrase counts and the scores are computed on arrays, without loops over the texts.
+
+    Args:
+        texts (list[str]): The corpus, e.g. the abstracts. Empty texts get no phrases.
+        top_k (int, optional): Maximum number of phrases per text. Defaults to 5.
+        max_words (int, optional): Maximum number of words of a phrase. Defaults to 3.
+        min_chars (int, optional): Minimum length of a single word phrase. Defaults to 3.
+        min_df (int, optional): Minimum number of texts with the phrase. Defaults to 2.
+        max_df (float, optional): Maximum fraction of the texts with the phrase. Defaults to 0.5.
+
+    Returns (list[list[str]]): The phrases of each text, from the highest score.
+    """
+    import numpy as np
+
+    num_docs = len(texts)
+    corpus = TEXT_SEPARATOR.join((text or "").replace("\x00", " ") for text in texts)
+    tokens = TOKEN_PATTERN.findall(corpus.lower())
+    words = list(dict.fromkeys(tokens))
+    index = {word: i for i, word in enumerate(words)}
+    token_ids = np.fromiter(map(index.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    is_word = np.array(
+        [word not in STOPWORDS and any(char.isalpha() for char in word) for word in words], dtype=bool
+    )
+    is_long = np.array([len(word) >= min_chars for word in words], dtype=bool)
+    doc_of_token = np.cumsum(token_ids == index.get("\x00", -1))
+
+    # length of the run of words ending at each token
+    in_phrase = is_word[token_ids] if len(words) else np.zeros(0, dtype=bool)
+    breaks = np.flatnonzero(~in_phrase)
+    last_break = np.full(len(tokens), -1, dtype=np.int64)
+    last_break[breaks] = breaks
+    run = np.arange(len(tokens)) - np.maximum.accumulate(last_break) if len(tokens) else last_break
+
+    # candidates as rows of word ids padded with -1, one per n-gram
+    rows, ends = [], []
+    for n in range(1, max_words + 1):
+        end = np.flatnonzero(run >= n)
+        if n == 1:
+            end = end[is_long[token_ids[end]]]
+        row = np.full((len(end), max_words), -1, dtype=np.int64)
+        for offset in range(n):
+            row[:, offset] = token_ids[end - n + 1 + offset]
+        rows.append(row)
+        ends.append(end)
+    rows, ends = np.concatenate(rows), np.concatenate(ends)
+    if not len(rows):
+        return [[] for _ in texts]
+    base = len(words) + 1
+    if base**max_words < 2**63:
+        # faster: each row encoded as an integer in base `len(words) + 1`
+        keys = (rows + 1) @ (base ** np.arange(max_words - 1, -1, -1, dtype=np.int64))
+        keys, term_of_row = np.unique(keys, return_inverse=True)
+        candidates = np.stack(
+            [keys // base**power % base - 1 for power in range(max_words - 1, -1, -1)], axis=1
+        )
+    else:
+        candidates, term_of_row = np.unique(rows, axis=0, return_inverse=True)
+    term_of_row = term_of_row.reshape(-1)
+    num_terms = len(candidates)
+
+    # sparse counts: one entry per (document, phrase)
+    pairs, counts = np.unique(doc_of_token[ends] * num_terms + term_of_row, return_counts=True)
+    docs, terms = np.divmod(pairs, num_terms)
+
+    df = np.bincount(terms, minlength=num_terms)
+    idf = np.log((1 + num_docs) / (1 + df)) + 1
+    n_words = (candidates >= 0).sum(axis=1)
+
+    # sublinear tf, longer phrases are favoured as they are more specific
+    scores = (1 + np.log(counts)) * idf[terms] * np.sqrt(n_words[terms])
+    keep = (df[terms] >= min_df) & (df[terms] <= max(1, max_df * num_docs))
+    docs, terms, scores = docs[keep], terms[keep], scores[keep]
+
+    # rank inside each document: by document, then decreasing score, then phrase for ties
+    order = np.lexsort((terms, -scores, docs))
+    docs, terms = docs[order], terms[order]
+    starts = np.searchsorted(docs, docs, side="left")
+    top = (np.arange(len(docs)) - starts) < top_k
+    docs, terms = docs[top], terms[top]
+
+    phrases = {
+        term: " ".join(words[word_id] for word_id in candidates[term] if word_id >= 0)
+        for term in np.unique(terms).tolist()
+    }
+    bounds = np.searchsorted(docs, np.arange(num_docs + 1)).tolist()
+    terms = terms.tolist()
+    return [[phrases[term] for term in terms[bounds[i]:bounds[i + 1]]] for i in range(num_docs)]
@@ -1,13 +1,12 @@
-import re
-import requests
-from ratelimit import limits, sleep_and_retry
-
-from config import Config
+from config import get_config
+from utils import http
+from . import bibtex
 
 
 empty_metadata = {
     "title": "",
-    "author": "",
+    "volume": "",
+    "author": [],
     "issn": "",
     "url": "",
     "doi": "",
@@ -17,65 +16,52 @@ empty_metadata = {
     "year": "",
     "month": "",
     "pages": "",
-    "keywords": "",
+    "keywords": [],
 }
 
 
 class Metadata:
-    def __init__(self, silent=True) -> None:
-        config = Config()
+    def __init__(self, silent=True, backend=None) -> None:
+        """
+        Args:
+            silent (bool, optional): Whether to hide parsing errors. Defaults to True.
+            backend (optional): A local metadata source tried before the API, e.g. `OAGIndex`.
+                It must implement `get_metadata_from_doi(doi) -> dict | None`. Defaults to None.
+        """
+        config = get_config()
         self.api_url_base = config.get_metadata_api_url()
         self.headers = config.get_metadata_api_headers()
         self.silent = silent
+        self.backend = backend
 
-    @sleep_and_retry
-    @limits(calls=10, period=60)
-    @limits(calls=1, period=2)
     def get_metadata_from_doi(self, doi: str) -> dict[str, str]:
-        """`GET` method to fetch the metadata from the DOI of the paper"""
+        """Get the metadata of the paper from the backend if it has the DOI,
+        otherwise from the API"""
+        if self.backend is not None:
+            metadata = self.backend.get_metadata_from_doi(doi)
+            if metadata:
+                return metadata
+        return self._fetch_from_doi(doi)
+
+    def _fetch_from_doi(self, doi: str) -> dict[str, str]:
+        """`GET` method to fetch the metadata from the DOI of the paper.
+        Connection errors and error responses are raised, so that the failure can be retried."""
         url = self.api_url_base + doi
-        try:
-            res = requests.get(url, headers=self.headers, timeout=3000)
-        except ConnectionError as err:
-            print(err)
-            # TODO handle this error
-            return empty_metadata
+        res = http.get(url, headers=self.headers, timeout=3000)
+        res.raise_for_status()
         metadata = self._to_dict(res.text)
 
         return metadata
 
     def _to_dict(self, metadata: str) -> dict[str, str]:
         """Convert metadata do dictionary"""
+        try:
+            entries = bibtex.parse(metadata)
+        except bibtex.BibtexSyntaxError as err:
+            if not self.silent:
+                print(f"{err} - Error found trying to parse the metadata: {metadata[:50]}...")
+            entries = []
 
-        metadata_dict = {}
-
-        # Use regular expressions to extract field values
-        def search_field(field: str):
-            field_pattern = f"{field}" + r"={(.*?)}"
-            try:
-                result = re.search(field_pattern, metadata)
-                result = "" if result is None else result.group(1)
-            except Exception as err:
-                if not self.silent:
-                    print(
-                        f"{err} of type {type(err)} - Error found trying to search {field} in the metadata: {metadata[:50]}..."
-                    )
-                result = ""
-            return result
-
-        metadata_dict["title"] = search_field("title")
-        metadata_dict["volume"] = search_field("volume")
-        metadata_dict["issn"] = search_field("ISSN")
-        metadata_dict["url"] = search_field("url")
-        metadata_dict["doi"] = search_field("DOI")
-        metadata_dict["number"] = search_field("number")
-        metadata_dict["journal"] = search_field("journal")
-        metadata_dict["publisher"] = search_field("publisher")
-        metadata_dict["author"] = [
-            name.strip() for name in search_field("author").split("and")
-        ]
-        metadata_dict["year"] = search_field("year")
-        metadata_dict["month"] = search_field("month")
-        metadata_dict["pages"] = search_field("pages")
-        metadata_dict["keywords"] = search_field("keywords")
-        return metadata_dict
+        if not entries:
+            return dict(empty_metadata)
+        return bibtex.to_metadata(entries[0])
@@ -0,0 +1,138 @@
+"""
+Local metadata source over Open Academic Graph / Microsoft Academic Graph JSONL dumps
+"""
+
+import json
+import mmap
+import re
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from utils.utils import doi_hash, normalize_doi
+
+DOI_PATTERN = re.compile(rb'"doi"\s*:\s*"((?:[^"\\]|\\.)*)"')
+INDEX_DTYPE = np.dtype([("hash", "<u8"), ("offset", "<u8")])
+
+
+def _doi_hash(doi: str) -> int:
+    """64 bits hash of the normalized DOI, read little endian as in the indexes already built"""
+    return doi_hash(doi, 8, "little")
+
+
+def build_index(dump_path: str | Path, index_path: str | Path) -> int:
+    """
+    Scan the dump once and save a sorted (DOI hash, byte offset) array of its records.
+
+    Args:
+        dump_path (str | Path): The JSONL dump, one paper per line.
+        index_path (str | Path): Where to save the index, a `.npy` file.
+
+    Returns (int): Number of records with a DOI.
+    """
+    hashes = array("Q")
+    offsets = array("Q")
+    offset = 0
+    with open(dump_path, "rb") as f:
+        for line in f:
+            match = DOI_PATTERN.search(line)
+            if match:
+                doi = json.loads(b'"' + match.group(1) + b'"')
+                if doi:
+                    hashes.append(_doi_hash(doi))
+                    offsets.append(offset)
+            offset += len(line)
+
+    index = np.empty(len(hashes), dtype=INDEX_DTYPE)
+    index["hash"] = np.frombuffer(hashes, dtype="<u8")
+    index["offset"] = np.frombuffer(offsets, dtype="<u8")
+    index.sort(order="hash", kind="stable")
+    np.save(index_path, index)
+    return len(index)
+
+
+def to_metadata(record: dict) -> dict:
+    """Map an OAG/MAG record (see `utils.utils.paper_schema`) to the metadata dictionary used by `Paper`"""
+    venue = record.get("venue") or {}
+    if isinstance(venue, list):
+        venue = venue[0] if venue else {}
+    pages = "--".join(page for page in [record.get("page_start", ""), record.get("page_end", "")] if page)
+    urls = record.get("url") or []
+
+    return {
+        "title": record.get("title", ""),
+        "volume": record.get("volume", ""),
+        "issn": record.get("issn", ""),
+        "url": urls[0] if isinstance(urls, list) and urls else "",
+        "doi": normalize_doi(record.get("doi", "")),
+        "number": record.get("issue", ""),
+        "journal": venue.get("raw", ""),
+        "publisher": record.get("publisher", ""),
+        "author": [author["name"] for author in record.get("authors") or [] if author.get("name")],
+        "year": str(record.get("year") or ""),
+        "month": "",
+        "pages": pages,
+        "keywords": [keyword.strip().lower() for keyword in record.get("keywords") or [] if keyword.strip()],
+        "abstract": record.get("abstract", ""),
+    }
+
+
+class OAGIndex:
+    """DOI lookups over a JSONL dump without loading it.
+
+    Both the dump and its index are memory mapped. A lookup is a binary search
+    over the index followed by decoding the single line of the record.
+    """
+
+    def __init__(self, dump_path: str | Path, index_path: str | Path | None = None) -> None:
+        """
+        Args:
+            dump_path (str | Path): The JSONL dump, one paper per line.
+            index_path (str | Path, optional): The index of the dump. It is built if missing
+                or older than the dump. Defaults to `<dump_path>.idx.npy`.
+        """
+        self.dump_path = Path(dump_path)
+        self.index_path = Path(index_path or str(self.dump_path) + ".idx.npy")
+
+        if (
+            not self.index_path.is_file()
+            or self.index_path.stat().st_mtime < self.dump_path.stat().st_mtime
+        ):
+            build_index(self.dump_path, self.index_path)
+
+        self._index = np.load(self.index_path, mmap_mode="r")
+        self._hashes = self._index["hash"]
+        self._offsets = self._index["offset"]
+        self._dump = b""
+        if self.dump_path.stat().st_size:
+            with open(self.dump_path, "rb") as f:
+                self._dump = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _read_record(self, offset: int) -> dict:
+        end = self._dump.find(b"\n", offset)
+        return json.loads(self._dump[offset: end if end != -1 else len(self._dump)])
+
+    def get_record(self, doi: str) -> dict | None:
+        """Returns (dict | None): The raw record of the DOI, None if it is not in the dump."""
+        doi = normalize_doi(doi)
+        doi_hash = np.uint64(_doi_hash(doi))
+        i = int(np.searchsorted(self._hashes, doi_hash, side="left"))
+        while i < len(self._hashes) and self._hashes[i] == doi_hash:
+            record = self._read_record(int(self._offsets[i]))
+            if normalize_doi(record.get("doi", "")) == doi:
+                return record
+            i += 1
+        return None
+
+    def get_metadata_from_doi(self, doi: str) -> dict | None:
+        """Returns (dict | None): The metadata of the DOI, see `to_metadata`. None if it is not in the dump."""
+        record = self.get_record(doi)
+        return None if record is None else to_metadata(record)
+
+    def close(self):
+        if isinstance(self._dump, mmap.mmap):
+            self._dump.close()
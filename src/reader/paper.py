@@ -1,16 +1,36 @@
 from pathlib import Path
 import re
-import fitz
-from pdfminer.pdfparser import PDFParser
-from pdfminer.pdfdocument import PDFDocument
-from utils.utils import extract_doi_from_str
+from typing import Iterable, Sequence
+from utils.utils import extract_doi_from_str, normalize_doi
 
 from .metadata import Metadata
+from .record import PAPER_FIELDS, PaperRecord, decode_with_strings, encode_with_strings
+from store import TextStore
 from classifiers import dbpedia
 from classifiers import acm
 from downloader import name_encode_decode
 from utils.errors import MissingDOIError, WrongPaperError
 
+# Version of the extraction, stored with the results. Increase it when a change of the
+# extraction makes the previous results outdated, see `shards.merge_records`.
+EXTRACTOR_VERSION = 1
+
+METADATA_FIELDS = [
+    "title",
+    "author",
+    "abstract",
+    "issn",
+    "url",
+    "doi",
+    "number",
+    "journal",
+    "publisher",
+    "year",
+    "month",
+    "pages",
+    "keywords",
+]
+
 
 class Paper:
     """A simple abstraction layer for working on the paper object"""
@@ -61,7 +81,41 @@ class Paper:
         self.month = ""
         self.pages = ""
         self.keywords = []
+        # Where the keywords come from: "pdf", "metadata" or "tfidf" (see `keywords.extract_keyphrases`)
+        self.keywords_source = ""
         self.topics = {}
+        self.pdf_url = ""
+        # DOI of the paper this one is a near-duplicate of, see `Reader.find_duplicates`
+        self.duplicate_of = ""
+
+    @classmethod
+    def from_doi(cls, doi: str, files_path: str | Path, silent: bool = True) -> "Paper":
+        """
+        A paper known by its DOI only, e.g. to fill it from metadata sources without reading its PDF.
+        Its file is the one the downloader saves the PDF to, it may not exist, see `has_pdf`.
+
+        Args:
+            doi (str): DOI of the paper.
+            files_path (str | Path): Directory of the PDF file, e.g. the one of the named list.
+
+        Returns (Paper): The paper, not loaded.
+        """
+        paper = cls(files_path, name_encode_decode.encode(doi.strip()), filename_has_doi=False, silent=silent)
+        paper.doi = normalize_doi(doi)
+        return paper
+
+    def has_pdf(self) -> bool:
+        """Returns (bool): Whether the PDF file of the paper exists."""
+        return self.full_path.is_file()
+
+    def missing(self, fields: Iterable[str]) -> list[str]:
+        """Returns (list[str]): The fields without value, e.g. ["keywords"] when they are [] or [""]."""
+        missing = []
+        for field in fields:
+            value = getattr(self, field)
+            if not (any(value) if isinstance(value, list) else value):
+                missing.append(field)
+        return missing
 
     def _get_doi_from_file_name(self) -> str:
         """Get doi from file name replacing a pattern if needed"""
@@ -140,17 +194,23 @@ class Paper:
             raise Exception("No pdf info found.")
 
         keywords_list = []
-        keywords_str = self._pdf_info[0].get("Keywords", "")
-        if isinstance(keywords_str, bytes):
-            keywords_str = str(keywords_str, encoding="utf-8")
+        keywords_str = self._get_pdf_keywords()
         keywords_list = re.split(r"[^\s\w-]", keywords_str)
         while "" in keywords_list:
             keywords_list.pop(keywords_list.index(""))
         self.keywords = [keyword.strip().lower() for keyword in keywords_list]
 
+    def _get_pdf_keywords(self) -> str:
+        """The raw `Keywords` field of the pdf metadata"""
+        keywords_str = self._pdf_info[0].get("Keywords", "") if self._pdf_info else ""
+        if isinstance(keywords_str, bytes):
+            keywords_str = str(keywords_str, encoding="utf-8", errors="ignore")
+        return keywords_str if isinstance(keywords_str, str) else ""
+
     def extract_keywords(self):
         if self.keywords and self.keywords[0]:
             return
+        self.keywords_source = "pdf"
         try:
             self._extract_keywords_from_pdf_metadata()
         except Exception:
@@ -161,17 +221,92 @@ class Paper:
             self._extract_keywords_from_pdf_content()
         except Exception:
             self.keywords = []
+        if not (self.keywords and self.keywords[0]):
+            self.keywords_source = ""
 
-    def load(self):
-        """Loads the PDF content and extracts keywords and abstract from file."""
+    def load(self, text_store: TextStore | None = None):
+        """
+        Loads the PDF content and extracts keywords and abstract from file.
+
+        Args:
+            text_store (TextStore, optional): When the paper is in the store, its pages are read
+                from it instead of parsing the PDF, and the cleaned text is only computed on access.
+                Otherwise the extracted pages are added to it. Defaults to None.
+        """
+        if text_store is not None and self.doi and text_store.has(self.doi):
+            self.load_pages(text_store.pages(self.doi), text_store.pdf_keywords(self.doi))
+            return
         self.extract_pdf_info()
         self.extract_pdf_text()
+        if text_store is not None and self.doi:
+            text_store.add(self.doi, self._raw_text, self._get_pdf_keywords())
+        self.text = ""
+        self._extract_from_text()
+
+    def load_pages(self, pages: Sequence[str], pdf_keywords: str = ""):
+        """
+        Loads the content from pages already extracted, e.g. from the text store, and extracts
+        keywords and abstract from them. The cleaned text is only computed on access.
+
+        Args:
+            pages (Sequence[str]): The text of the pages, at least the first two ones.
+            pdf_keywords (str, optional): The keywords of the PDF metadata. Defaults to "".
+        """
+        self._raw_text = pages
+        self._pdf_info = [{"Keywords": pdf_keywords}]
+        self.text = None
+        self._extract_from_text()
+
+    def _extract_from_text(self):
         try:
             self._extract_abstract()
         except Exception:
             pass
         self.extract_keywords()
-        self.clean_text()
+        if self.text is not None:
+            self.clean_text()
+
+    def export_extraction(self) -> bytes:
+        """
+        The content extracted from the PDF by `load`, e.g. to send it from another process:
+        the record of the paper followed by the PDF keywords and the pages, see `record.encode_with_strings`.
+        """
+        return encode_with_strings(self.to_record(), [self._get_pdf_keywords(), *self._raw_text])
+
+    def import_extraction(self, extraction: bytes, text_store: TextStore | None = None):
+        """
+        Sets the content extracted from the PDF in another process, see `export_extraction`.
+        The cleaned text is only computed on access.
+
+        Args:
+            extraction (bytes): The extracted content.
+            text_store (TextStore, optional): The pages are read from it when the paper is in it,
+                the extraction may then only have the first pages, see `load_pages`.
+                Otherwise they are added to it. Defaults to None.
+        """
+        record, (pdf_keywords, *pages) = decode_with_strings(extraction)
+        self._raw_text = pages
+        self._pdf_info = [{"Keywords": pdf_keywords}]
+        if text_store is not None and self.doi:
+            if text_store.has(self.doi):
+                self._raw_text = text_store.pages(self.doi)
+            else:
+                text_store.add(self.doi, self._raw_text, pdf_keywords)
+        self.abstract = record.abstract
+        self.keywords = record.keywords
+        self.keywords_source = record.keywords_source
+        self.text = None
+
+    @property
+    def text(self) -> str:
+        """The cleaned text of the paper, see `clean_text`"""
+        if self._text is None:
+            self.clean_text()
+        return self._text
+
+    @text.setter
+    def text(self, text: str | None):
+        self._text = text
 
     def extract_acm_topics(self):
         """Gets the topics from ACM classification."""
@@ -189,77 +324,81 @@ class Paper:
         self.topics["acm"] = topics[1:]
 
     def extract_dbpedia_topics(self):
+        """Gets the topics from the abstract using DBpedia Spotlight."""
         if not self.abstract:
             self.topics["dbpedia"] = []
-        try:
-            res_dict = dbpedia.get_classification_from_text(self.abstract)
-            topics = (
-                [resource["@surfaceForm"] for resource in res_dict["Resources"]]
-                if res_dict["Resources"]
-                else []
+            return
+        res_dict = dbpedia.get_classification_from_text(self.abstract)
+        self.set_dbpedia_topics(res_dict)
+
+    def set_dbpedia_topics(self, res_dict: dict):
+        """Sets the topics from a DBpedia Spotlight response."""
+        topics = [resource["@surfaceForm"] for resource in res_dict.get("Resources") or []]
+        self.topics["dbpedia"] = list(set(topics))
+
+    def harvest_acm(self):
+        """Gets the classification, abstract, keywords and bibliographic fields
+        from the ACM landing page with a single request."""
+        if not self.doi:
+            raise MissingDOIError("DOI not set!")
+
+        data = acm.harvest_from_doi(self.doi)
+        if data["doi"] and data["doi"] != self.doi:
+            raise WrongPaperError(
+                f"The DOI '{data['doi']}' in the ACM page didn't match with '{self.doi}'."
             )
-            self.topics["dbpedia"] = list(set(topics))
 
-        except Exception as exc:
-            raise exc
+        self.update_metadata(data)
+        self.pdf_url = data["pdf_url"] or self.pdf_url
+        if data["classification"]:
+            self.topics["acm"] = data["classification"][1:]
+
+    def update_metadata(self, metadata: dict) -> None:
+        """Updates the fields of the paper with the non empty values of the metadata."""
+        for field in METADATA_FIELDS:
+            setattr(self, field, metadata.get(field) or getattr(self, field))
+        if metadata.get("keywords"):
+            self.keywords_source = "metadata"
 
-    def get_metadata(self) -> None:
-        """Gets the metadata from external source via API."""
+    def get_metadata(self, source: Metadata | None = None) -> None:
+        """
+        Gets the metadata from external source via API.
+
+        Args:
+            source (Metadata, optional): The metadata source, e.g. with a local backend.
+                Defaults to `Metadata()`.
+        """
         if self.doi:
-            metadata: dict = Metadata().get_metadata_from_doi(self.doi)
+            metadata: dict = (source or Metadata()).get_metadata_from_doi(self.doi)
 
             if not self.silent:
                 print("Correct DOI? ", self.cross_validate_doi(metadata))
 
-            self.title = metadata["title"] or self.title
-            self.author = metadata["author"] or self.author
-            self.issn = metadata["issn"] or self.issn
-            self.url = metadata["url"] or self.url
-            self.doi = metadata["doi"] or self.doi
-            self.number = metadata["number"] or self.number
-            self.journal = metadata["journal"] or self.journal
-            self.publisher = metadata["publisher"] or self.publisher
-            self.year = metadata["year"] or self.year
-            self.month = metadata["month"] or self.month
-            self.pages = metadata["pages"] or self.pages
-            self.keywords = metadata["keywords"] or self.keywords
+            self.update_metadata(metadata)
         else:
             raise Exception(f"DOI for this paper ({self.file_name}) not set.")
 
+    def to_record(self) -> PaperRecord:
+        """Returns (PaperRecord): The results of the paper, e.g. to cache them."""
+        record = PaperRecord(extractor_version=EXTRACTOR_VERSION)
+        for name in PAPER_FIELDS:
+            setattr(record, name, getattr(self, name))
+        record.full_path = str(self.full_path)
+        return record
+
+    def import_record(self, record: PaperRecord):
+        """Sets the results of the paper from a record, see `to_record`."""
+        for name in PAPER_FIELDS:
+            setattr(self, name, getattr(record, name))
+        self.full_path = Path(record.full_path)
+
     def import_from_dict(self, paper: dict):
-        for k, v in paper.items():
-            setattr(self, k, v)
+        """Sets the results of the paper from a record as a dict, raises `RecordError` if it's invalid."""
+        self.import_record(PaperRecord.from_dict(paper))
 
     def export_to_dict(self) -> dict:
-        metadata = {
-            key: (
-                str(self.__dict__[key])
-                if isinstance(self.__dict__[key], Path)
-                else self.__dict__[key]
-            )
-            for key in [
-                "filename_has_doi",
-                "pattern_to_replace",
-                "silent",
-                "file_name",
-                "doi",
-                "full_path",
-                "title",
-                "author",
-                "abstract",
-                "issn",
-                "url",
-                "number",
-                "journal",
-                "publisher",
-                "year",
-                "month",
-                "pages",
-                "keywords",
-                "topics",
-            ]
-        }
-        return metadata
+        """Returns (dict): The results of the paper as a record dict, see `PaperRecord.to_dict`."""
+        return self.to_record().to_dict()
 
     def cross_validate_doi(self, metadata: dict) -> bool:
         """Check if title from metadata is in the text"""
@@ -287,6 +426,9 @@ class Paper:
         """
         Extracts the metadata information of the PDF file if available.
         """
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+
         fp = open(self.full_path, "rb")
         parser = PDFParser(fp)
         doc = PDFDocument(parser)
@@ -297,6 +439,8 @@ class Paper:
         """
         Extract the text from the pdf file.
         """
+        import fitz
+
         doc = fitz.open(self.full_path)
         pages = []
         for page in doc:
@@ -0,0 +1,234 @@
+"""
+Pipelined execution of the reader: PDFs are parsed while the metadata and
+classification requests of the previous papers are in flight.
+"""
+
+import queue
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from classifiers import dbpedia
+from config import get_config
+from utils.ledger import FailureLedger
+from .executor import ExtractionExecutor
+from .metadata import Metadata
+from .paper import Paper
+
+if TYPE_CHECKING:
+    from .reader import Reader
+
+# Marks the end of the stream of papers in a queue
+_DONE = object()
+
+
+def _run_stage(
+    name: str,
+    func: Callable[[Paper], None],
+    inbox: queue.Queue,
+    outbox: queue.Queue,
+    ledger: FailureLedger | None = None,
+):
+    """Apply `func` to each paper of the inbox and pass it on to the outbox,
+    recording the outcome in the ledger if set"""
+    try:
+        while (paper := inbox.get()) is not _DONE:
+            error = None
+            try:
+                func(paper)
+            except Exception as err:
+                print(f"{paper.doi}: {name}: {err}")
+                error = err
+            if ledger is not None:
+                ledger.record(paper.doi, name, error)
+            outbox.put(paper)
+    finally:
+        outbox.put(_DONE)
+
+
+def _run_parser(items: Iterable, read: Callable, outbox: queue.Queue):
+    """Read the papers, passing each one on as soon as it's parsed"""
+    try:
+        for item in items:
+            try:
+                paper = read(item)
+            except Exception as err:
+                print(f"{item}: {err}")
+                continue
+            if paper is not None:
+                outbox.put(paper)
+    finally:
+        outbox.put(_DONE)
+
+
+def _run_dbpedia(
+    inbox: queue.Queue,
+    outbox: queue.Queue,
+    max_chars: int,
+    flush_after: float,
+    ledger: FailureLedger | None = None,
+):
+    """Annotate the abstracts in batches. A batch is sent when it reaches `max_chars`,
+    when no paper arrives for `flush_after` seconds, or at the end of the stream."""
+    pending: list[Paper] = []
+    size = 0
+
+    def flush():
+        nonlocal pending, size
+        if pending:
+            results = dbpedia.get_classification_from_texts(
+                [paper.abstract for paper in pending], max_chars=max_chars
+            )
+            for paper, res_dict in zip(pending, results):
+                if isinstance(res_dict, Exception):
+                    print(f"{paper.doi}: dbpedia: {res_dict}")
+                    error = res_dict
+                else:
+                    paper.set_dbpedia_topics(res_dict)
+                    error = None
+                if ledger is not None:
+                    ledger.record(paper.doi, "dbpedia", error)
+                outbox.put(paper)
+        pending, size = [], 0
+
+    try:
+        while True:
+            try:
+                paper = inbox.get(timeout=flush_after)
+            except queue.Empty:
+                flush()
+                continue
+            if paper is _DONE:
+                break
+            if "dbpedia" in paper.topics:
+                outbox.put(paper)
+            elif not paper.abstract:
+                paper.topics["dbpedia"] = []
+                outbox.put(paper)
+            else:
+                if size + len(paper.abstract) + len(dbpedia.SEPARATOR) > max_chars:
+                    flush()
+                pending.append(paper)
+                size += len(paper.abstract) + len(dbpedia.SEPARATOR)
+        flush()
+    finally:
+        outbox.put(_DONE)
+
+
+def run_pipeline(
+    reader: "Reader",
+    classifiers: Iterable[str] = ("acm", "dbpedia"),
+    metadata: bool = True,
+    backend=None,
+    filename_has_doi: bool = True,
+    pattern_to_replace: dict = {},
+    from_inc: int | None = None,
+    to_exc: int | None = None,
+    queue_size: int = 16,
+    dump_every: int = 50,
+    flush_after: float = 5.0,
+    executor: ExtractionExecutor | None = None,
+):
+    """
+    Load, enrich and classify the papers of the reader with overlapping stages.
+
+    Each stage runs in its own thread, connected to the next one by a bounded queue:
+    parsing -> metadata -> acm -> dbpedia -> cache. A paper moves on as soon as its
+    stage is done, so the parsing goes on while requests wait for the rate limits.
+    The metadata is only fetched for papers without a title, e.g. not found in the cache,
+    and the topics only for the sources not present yet.
+
+    Args:
+        reader (Reader): The reader, its papers are appended to the paper list.
+        classifiers (Iterable[str], optional): Sources of the topics, "acm" and/or "dbpedia".
+            Defaults to both.
+        metadata (bool, optional): Whether to fetch the metadata. Defaults to True.
+        backend (optional): Local metadata source, see `Metadata`. Defaults to None.
+        filename_has_doi (bool, optional): See `Reader.load`. Defaults to True.
+        pattern_to_replace (dict, optional): See `Reader.load`. Defaults to {}.
+        from_inc (int | None, optional): See `Reader.load`. Defaults to None.
+        to_exc (int | None, optional): See `Reader.load`. Defaults to None.
+        queue_size (int, optional): Maximum number of papers waiting between two stages. Defaults to 16.
+        dump_every (int, optional): Dump the cache every this many finished papers. Defaults to 50.
+        flush_after (float, optional): Seconds without new papers before sending an incomplete
+            batch to DBpedia. Defaults to 5.
+        executor (ExtractionExecutor, optional): Extracts the PDFs in worker processes,
+            see `Reader.load`. Defaults to None, in the parsing thread.
+    """
+    from tqdm import tqdm
+
+    classifiers = [source.lower() for source in classifiers]
+    for source in classifiers:
+        if source not in ("acm", "dbpedia"):
+            raise Exception(f"Classification from '{source}' is not implemented.")
+
+    items = reader._list_papers(filename_has_doi, pattern_to_replace, from_inc, to_exc)
+    if reader.store is None:
+        reader.load_cache()
+
+    if executor is not None:
+        parsed = reader._read_papers_with(executor, items, filename_has_doi, pattern_to_replace)
+
+        def read(paper: Paper) -> Paper:
+            return paper
+
+    elif reader.store is not None:
+        parsed = items
+        read = reader._read_paper_from_store
+    else:
+        parsed = items
+
+        def read(paper_name: str) -> Paper:
+            return reader._read_paper(reader.named_list, paper_name, filename_has_doi, pattern_to_replace)
+
+    queues = [queue.Queue(maxsize=queue_size)]
+    threads = [threading.Thread(target=_run_parser, args=(parsed, read, queues[-1]))]
+
+    def add_stage(name: str, func: Callable[[Paper], None]):
+        queues.append(queue.Queue(maxsize=queue_size))
+        threads.append(
+            threading.Thread(target=_run_stage, args=(name, func, queues[-2], queues[-1], reader.ledger))
+        )
+
+    if metadata:
+        source = Metadata(backend=backend)
+
+        def get_metadata(paper: Paper):
+            if not paper.title:
+                paper.get_metadata(source)
+
+        add_stage("metadata", get_metadata)
+
+    if "acm" in classifiers:
+
+        def extract_acm_topics(paper: Paper):
+            if "acm" not in paper.topics:
+                paper.extract_acm_topics()
+
+        add_stage("acm", extract_acm_topics)
+
+    if "dbpedia" in classifiers:
+        queues.append(queue.Queue(maxsize=queue_size))
+        max_chars = get_config().get_dbpedia_batch_max_chars()
+        threads.append(
+            threading.Thread(
+                target=_run_dbpedia, args=(queues[-2], queues[-1], max_chars, flush_after, reader.ledger)
+            )
+        )
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    pbar = tqdm(total=len(items))
+    finished = 0
+    while (paper := queues[-1].get()) is not _DONE:
+        reader.paper_list.append(paper)
+        pbar.set_description(f"Processing {paper.doi}")
+        pbar.update()
+        finished += 1
+        if dump_every and finished % dump_every == 0:
+            reader.dump()
+    pbar.close()
+    for thread in threads:
+        thread.join()
+    reader.dump()
@@ -3,30 +3,72 @@ Reads a single paper or a bulk of paper
 """
 
 import json
-from typing import Literal
-import pandas as pd
+import time
+from typing import TYPE_CHECKING, Iterator, Literal
 from glob import glob
 from pathlib import Path
-from tqdm import tqdm
-from .paper import Paper
-from config import PAPERS_PATH, DATA_PATH
+from .paper import METADATA_FIELDS, Paper
+from .metadata import Metadata
+from .executor import ExtractionExecutor
+from .record import dumps_json, validate_cache
+from . import bibtex, dedup
+from .keywords import extract_keyphrases
+from .shards import check_shard, merge_records, merge_shards, shard_cache_file, stamp
+from classifiers import dbpedia
+from config import get_config
+from store import PaperStore, TextStore
+from utils.ledger import FailureLedger
+from utils.utils import normalize_doi, shard_of
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _tqdm(*args, **kwargs):
+    """Progress bar, see `tqdm.tqdm`, imported on first use"""
+    from tqdm import tqdm
+
+    return tqdm(*args, **kwargs)
 
 
 class Reader:
-    def __init__(self, named_list: str) -> None:
+    def __init__(
+        self,
+        named_list: str,
+        store: PaperStore | None = None,
+        text_store: TextStore | None = None,
+        shard: tuple[int, int] | None = None,
+    ) -> None:
         """
         Initialize the Reader object.
 
         Args:
             named_list (str): The name of the list.
+            store (PaperStore, optional): Content-addressed store shared between lists.
+                When set, the papers are resolved through the manifest of the list and
+                the results are cached in the store instead of the list cache. Defaults to None.
+            text_store (TextStore, optional): Store of the page texts. Papers already in it are not
+                parsed again, the others are added to it when loaded. Defaults to None.
+            shard (tuple[int, int], optional): (index, number of shards) of the part of the list
+                processed by this reader, partitioned by DOI hash. The results are dumped to the
+                cache shard `<named_list>.shard-<index>-of-<number>.json`, see `merge_shards`.
+                Defaults to None, the whole list.
         """
         self.named_list = named_list
-        self.cache_file = named_list + ".json"
-        self.files_path = PAPERS_PATH
-        self.cache_path = DATA_PATH / "reader" / "cache"
+        self.store = store
+        self.text_store = text_store
+        self.shard = check_shard(shard) if shard is not None else None
+        self.cache_file = (
+            shard_cache_file(named_list, *self.shard) if self.shard else named_list + ".json"
+        )
+        config = get_config()
+        self.data_path = config.get_data_path()
+        self.files_path = config.get_papers_path()
+        self.cache_path = self.data_path / "reader" / "cache"
         self.paper_list: list[Paper] = []
         self.cache: dict[str, dict] = {}
         self.dois_not_cached: list[str] = []
+        self.ledger = FailureLedger.for_list(named_list)
 
     def _load_paper_and_import_from_cache(
         self,
@@ -35,6 +77,21 @@ class Reader:
         filename_has_doi: bool,
         pattern_to_replace: dict,
     ):
+        """
+        Load paper content from the PDF file, import metadata from cache
+        and add it to the paper list. See `_read_paper`.
+        """
+        self.paper_list.append(
+            self._read_paper(dir, paper_name, filename_has_doi, pattern_to_replace)
+        )
+
+    def _read_paper(
+        self,
+        dir: str,
+        paper_name: str,
+        filename_has_doi: bool,
+        pattern_to_replace: dict,
+    ) -> Paper:
         """
         Load paper content from the PDF file
         and import metadata including processed text from cache.
@@ -47,19 +104,138 @@ class Reader:
             pattern_to_replace (dict): Pattern to replace.
                 e.g.: filename = file_10_1145-3351095_00000000.txt
                       pattern_to_replace = {'_': '.', '-':'/'}
+
+        Returns (Paper): The loaded paper.
         """
         paper = Paper(
             self.files_path / dir, paper_name, filename_has_doi, pattern_to_replace
         )
-        paper.load()
-
-        cached_paper = self.cache.get(paper.doi, None)
+        paper.load(self.text_store)
+        self._import_results(paper)
+        return paper
+
+    def _import_results(self, paper: Paper):
+        """Import the results previously cached, or stored when using a store, for the paper"""
+        if self.store is not None:
+            cached_paper = self.store.get_record(paper.doi)
+        else:
+            cached_paper = self.cache.get(paper.doi, None)
         if cached_paper is None:
             self.dois_not_cached.append(paper.doi)
         else:
             paper.import_from_dict(cached_paper)
 
-        self.paper_list.append(paper)
+    def _load_paper_from_store(self, doi: str):
+        """
+        Load paper content from the PDF file in the store, import the results
+        previously stored for it and add it to the paper list. See `_read_paper_from_store`.
+        """
+        paper = self._read_paper_from_store(doi)
+        if paper is not None:
+            self.paper_list.append(paper)
+
+    def _read_paper_from_store(self, doi: str) -> Paper | None:
+        """
+        Load paper content from the PDF file in the store
+        and import the results previously stored for it.
+
+        Args:
+            doi (str): DOI of the paper.
+
+        Returns (Paper | None): The paper, None if it's not in the store.
+        """
+        paper = self._new_paper_from_store(doi)
+        if paper is not None:
+            paper.load(self.text_store)
+            self._import_results(paper)
+        return paper
+
+    def _new_paper_from_store(self, doi: str) -> Paper | None:
+        """Returns (Paper | None): The paper of the PDF file in the store, not loaded yet. None if it's not in the store."""
+        pdf_path = self.store.pdf_path(doi)
+        if pdf_path is None:
+            print(f"{doi}: Not in the store.")
+            return None
+        paper = Paper(pdf_path.parent, pdf_path.name, filename_has_doi=False)
+        paper.doi = normalize_doi(doi)
+        return paper
+
+    def _read_papers_with(
+        self,
+        executor: ExtractionExecutor,
+        papers: list[str],
+        filename_has_doi: bool,
+        pattern_to_replace: dict,
+    ) -> Iterator[Paper]:
+        """
+        Load the papers in the worker processes of the executor and import their cached results.
+        The quarantined papers are skipped and written to `<cache file>.quarantine.json`.
+
+        Args:
+            executor (ExtractionExecutor): The executor.
+            papers (list[str]): The DOIs when using a store, otherwise the file names. See `_list_papers`.
+            filename_has_doi (bool): See `load`.
+            pattern_to_replace (dict): See `load`.
+
+        Returns (Iterator[Paper]): The loaded papers.
+        """
+
+        def new_papers() -> Iterator[Paper]:
+            for item in papers:
+                if self.store is not None:
+                    paper = self._new_paper_from_store(item)
+                else:
+                    paper = Paper(
+                        self.files_path / self.named_list, item, filename_has_doi, pattern_to_replace
+                    )
+                if paper is not None:
+                    yield paper
+
+        quarantined = len(executor.quarantine)
+        for paper in executor.load(new_papers(), self.text_store):
+            self._import_results(paper)
+            yield paper
+        if len(executor.quarantine) > quarantined:
+            executor.dump_quarantine(self.cache_path / f"{Path(self.cache_file).stem}.quarantine.json")
+
+    def _in_shard(self, key: str) -> bool:
+        """Whether the paper with this DOI, or file name if it has none, belongs to the shard"""
+        if self.shard is None:
+            return True
+        index, num_shards = self.shard
+        return shard_of(key, num_shards) == index
+
+    def _list_papers(
+        self,
+        filename_has_doi: bool = True,
+        pattern_to_replace: dict = {},
+        from_inc: int | None = None,
+        to_exc: int | None = None,
+    ) -> list[str]:
+        """
+        The papers of the list to load, in the same order on every machine:
+        the manifest order when using a store, otherwise sorted by file name.
+        Only the papers of the shard are kept before slicing. See `load` for the arguments.
+
+        Returns (list[str]): The DOIs when using a store, otherwise the file names.
+        """
+        if self.store is not None:
+            return [doi for doi in self.store.manifest(self.named_list) if self._in_shard(doi)][from_inc:to_exc]
+
+        papers_names = sorted(
+            Path(path).name for path in glob(str(self.files_path / self.named_list / "*.pdf"))
+        )
+        if self.shard is not None:
+            dir_path = self.files_path / self.named_list
+
+            def shard_key(name: str) -> str:
+                try:
+                    return Paper(dir_path, name, filename_has_doi, pattern_to_replace).doi or name
+                except Exception:
+                    return name
+
+            papers_names = [name for name in papers_names if self._in_shard(shard_key(name))]
+        return papers_names[from_inc:to_exc]
 
     def reset(self):
         """Reset paper list."""
@@ -71,6 +247,7 @@ class Reader:
         pattern_to_replace: dict = {},
         from_inc: int | None = None,
         to_exc: int | None = None,
+        executor: ExtractionExecutor | None = None,
     ):
         """
         Load papers from the specified directory.
@@ -84,20 +261,143 @@ class Reader:
                       pattern_to_replace = {'_': '.', '-':'/'}
             from_inc (int | None, optional): Index to start loading papers (inclusive). Defaults to None.
             to_exc (int | None, optional): Index to stop loading papers (exclusive). Defaults to None.
+                The indexes are within the shard when the reader has one.
+            executor (ExtractionExecutor, optional): Extracts the PDFs in worker processes with a time and
+                memory limit per paper, skipping the ones exceeding them. Defaults to None, in this process.
         """
+        papers = self._list_papers(filename_has_doi, pattern_to_replace, from_inc, to_exc)
+
+        if executor is not None:
+            if self.store is None:
+                self.load_cache()
+            pbar = _tqdm(
+                self._read_papers_with(executor, papers, filename_has_doi, pattern_to_replace),
+                total=len(papers),
+            )
+            for paper in pbar:
+                pbar.set_description(f"Processing {paper.doi}")
+                self.paper_list.append(paper)
+            return
+
+        if self.store is not None:
+            pbar = _tqdm(papers)
+            for doi in pbar:
+                pbar.set_description(f"Processing {doi}")
+                self._load_paper_from_store(doi)
+            return
+
         self.load_cache()
 
-        papers_paths = glob(str(self.files_path / self.named_list / "*.pdf"))[
-            from_inc:to_exc
-        ]
-        pbar = tqdm(papers_paths)
-        for paper_path in pbar:
-            paper_name = paper_path.split("/")[-1]
+        pbar = _tqdm(papers)
+        for paper_name in pbar:
             pbar.set_description(f"Processing {paper_name}")
             self._load_paper_and_import_from_cache(
                 self.named_list, paper_name, filename_has_doi, pattern_to_replace
             )
 
+    def load_from_list(
+        self,
+        required: tuple[str, ...] = ("keywords", "abstract"),
+        backend=None,
+        harvest_acm: bool = True,
+        fetch_pdf: bool = True,
+        from_inc: int | None = None,
+        to_exc: int | None = None,
+    ) -> dict[str, int]:
+        """
+        Load the papers of the DOI list `DATA_PATH/data/lists/<named_list>.txt` metadata first:
+        the PDF of a paper is only read, or downloaded, when a required field is still missing after,
+        in this order, its cached results, the metadata sources and the ACM landing page.
+        The papers without PDF have no text. The failed steps are recorded in the ledger of the list,
+        see `retry_failed`.
+
+        Args:
+            required (tuple[str, ...], optional): The fields needed, see `Paper.missing`.
+                Defaults to ("keywords", "abstract").
+            backend (optional): A local metadata source tried before the API, e.g. `OAGIndex`. Defaults to None.
+            harvest_acm (bool, optional): Whether to harvest the ACM landing page, which also gives the
+                ACM classification. Defaults to True.
+            fetch_pdf (bool, optional): Whether to download the PDFs needed and not found locally,
+                to the store if the reader uses one. Defaults to True.
+            from_inc (int | None, optional): Index to start loading papers (inclusive). Defaults to None.
+            to_exc (int | None, optional): Index to stop loading papers (exclusive). Defaults to None.
+                The indexes are within the shard when the reader has one.
+
+        Returns (dict[str, int]): The number of papers completed by each source: "cache", "metadata",
+            "acm" and "pdf", the number of PDFs "downloaded" and of papers still "incomplete".
+        """
+        from downloader import load_named_list
+
+        dois = [doi for doi in load_named_list(self.named_list) if self._in_shard(doi)][from_inc:to_exc]
+        if self.store is None:
+            self.load_cache()
+        source = Metadata(backend=backend)
+        counts = dict.fromkeys(["cache", "metadata", "acm", "pdf", "downloaded", "incomplete"], 0)
+
+        pbar = _tqdm(dois)
+        for doi in pbar:
+            pbar.set_description(f"Processing {doi}")
+            paper = Paper.from_doi(doi, self.files_path / self.named_list)
+            self._import_results(paper)
+            completed_by = "" if paper.missing(required) else "cache"
+            for step in ["metadata", "acm", "pdf"]:
+                if completed_by or (step == "acm" and not harvest_acm):
+                    continue
+                if step == "pdf" and not fetch_pdf and not self._has_pdf(paper):
+                    continue
+                if step == "metadata":
+                    self._run_stage(paper, "metadata", paper.get_metadata, source)
+                elif step == "acm":
+                    self._run_stage(paper, "harvest_acm", paper.harvest_acm)
+                else:
+                    counts["downloaded"] += bool(self._run_stage(paper, "pdf", self._load_pdf, paper, fetch_pdf))
+                if not paper.missing(required):
+                    completed_by = step
+            counts[completed_by or "incomplete"] += 1
+            self.paper_list.append(paper)
+
+        print(", ".join(f"{count} {name}" for name, count in counts.items()))
+        return counts
+
+    def _has_pdf(self, paper: Paper) -> bool:
+        """Returns (bool): Whether the PDF of a paper is in the store, or in the directory of the list."""
+        return self.store.has_doi(paper.doi) if self.store is not None else paper.has_pdf()
+
+    def _load_pdf(self, paper: Paper, fetch: bool) -> bool:
+        """
+        Read the PDF of a paper built from its DOI, from the store or the directory of the list,
+        downloading it first if it's in neither and `fetch` is set. The fields already set are kept.
+
+        Returns (bool): Whether the PDF was downloaded.
+        """
+        from downloader import acm as acm_downloader
+
+        downloaded = False
+        if self.store is not None:
+            if not self.store.has_doi(paper.doi):
+                if not fetch:
+                    raise Exception("PDF not in the store.")
+                self.store.add_pdf(acm_downloader.fetch_pdf(paper.doi, paper.pdf_url), paper.doi)
+                self.store.add_to_manifest(self.named_list, paper.doi)
+                downloaded = True
+            paper.full_path = self.store.pdf_path(paper.doi)
+        elif not paper.has_pdf():
+            if not fetch:
+                raise Exception("PDF not found.")
+            content = acm_downloader.fetch_pdf(paper.doi, paper.pdf_url)
+            paper.full_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(paper.full_path, "wb") as f:
+                f.write(content)
+            downloaded = True
+
+        known = {field: getattr(paper, field) for field in ["abstract", "keywords", "keywords_source"]}
+        paper.load(self.text_store)
+        if known["abstract"]:
+            paper.abstract = known["abstract"]
+        if any(known["keywords"]):
+            paper.keywords, paper.keywords_source = known["keywords"], known["keywords_source"]
+        return downloaded
+
     def load_single_paper(
         self,
         dir: str,
@@ -129,11 +429,37 @@ class Reader:
         return len(self.paper_list) - 1
 
     def load_cache(self):
-        """Load processed information from cache if it exists."""
+        """Load processed information from cache if it exists.
+        A shard also imports its papers from the merged cache of the list.
+        The records are validated, see `record.validate_cache`."""
         cache_file_path = self.cache_path / self.cache_file
         if Path.is_file(cache_file_path):
-            with open(cache_file_path, "r") as f:
-                self.cache = json.load(f)
+            with open(cache_file_path, "rb") as f:
+                self.cache = validate_cache(json.load(f), str(cache_file_path))
+
+        list_cache_path = self.cache_path / f"{self.named_list}.json"
+        if self.shard is not None and Path.is_file(list_cache_path):
+            with open(list_cache_path, "rb") as f:
+                list_cache = {doi: record for doi, record in json.load(f).items() if self._in_shard(doi)}
+            self.cache = merge_records(validate_cache(list_cache, str(list_cache_path)), self.cache)
+
+    def load_from_cache(self):
+        """Load the papers of the cache without reading their PDF files, e.g. to export them."""
+        self.load_cache()
+        for record in self.cache.values():
+            paper = Paper(Path(record["full_path"]).parent, record["file_name"], filename_has_doi=False)
+            paper.import_from_dict(record)
+            self.paper_list.append(paper)
+
+    def merge_shards(self):
+        """
+        Merge the cache shards of the list into the list cache, keeping for each paper the
+        result of the latest extractor version, then the most recent one. The merged cache
+        is loaded in the reader, see `load_from_cache` to export it.
+        """
+        if self.shard is not None:
+            raise Exception("Shards are merged by a reader of the whole list.")
+        self.cache = merge_shards(self.named_list, self.cache_path)
 
     def clean_cache(self):
         """Clean cache."""
@@ -141,71 +467,305 @@ class Reader:
 
     def dump(self, overwrite: bool = False):
         """
-        Dump cache to a json file.
+        Dump cache to a json file, or to the store if the reader uses one.
+        A shard also dumps to its cache shard when using a store, to be merged with the others.
+        The records are stamped with the time of the dump, unless they didn't change.
 
         Args:
             overwrite (bool, optional): Deletes everything that was previously in the cache.
                 Otherwise it will update it. Default is false.
         """
+        updated_at = time.time()
+        if self.store is not None:
+            for paper in self.paper_list:
+                record = stamp(paper.export_to_dict(), self.store.get_record(paper.doi), updated_at)
+                self.store.put_record(paper.doi, record)
+            self.store.add_to_manifest(self.named_list, *[paper.doi for paper in self.paper_list])
+            if self.shard is None:
+                return
+
         if overwrite:
             self.clean_cache()
         for paper in self.paper_list:
-            self.cache[paper.doi] = paper.export_to_dict()
-        with open(self.cache_path / self.cache_file, "w") as f:
-            json.dump(self.cache, f)
+            self.cache[paper.doi] = stamp(paper.export_to_dict(), self.cache.get(paper.doi), updated_at)
+        with open(self.cache_path / self.cache_file, "wb") as f:
+            f.write(dumps_json(self.cache))
 
-    def extract_metadata(self):
-        """Extract metadata from an external source via API."""
+    def extract_metadata(self, backend=None):
+        """
+        Extract metadata from an external source via API.
+        The failures are recorded in the ledger of the list, see `retry_failed`.
+
+        Args:
+            backend (optional): A local metadata source tried before the API,
+                e.g. `OAGIndex`. Defaults to None.
+        """
         if not self.paper_list:
             raise Exception("There's no paper loaded.")
-        pbar = tqdm(self.paper_list)
+        source = Metadata(backend=backend)
+
+        pbar = _tqdm(self.paper_list)
         for paper in pbar:
             pbar.set_description(f"Processing {paper.doi}")
-            paper.get_metadata()
+            self._run_stage(paper, "metadata", paper.get_metadata, source)
 
-    def extract_classification(self, *from_source: str):
+    def import_metadata_from_bibtex(self, bib_path: str | Path) -> int:
         """
-        Extract classification topics using an external source.
+        Fill the metadata of the loaded papers from a local BibTeX dump, without
+        any request. The dump is streamed once, keeping only the entries of the loaded DOIs.
 
         Args:
-            from_source Literal["acm", "dbpedia"]: The name of the external source.
-                TODO: Include CSO classifier
+            bib_path (str | Path): Path to the `.bib` file.
+
+        Returns (int): Number of papers updated.
+        """
+        if not self.paper_list:
+            raise Exception("There's no paper loaded.")
+        index = bibtex.index_file(bib_path, [paper.doi for paper in self.paper_list if paper.doi])
+
+        updated = 0
+        for paper in self.paper_list:
+            entry = index.get(normalize_doi(paper.doi))
+            if entry is not None:
+                paper.update_metadata(bibtex.to_metadata(entry))
+                updated += 1
+        return updated
+
+    def extract_missing_keywords(
+        self, source: Literal["abstract", "text"] = "abstract", top_k: int = 5, **kwargs
+    ) -> int:
+        """
+        Set keywords to the papers without any, extracted locally by TF-IDF over all the loaded papers.
+        Their `keywords_source` is set to "tfidf".
+
+        Args:
+            source (Literal["abstract", "text"], optional): The text used, the abstract
+                or the first two pages of the paper. Defaults to "abstract".
+            top_k (int, optional): Maximum number of keywords per paper. Defaults to 5.
+            **kwargs: See `keywords.extract_keyphrases`.
+
+        Returns (int): Number of papers updated.
+        """
+        if not self.paper_list:
+            raise Exception("There's no paper loaded.")
+        match source:
+            case "abstract":
+                texts = [paper.abstract for paper in self.paper_list]
+            case "text":
+                texts = ["\n".join(paper._raw_text[:2]) for paper in self.paper_list]
+            case _:
+                raise ValueError("source must be 'abstract' or 'text'")
+
+        updated = 0
+        for paper, phrases in zip(self.paper_list, extract_keyphrases(texts, top_k, **kwargs)):
+            if not (paper.keywords and paper.keywords[0]) and phrases:
+                paper.keywords = phrases
+                paper.keywords_source = "tfidf"
+                updated += 1
+        return updated
+
+    def find_duplicates(
+        self,
+        threshold: float = 0.8,
+        source: Literal["text", "abstract"] = "text",
+        collapse: bool = False,
+        **kwargs,
+    ) -> list[list[Paper]]:
+        """
+        Find the clusters of near-duplicate papers, e.g. a preprint and its published version,
+        so that they are counted once in the Klink input. The paper with the most metadata of
+        each cluster is kept, the others are flagged with its DOI in `duplicate_of` and left out
+        of `export_as_klink_input`. The previous flags are reset.
+
+        Args:
+            threshold (float, optional): Minimum estimated similarity of the texts. Defaults to 0.8.
+            source (Literal["text", "abstract"], optional): The text compared, the abstract
+                is used for the papers without text. Defaults to "text".
+            collapse (bool, optional): Remove the duplicates from the paper list. Defaults to False.
+            **kwargs: See `dedup.find_duplicates`.
+
+        Returns (list[list[Paper]]): The clusters, starting with the paper kept.
+        """
+        if not self.paper_list:
+            raise Exception("There's no paper loaded.")
+        match source:
+            case "text":
+                texts = [paper.text or paper.abstract for paper in self.paper_list]
+            case "abstract":
+                texts = [paper.abstract for paper in self.paper_list]
+            case _:
+                raise ValueError("source must be 'text' or 'abstract'")
+
+        def completeness(paper: Paper) -> int:
+            filled = [getattr(paper, field) for field in METADATA_FIELDS] + list(paper.topics.values())
+            return sum(bool(value) for value in filled)
+
+        for paper in self.paper_list:
+            paper.duplicate_of = ""
+        clusters = []
+        for indexes in dedup.find_duplicates(texts, threshold, **kwargs):
+            papers = sorted(
+                (self.paper_list[i] for i in indexes), key=completeness, reverse=True
+            )
+            for paper in papers[1:]:
+                paper.duplicate_of = papers[0].doi
+            clusters.append(papers)
+
+        if collapse:
+            self.paper_list = [paper for paper in self.paper_list if not paper.duplicate_of]
+        return clusters
+
+    def harvest_acm(self):
+        """
+        Extract the classification, abstract, keywords and bibliographic fields
+        from the ACM landing page of each paper, fetching every page only once.
         """
-        pbar = tqdm(self.paper_list)
+        if not self.paper_list:
+            raise Exception("There's no paper loaded.")
+        pbar = _tqdm(self.paper_list)
         for paper in pbar:
             pbar.set_description(f"Processing {paper.doi}")
-            for source in from_source:
-                match source.lower():
-                    case "acm":
-                        try:
-                            paper.extract_acm_topics()
-                        except Exception as err:
-                            print(f"{paper.doi}: {err}")
-                    case "dbpedia":
-                        try:
-                            paper.extract_dbpedia_topics()
-                        except Exception as err:
-                            print(f"{paper.doi}: {err}")
-
-                    case _:
-                        raise Exception(
-                            f"Classification from '{source}' is not implemented."
-                        )
-
-    def export_as_klink_input(self, classification_source) -> pd.DataFrame:
+            self._run_stage(paper, "harvest_acm", paper.harvest_acm)
+
+    def _run_stage(self, paper: Paper, stage: str, func, *args):
         """
-        Export as Klink input to a tsv file.
-        This is the file used by klink2 algorithm to build the ontology.
+        Apply a stage to a paper, printing its error if any, and record the outcome in the ledger.
+
+        Returns: The result of the stage, None if it failed.
+        """
+        try:
+            result = func(*args)
+        except Exception as err:
+            print(f"{paper.doi}: {stage}: {err}")
+            self.ledger.record(paper.doi, stage, err)
+            return None
+        self.ledger.record(paper.doi, stage)
+        return result
+
+    def retry_failed(self, *stages: str, backend=None) -> dict[str, int]:
+        """
+        Run again the stages that failed for some papers and are due for a retry, see `FailureLedger`.
+        The permanent failures, e.g. a `WrongPaperError`, are not retried.
+        The failed downloads are retried for the DOIs of the list, the other stages only for the
+        papers loaded.
 
         Args:
-            classification_source: Used to select which source will be used to
-                export the topics from.
+            *stages (str): The stages to retry: "download", "pdf", "metadata", "harvest_acm", "acm"
+                and/or "dbpedia". Defaults to all of them.
+            backend (optional): A local metadata source tried before the API, e.g. `OAGIndex`. Defaults to None.
 
-        Return (pd.DataFrame): The processed data as a klink input.
-            Same as the exported to tsv file.
+        Returns (dict[str, int]): The number of failures "retried", "fixed" and still "failed",
+            and "skipped" because they are permanent, not due or of papers not loaded.
+        """
+        from downloader import download_from_doi
+
+        self.ledger.load()
+        failures = [entry for entry in self.ledger.failures() if not stages or entry["stage"] in stages]
+        papers = {paper.doi: paper for paper in self.paper_list}
+        source = Metadata(backend=backend)
+        actions = {
+            "metadata": lambda paper: paper.get_metadata(source),
+            "harvest_acm": Paper.harvest_acm,
+            "acm": Paper.extract_acm_topics,
+            "pdf": lambda paper: self._load_pdf(paper, True),
+        }
 
-        Raises: Exception if the topics from `classification_source` is not
-            present in the data.
+        retried = []
+        dbpedia_papers = []
+        for entry in failures:
+            doi, stage = entry["doi"], entry["stage"]
+            if stage not in (*actions, "download", "dbpedia") or not self.ledger.is_due(entry):
+                continue
+            if stage != "download" and doi not in papers:
+                continue
+            retried.append((doi, stage))
+            if stage == "download":
+                download_from_doi(doi, sub_dir=self.named_list, store=self.store, ledger=self.ledger)
+            elif stage == "dbpedia":
+                dbpedia_papers.append(papers[doi])
+            else:
+                self._run_stage(papers[doi], stage, actions[stage], papers[doi])
+        if dbpedia_papers:
+            self._extract_dbpedia_classification(dbpedia_papers)
+
+        self.ledger.compact()
+        failed = sum(key in self.ledger.entries for key in retried)
+        counts = {
+            "retried": len(retried),
+            "fixed": len(retried) - failed,
+            "failed": failed,
+            "skipped": len(failures) - len(retried),
+        }
+        print(", ".join(f"{count} {name}" for name, count in counts.items()))
+        return counts
+
+    def run_pipeline(self, *classifiers: str, **kwargs):
+        """
+        Load the papers, extract their metadata and classification with overlapping stages,
+        and dump the results to the cache as they come.
+
+        Args:
+            classifiers Literal["acm", "dbpedia"]: The name of the external sources.
+            **kwargs: See `pipeline.run_pipeline`.
+        """
+        from .pipeline import run_pipeline
+
+        run_pipeline(self, classifiers, **kwargs)
+
+    def extract_classification(self, *from_source: str):
+        """
+        Extract classification topics using an external source.
+        The failures are recorded in the ledger of the list, see `retry_failed`.
+
+        Args:
+            from_source Literal["acm", "dbpedia"]: The name of the external source.
+                TODO: Include CSO classifier
+        """
+        for source in from_source:
+            match source.lower():
+                case "acm":
+                    self._extract_acm_classification()
+                case "dbpedia":
+                    self._extract_dbpedia_classification()
+                case _:
+                    raise Exception(
+                        f"Classification from '{source}' is not implemented."
+                    )
+
+    def _extract_acm_classification(self):
+        """Extract the topics from ACM, one paper at a time."""
+        pbar = _tqdm(self.paper_list)
+        for paper in pbar:
+            pbar.set_description(f"Processing {paper.doi}")
+            self._run_stage(paper, "acm", paper.extract_acm_topics)
+
+    def _extract_dbpedia_classification(self, paper_list: list[Paper] | None = None):
+        """Extract the topics from DBpedia, sending the abstracts in batches.
+        Defaults to all the papers loaded."""
+        papers = []
+        for paper in self.paper_list if paper_list is None else paper_list:
+            if paper.abstract:
+                papers.append(paper)
+            else:
+                paper.topics["dbpedia"] = []
+        if not papers:
+            return
+
+        results = dbpedia.get_classification_from_texts(
+            [paper.abstract for paper in papers]
+        )
+        for paper, res_dict in zip(papers, results):
+            if isinstance(res_dict, Exception):
+                print(f"{paper.doi}: {res_dict}")
+                self.ledger.record(paper.doi, "dbpedia", res_dict)
+            else:
+                paper.set_dbpedia_topics(res_dict)
+                self.ledger.record(paper.doi, "dbpedia")
+
+    def _klink_input(self, classification_source) -> "pd.DataFrame":
+        """
+        Returns (pd.DataFrame): The papers with keywords and topics as Klink input rows, with their DOI.
+            See `export_as_klink_input`.
         """
         topics_src = f"topics_{classification_source}"
         data_to_export = self.metadata_collection(data_format="dataframe").fillna("")
@@ -224,24 +784,69 @@ class Reader:
             topics_src: "SC",
             "year": "PY",
         }
-        mask = (data_to_export["keywords"] != "") & (data_to_export[topics_src] != "")
+        mask = (
+            (data_to_export["keywords"] != "")
+            & (data_to_export[topics_src] != "")
+            & (data_to_export["duplicate_of"] == "")
+        )
         data_to_export = data_to_export[mask]
         data_to_export.rename(columns=cols_dict, inplace=True)
 
-        data_to_export = data_to_export[list(cols_dict.values())]
+        return data_to_export[["doi"] + list(cols_dict.values())]
+
+    def export_as_klink_input(self, classification_source) -> "pd.DataFrame":
+        """
+        Export as Klink input to a tsv file.
+        This is the file used by klink2 algorithm to build the ontology.
+        The papers flagged as near-duplicates are left out, see `find_duplicates`.
+        The input variables of Klink-2 grouped by keyword are also written to `<named_list>.klink`,
+        which klink2/input.R reads at once instead of the tsv file, see `ontology.klink_tables`.
+
+        Args:
+            classification_source: Used to select which source will be used to
+                export the topics from.
+
+        Return (pd.DataFrame): The processed data as a klink input.
+            Same as the exported to tsv file.
+
+        Raises: Exception if the topics from `classification_source` is not
+            present in the data.
+        """
+        from ontology.klink_tables import build_klink_tables, write_klink_tables
+
+        data_to_export = self._klink_input(classification_source).drop(columns="doi")
 
-        dir_path = DATA_PATH / "klink2" / self.named_list
+        dir_path = self.data_path / "klink2" / self.named_list
         if not dir_path.is_dir():
             Path.mkdir(dir_path)
 
         data_to_export.to_csv(
             dir_path / f"{self.named_list}.tsv", sep="\t", index=False
         )
+        write_klink_tables(build_klink_tables(data_to_export), dir_path / f"{self.named_list}.klink")
         return data_to_export
 
+    def update_klink_input(self, classification_source, m: int = 100) -> dict:
+        """
+        Update the incremental Klink input of the list with the loaded papers: only the papers added,
+        changed or removed since the previous update are processed, and only the changes are written,
+        see `ontology.incremental`. Load them in R with klink2/input.R:read_incremental.
+
+        Args:
+            classification_source: Used to select which source will be used to
+                export the topics from.
+            m (int, optional): Number of co-occurrences kept per keyword, as in klink2/input.R. Defaults to 100.
+
+        Returns (dict): The delta, see `KlinkState.update`.
+        """
+        from ontology.incremental import update_klink_input
+
+        rows = self._klink_input(classification_source).to_dict(orient="records")
+        return update_klink_input(self.named_list, {row.pop("doi"): row for row in rows}, m)
+
     def metadata_collection(
         self, data_format: Literal["dict", "dataframe"] = "dict"
-    ) -> list[dict] | pd.DataFrame:
+    ) -> "list[dict] | pd.DataFrame":
         """
         Args:
             data_format (Literal["dict", "dataframe"]): accepts 'dict' or 'dataframe'
@@ -261,6 +866,8 @@ class Reader:
                 "publisher": paper.publisher,
                 "year": paper.year,
                 "keywords": ";".join(paper.keywords),
+                "keywords_source": paper.keywords_source,
+                "duplicate_of": paper.duplicate_of,
             }
             for key in paper.topics:
                 paper_data[f"topics_{key}"] = ";".join(paper.topics[key])
@@ -269,6 +876,8 @@ class Reader:
         if (data_format == "dict") and isinstance(papers_details, list):
             return papers_details
         elif data_format == "dataframe":
+            import pandas as pd
+
             papers_df = pd.DataFrame(papers_details)
             return papers_df
         else:
@@ -281,6 +890,8 @@ class Reader:
             raw (bool, option): If true the text content returned is the exact text with any processing. Default is False.
 
         Return (list[dict]): The list of dictionaries with text content from the papers.
+            When the papers were loaded from a text store, the raw text is a sequence of
+            pages decompressed on access.
         """
         papers_content = []
         for paper in self.paper_list:
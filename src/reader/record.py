@@ -0,0 +1,353 @@
+"""
+Typed record of the results of a paper, the single format of the papers in the caches,
+the store and between processes, with a JSON and a compact binary encoding.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field, fields
+from itertools import accumulate
+from typing import Any, Sequence
+
+from utils.errors import RecordError
+from .bibtex import KEYWORDS_SEPARATOR_PATTERN, split_authors
+
+# Version of the record schema, written in the records. Increase it when fields change and
+# migrate the previous records in `_migrate`. Records without version are from older caches.
+SCHEMA_VERSION = 1
+
+BINARY_MAGIC = b"PREC"
+# magic, schema version, filename_has_doi, silent, extractor_version, updated_at, number of counts, of strings
+_HEADER = struct.Struct("<4sH??qdII")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+@dataclass(slots=True)
+class PaperRecord:
+    """The results of a paper, see `Paper.to_record`"""
+
+    doi: str = ""
+    file_name: str = ""
+    full_path: str = ""
+    filename_has_doi: bool = True
+    pattern_to_replace: dict[str, str] = field(default_factory=dict)
+    silent: bool = True
+    title: str = ""
+    author: list[str] = field(default_factory=list)
+    abstract: str = ""
+    issn: str = ""
+    url: str = ""
+    number: str = ""
+    journal: str = ""
+    publisher: str = ""
+    year: str = ""
+    month: str = ""
+    pages: str = ""
+    keywords: list[str] = field(default_factory=list)
+    keywords_source: str = ""
+    topics: dict[str, list[str]] = field(default_factory=dict)
+    pdf_url: str = ""
+    duplicate_of: str = ""
+    extractor_version: int = 0
+    updated_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        """Returns (dict): The record as a JSON compatible dict, with its schema version."""
+        data: dict[str, Any] = {"schema_version": SCHEMA_VERSION}
+        for name, kind in _KINDS.items():
+            data[name] = _copy(kind, getattr(self, name))
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PaperRecord":
+        """
+        The record of a dict, see `to_dict`. Records of older schema versions are migrated.
+
+        Args:
+            data (dict): The record as a dict.
+
+        Returns (PaperRecord): The record, raises `RecordError` when the dict
+            doesn't match the schema, e.g. unknown field or wrong type.
+        """
+        if not isinstance(data, dict):
+            raise RecordError(f"A record must be a dict, not {type(data).__name__}.")
+        version = data.get("schema_version", 0)
+        if type(version) is not int or not 0 <= version <= SCHEMA_VERSION:
+            raise RecordError(f"Unsupported record schema version {version!r}, expected up to {SCHEMA_VERSION}.")
+        if version < SCHEMA_VERSION:
+            data = _migrate(data, version)
+
+        unknown = data.keys() - _KINDS.keys() - {"schema_version"}
+        if unknown:
+            raise RecordError(f"Unknown record fields: {sorted(unknown)}.")
+        values = {}
+        for name, value in data.items():
+            if name == "schema_version":
+                continue
+            kind = _KINDS[name]
+            if not _CHECKS[kind](value):
+                raise RecordError(f"Invalid record field {name}: expected {_kind_name(kind)}, got {value!r:.80}.")
+            values[name] = float(value) if kind is float else _copy(kind, value)
+        return cls(**values)
+
+    def to_json(self) -> bytes:
+        """Returns (bytes): The record encoded in JSON, see `to_dict`."""
+        return dumps_json(self.to_dict())
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "PaperRecord":
+        """Returns (PaperRecord): The record decoded from JSON and validated, see `from_dict`."""
+        try:
+            return cls.from_dict(json.loads(data))
+        except ValueError as err:
+            raise RecordError(f"Invalid JSON record: {err}") from err
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns (bytes): The record in the binary encoding, about twice smaller than JSON
+        and faster to encode and decode: a fixed header with the non text fields,
+        the number of items of the collections, the lengths of the strings and their UTF-8 bytes.
+        """
+        topics = self.topics
+        strings = [getattr(self, name) for name in _STRING_FIELDS]
+        strings += self.author
+        strings += self.keywords
+        for key, value in self.pattern_to_replace.items():
+            strings += (key, value)
+        for key, values in topics.items():
+            strings.append(key)
+            strings += values
+        counts = array("I", [len(self.author), len(self.keywords), len(self.pattern_to_replace), len(topics)])
+        counts.extend(len(values) for values in topics.values())
+        blobs = [string.encode("utf-8") for string in strings]
+        lengths = array("I", map(len, blobs))
+        if not _LITTLE_ENDIAN:
+            counts.byteswap()
+            lengths.byteswap()
+        header = _HEADER.pack(
+            BINARY_MAGIC,
+            SCHEMA_VERSION,
+            self.filename_has_doi,
+            self.silent,
+            self.extractor_version,
+            self.updated_at,
+            len(counts),
+            len(lengths),
+        )
+        return b"".join([header, counts.tobytes(), lengths.tobytes(), *blobs])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PaperRecord":
+        """Returns (PaperRecord): The record decoded from the binary encoding, see `to_bytes`.
+        Raises `RecordError` when the data isn't a complete record of the current schema version."""
+        record, end = _decode(data, 0)
+        if end != len(data):
+            raise RecordError(f"Invalid binary record: {len(data) - end} unexpected bytes at the end.")
+        return record
+
+
+_KINDS = {f.name: f.type for f in fields(PaperRecord)}
+# Fields of the `Paper` objects, the others are set when the results are saved
+PAPER_FIELDS = [name for name in _KINDS if name not in ("extractor_version", "updated_at")]
+_STRING_FIELDS = [name for name, kind in _KINDS.items() if kind is str]
+_CHECKS = {
+    str: lambda value: type(value) is str,
+    bool: lambda value: type(value) is bool,
+    int: lambda value: type(value) is int,
+    float: lambda value: type(value) in (float, int),
+    list[str]: lambda value: type(value) is list and all(type(item) is str for item in value),
+    dict[str, str]: lambda value: type(value) is dict
+    and all(type(key) is str and type(item) is str for key, item in value.items()),
+    dict[str, list[str]]: lambda value: type(value) is dict
+    and all(
+        type(key) is str and type(items) is list and all(type(item) is str for item in items)
+        for key, items in value.items()
+    ),
+}
+
+
+def _copy(kind, value):
+    """Returns: A copy of the collections, so records don't share them with their source."""
+    if kind == list[str]:
+        return list(value)
+    if kind == dict[str, str]:
+        return dict(value)
+    if kind == dict[str, list[str]]:
+        return {key: list(values) for key, values in value.items()}
+    return value
+
+
+def _kind_name(kind) -> str:
+    return kind.__name__ if isinstance(kind, type) else str(kind)
+
+
+def _migrate(data: dict, version: int) -> dict:
+    """
+    Returns (dict): The record of an older schema version in the current one.
+
+    Version 0, the records written before the schema, may miss the fields added since
+    (`keywords_source`, `duplicate_of`, `extractor_version`, `updated_at`) which get their
+    defaults. Their values were stored as set: None instead of an empty value, the `keywords`
+    of the metadata API as a comma separated string, the `author` maybe as a string,
+    and numbers such as the `year` as numbers.
+    """
+    if version == 0:
+        data = {name: _migrate_value(name, value) for name, value in data.items()}
+    return data
+
+
+def _migrate_value(name: str, value):
+    """Returns: A value of a version 0 record as its type in the current schema, or as it is."""
+    kind = _KINDS.get(name)
+    if value is None and kind in (str, list[str], dict[str, str], dict[str, list[str]]):
+        return "" if kind is str else [] if kind == list[str] else {}
+    if kind is str and type(value) in (int, float):
+        return str(value)
+    if kind == list[str]:
+        if type(value) is str:
+            if name == "author":
+                return split_authors(value)
+            return [item.strip() for item in KEYWORDS_SEPARATOR_PATTERN.split(value) if item.strip()]
+        if type(value) is list:
+            return [str(item) for item in value if item is not None]
+    return value
+
+
+def _decode(data: bytes, offset: int) -> tuple[PaperRecord, int]:
+    """Returns (tuple[PaperRecord, int]): The binary record starting at the offset and the offset of its end."""
+    try:
+        magic, version, filename_has_doi, silent, extractor_version, updated_at, num_counts, num_strings = (
+            _HEADER.unpack_from(data, offset)
+        )
+    except struct.error as err:
+        raise RecordError(f"Invalid binary record: {err}") from err
+    if magic != BINARY_MAGIC:
+        raise RecordError("Invalid binary record: wrong magic number.")
+    if version != SCHEMA_VERSION:
+        raise RecordError(f"Unsupported binary record schema version {version}, expected {SCHEMA_VERSION}.")
+
+    offset += _HEADER.size
+    counts, lengths = array("I"), array("I")
+    end = offset + 4 * (num_counts + num_strings)
+    if end > len(data) or num_counts < 4:
+        raise RecordError("Invalid binary record: truncated.")
+    counts.frombytes(data[offset:offset + 4 * num_counts])
+    lengths.frombytes(data[offset + 4 * num_counts:end])
+    if not _LITTLE_ENDIAN:
+        counts.byteswap()
+        lengths.byteswap()
+    num_authors, num_keywords, num_patterns, num_topics = counts[:4]
+    if (
+        num_counts != 4 + num_topics
+        or num_strings != len(_STRING_FIELDS) + num_authors + num_keywords + 2 * num_patterns + num_topics + sum(counts[4:])
+    ):
+        raise RecordError("Invalid binary record: inconsistent counts.")
+
+    bounds = list(accumulate(lengths, initial=end))
+    if bounds[-1] > len(data):
+        raise RecordError("Invalid binary record: truncated.")
+    try:
+        strings = [data[start:stop].decode("utf-8") for start, stop in zip(bounds, bounds[1:])]
+    except UnicodeDecodeError as err:
+        raise RecordError(f"Invalid binary record: {err}") from err
+
+    values: dict[str, Any] = dict(zip(_STRING_FIELDS, strings))
+    i = len(_STRING_FIELDS)
+    values["author"] = strings[i:i + num_authors]
+    i += num_authors
+    values["keywords"] = strings[i:i + num_keywords]
+    i += num_keywords
+    values["pattern_to_replace"] = dict(zip(strings[i:i + 2 * num_patterns:2], strings[i + 1:i + 2 * num_patterns:2]))
+    i += 2 * num_patterns
+    topics = {}
+    for count in counts[4:]:
+        topics[strings[i]] = strings[i + 1:i + 1 + count]
+        i += 1 + count
+    values["topics"] = topics
+    record = PaperRecord(
+        filename_has_doi=filename_has_doi,
+        silent=silent,
+        extractor_version=extractor_version,
+        updated_at=updated_at,
+        **values,
+    )
+    return record, bounds[-1]
+
+
+def encode_records(records: Sequence[PaperRecord]) -> bytes:
+    """Returns (bytes): The records in the binary encoding, one after the other, see `PaperRecord.to_bytes`."""
+    return b"".join(record.to_bytes() for record in records)
+
+
+def decode_records(data: bytes) -> list[PaperRecord]:
+    """Returns (list[PaperRecord]): The records encoded with `encode_records`."""
+    records, offset = [], 0
+    while offset < len(data):
+        record, offset = _decode(data, offset)
+        records.append(record)
+    return records
+
+
+def encode_with_strings(record: PaperRecord, strings: Sequence[str]) -> bytes:
+    """
+    Returns (bytes): The record in the binary encoding followed by a list of strings,
+    e.g. the pages of a paper sent by a worker process, see `Paper.export_extraction`.
+    """
+    blobs = [string.encode("utf-8") for string in strings]
+    lengths = array("I", map(len, blobs))
+    if not _LITTLE_ENDIAN:
+        lengths.byteswap()
+    return b"".join([record.to_bytes(), struct.pack("<I", len(lengths)), lengths.tobytes(), *blobs])
+
+
+def decode_with_strings(data: bytes) -> tuple[PaperRecord, list[str]]:
+    """Returns (tuple[PaperRecord, list[str]]): The record and the strings encoded with `encode_with_strings`."""
+    record, offset = _decode(data, 0)
+    try:
+        (num_strings,) = struct.unpack_from("<I", data, offset)
+    except struct.error as err:
+        raise RecordError(f"Invalid binary record: {err}") from err
+    offset += 4
+    end = offset + 4 * num_strings
+    if end > len(data):
+        raise RecordError("Invalid binary record: truncated.")
+    lengths = array("I")
+    lengths.frombytes(data[offset:end])
+    if not _LITTLE_ENDIAN:
+        lengths.byteswap()
+    bounds = list(accumulate(lengths, initial=end))
+    if bounds[-1] != len(data):
+        raise RecordError("Invalid binary record: wrong length of the strings.")
+    try:
+        return record, [data[start:stop].decode("utf-8") for start, stop in zip(bounds, bounds[1:])]
+    except UnicodeDecodeError as err:
+        raise RecordError(f"Invalid binary record: {err}") from err
+
+
+def dumps_json(data: Any) -> bytes:
+    """Returns (bytes): Compact JSON of records or caches of records, faster than `json.dump` to a file."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), check_circular=False).encode("utf-8")
+
+
+def validate_cache(cache: dict, source: str = "cache") -> dict[str, dict]:
+    """
+    Validates a cache mapping DOIs to records, migrating the records of older schema versions.
+
+    Args:
+        cache (dict): The cache, e.g. loaded from a cache file.
+        source (str, optional): Name of the cache in the errors, e.g. its file. Defaults to "cache".
+
+    Returns (dict[str, dict]): The cache with the records in the current schema version.
+        Raises `RecordError` with the DOI of the first invalid record.
+    """
+    if not isinstance(cache, dict):
+        raise RecordError(f"{source}: A cache must map DOIs to records.")
+    validated = {}
+    for doi, record in cache.items():
+        try:
+            validated[doi] = PaperRecord.from_dict(record).to_dict()
+        except RecordError as err:
+            raise RecordError(f"{source}: {doi}: {err}") from err
+    return validated
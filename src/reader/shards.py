@@ -0,0 +1,115 @@
+"""
+Partitioning of a named list in shards processed independently, e.g. on several machines,
+and merging of their caches. The only state shared between the nodes are the cache files.
+"""
+
+import json
+import re
+from glob import escape
+from pathlib import Path
+
+from utils.utils import normalize_doi
+from .record import dumps_json, validate_cache
+
+SHARD_FILE_PATTERN = re.compile(r"^(?P<named_list>.+)\.shard-(?P<index>\d+)-of-(?P<num_shards>\d+)\.json$")
+
+
+def shard_cache_file(named_list: str, index: int, num_shards: int) -> str:
+    """Returns (str): The name of the cache file of a shard, e.g. `my-list.shard-0-of-4.json`"""
+    return f"{named_list}.shard-{index}-of-{num_shards}.json"
+
+
+def check_shard(shard: tuple[int, int]) -> tuple[int, int]:
+    """Returns (tuple[int, int]): The (index, number of shards), raises an exception if it's invalid."""
+    index, num_shards = shard
+    if num_shards < 1 or not 0 <= index < num_shards:
+        raise Exception(f"Invalid shard {index} of {num_shards}.")
+    return index, num_shards
+
+
+def _precedence(record: dict) -> tuple:
+    return (record.get("extractor_version", 0), record.get("updated_at", 0.0))
+
+
+def _without_time(record: dict) -> dict:
+    return {key: value for key, value in record.items() if key != "updated_at"}
+
+
+def stamp(record: dict, previous: dict | None, now: float) -> dict:
+    """
+    Returns (dict): The record with its `updated_at` time, `now` unless the record
+    is the same as the previous one, which keeps its time.
+    """
+    if previous is not None and "updated_at" in previous:
+        if _without_time(previous) == _without_time(record):
+            return {**record, "updated_at": previous["updated_at"]}
+    return {**record, "updated_at": now}
+
+
+def merge_records(*caches: dict[str, dict]) -> dict[str, dict]:
+    """
+    Merge caches mapping DOIs to exported papers. When a DOI is in several of them, the record
+    with the highest extractor version is kept, then the most recently updated one.
+    Records without version or timestamp, e.g. from older caches, come last.
+    On a full tie the last record wins.
+
+    Returns (dict[str, dict]): The merged cache.
+    """
+    merged: dict[str, dict] = {}
+    for cache in caches:
+        for doi, record in cache.items():
+            doi = normalize_doi(doi)
+            current = merged.get(doi)
+            if current is None or _precedence(record) >= _precedence(current):
+                merged[doi] = record
+    return merged
+
+
+def find_shards(named_list: str, cache_path: str | Path) -> list[Path]:
+    """Returns (list[Path]): The cache files of the shards of the named list, sorted by index."""
+    shards = []
+    for path in Path(cache_path).glob(f"{escape(named_list)}.shard-*-of-*.json"):
+        match = SHARD_FILE_PATTERN.match(path.name)
+        if match and match["named_list"] == named_list:
+            shards.append((int(match["num_shards"]), int(match["index"]), path))
+    return [path for _, _, path in sorted(shards)]
+
+
+def merge_shards(named_list: str, cache_path: str | Path) -> dict[str, dict]:
+    """
+    Merge the cache shards of the named list into its cache, `<named_list>.json`,
+    including the records already in it. See `merge_records` for the conflicts.
+    The records are validated and migrated to the current schema, see `record.validate_cache`.
+    Missing shards are reported but don't prevent the merge.
+
+    Args:
+        named_list (str): The name of the list.
+        cache_path (str | Path): The directory of the cache files.
+
+    Returns (dict[str, dict]): The merged cache.
+    """
+    cache_path = Path(cache_path)
+    caches = []
+    list_cache_path = cache_path / f"{named_list}.json"
+    if list_cache_path.is_file():
+        with open(list_cache_path, "rb") as f:
+            caches.append(validate_cache(json.load(f), str(list_cache_path)))
+
+    found: dict[int, set[int]] = {}
+    for path in find_shards(named_list, cache_path):
+        match = SHARD_FILE_PATTERN.match(path.name)
+        found.setdefault(int(match["num_shards"]), set()).add(int(match["index"]))
+        with open(path, "rb") as f:
+            caches.append(validate_cache(json.load(f), str(path)))
+
+    for num_shards, indexes in found.items():
+        missing = sorted(set(range(num_shards)) - indexes)
+        if missing:
+            print(f"{named_list}: Missing shards {missing} of {num_shards}.")
+
+    merged = merge_records(*caches)
+    tmp_path = cache_path / f".{named_list}.json.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps_json(merged))
+    tmp_path.replace(list_cache_path)
+    return merged
@@ -0,0 +1,2 @@
+from .store import PaperStore
+from .text_store import TextStore
@@ -0,0 +1,171 @@
+"""
+Content-addressed store of papers shared by all the named lists
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from config import get_config
+from utils.utils import normalize_doi
+
+
+def _write_atomically(path: Path, content: bytes):
+    """Write to a temporary file and move it in place, so readers never see a partial file"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class PaperStore:
+    """A single copy of each PDF and of its extraction, metadata and classification
+    results, whatever the number of lists it belongs to.
+
+    Layout of the store:
+        pdfs/<hash[:2]>/<hash>.pdf      PDF files named after the sha256 of their content
+        records/<hash[:2]>/<hash>.json  Exported papers, see `Paper.export_to_dict`
+        dois.jsonl                      Append only index of normalized DOI -> hash
+        manifests/<named_list>.json     DOIs of each named list
+    """
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        """
+        Args:
+            root (str | Path, optional): Directory of the store. Defaults to the one in the config file.
+        """
+        self.root = Path(root) if root else get_config().get_store_path()
+        self.index_path = self.root / "dois.jsonl"
+        for sub_dir in ["pdfs", "records", "manifests"]:
+            (self.root / sub_dir).mkdir(parents=True, exist_ok=True)
+        self.dois: dict[str, str] = {}
+        self.load_index()
+
+    def load_index(self):
+        """Load the DOI index, the last entry of a DOI wins."""
+        self.dois = {}
+        if self.index_path.is_file():
+            with open(self.index_path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.dois[entry["doi"]] = entry["hash"]
+
+    def _path(self, kind: str, content_hash: str, ext: str) -> Path:
+        return self.root / kind / content_hash[:2] / f"{content_hash}.{ext}"
+
+    def add_pdf(self, pdf: str | Path | bytes, doi: str, move: bool = False) -> str:
+        """
+        Add a PDF to the store, unless the same content is already there.
+
+        Args:
+            pdf (str | Path | bytes): Path to the PDF file or its content.
+            doi (str): DOI of the paper.
+            move (bool, optional): Move the file into the store instead of copying it. Defaults to False.
+
+        Returns (str): The hash of the PDF.
+        """
+        content = pdf if isinstance(pdf, bytes) else None
+        if content is None:
+            sha256 = hashlib.sha256()
+            with open(pdf, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha256.update(chunk)
+            content_hash = sha256.hexdigest()
+        else:
+            content_hash = hashlib.sha256(content).hexdigest()
+
+        path = self._path("pdfs", content_hash, "pdf")
+        if not path.is_file():
+            path.parent.mkdir(exist_ok=True)
+            if content is not None:
+                _write_atomically(path, content)
+            elif move:
+                shutil.move(pdf, path)
+            else:
+                shutil.copyfile(pdf, path)
+        elif move and content is None:
+            Path(pdf).unlink()
+
+        doi = normalize_doi(doi)
+        if self.dois.get(doi) != content_hash:
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps({"doi": doi, "hash": content_hash}) + "\n")
+            self.dois[doi] = content_hash
+        return content_hash
+
+    def resolve(self, doi: str) -> str | None:
+        """Returns (str | None): The hash of the PDF of the DOI, None if it's not in the store."""
+        return self.dois.get(normalize_doi(doi))
+
+    def has_doi(self, doi: str) -> bool:
+        return self.resolve(doi) is not None
+
+    def pdf_path(self, doi: str) -> Path | None:
+        """Returns (Path | None): The path of the PDF of the DOI, None if it's not in the store."""
+        content_hash = self.resolve(doi)
+        return None if content_hash is None else self._path("pdfs", content_hash, "pdf")
+
+    def get_record(self, doi: str) -> dict | None:
+        """Returns (dict | None): The stored results of the DOI, None if there are none."""
+        content_hash = self.resolve(doi)
+        if content_hash is None:
+            return None
+        path = self._path("records", content_hash, "json")
+        if not path.is_file():
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def put_record(self, doi: str, record: dict):
+        """Save the results of a paper whose PDF is in the store."""
+        content_hash = self.resolve(doi)
+        if content_hash is None:
+            raise KeyError(f"{doi} is not in the store.")
+        path = self._path("records", content_hash, "json")
+        path.parent.mkdir(exist_ok=True)
+        _write_atomically(path, json.dumps(record).encode("utf-8"))
+
+    def manifest(self, named_list: str) -> list[str]:
+        """Returns (list[str]): The DOIs of the named list, empty if it has no manifest."""
+        path = self.root / "manifests" / f"{named_list}.json"
+        if not path.is_file():
+            return []
+        with open(path, "r") as f:
+            return json.load(f)["dois"]
+
+    def add_to_manifest(self, named_list: str, *dois: str):
+        """Add DOIs to the manifest of the named list, keeping their order."""
+        manifest = self.manifest(named_list)
+        known = set(manifest)
+        for doi in map(normalize_doi, dois):
+            if doi not in known:
+                manifest.append(doi)
+                known.add(doi)
+        path = self.root / "manifests" / f"{named_list}.json"
+        _write_atomically(path, json.dumps({"dois": manifest}).encode("utf-8"))
+
+    def import_directory(self, named_list: str, path: str | Path | None = None, move: bool = False) -> int:
+        """
+        Import the PDFs of a named list stored the legacy way, i.e. `PAPERS_PATH/<named_list>/`
+        with DOI encoded file names, and its manifest.
+
+        Args:
+            named_list (str): The name of the list.
+            path (str | Path, optional): The directory of the PDFs. Defaults to `PAPERS_PATH/<named_list>/`.
+            move (bool, optional): Move the files instead of copying them. Defaults to False.
+
+        Returns (int): Number of PDFs imported.
+        """
+        from downloader.name_encode_decode import decode
+
+        path = Path(path) if path else get_config().get_papers_path() / named_list
+        dois = []
+        for pdf_path in sorted(path.glob("*.pdf")):
+            doi = decode(pdf_path.name)
+            self.add_pdf(pdf_path, doi, move=move)
+            dois.append(doi)
+        self.add_to_manifest(named_list, *dois)
+        return len(dois)
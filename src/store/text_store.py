@@ -0,0 +1,138 @@
+"""
+Compressed store of the page texts extracted from the PDFs
+"""
+
+import fcntl
+import json
+import mmap
+import zlib
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from config import get_config
+from utils.utils import normalize_doi
+
+
+class StoredPages(Sequence):
+    """The pages of a paper, decompressed from the memory mapped segment only when accessed."""
+
+    def __init__(self, store: "TextStore", spans: list[list[int]]) -> None:
+        self._store = store
+        self._spans = spans
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        if isinstance(i, slice):
+            return [self._store._read(*span) for span in self._spans[i]]
+        return self._store._read(*self._spans[i])
+
+
+class TextStore:
+    """Page texts written once to an append only segment of zlib compressed pages.
+
+    Files of the store:
+        pages.seg        Compressed pages, one after the other
+        pages.idx.jsonl  One line per paper: normalized DOI, (offset, length) of each page
+                         in the segment and the keywords from the PDF metadata
+    """
+
+    def __init__(self, root: str | Path | None = None, level: int = 6) -> None:
+        """
+        Args:
+            root (str | Path, optional): Directory of the store. Defaults to `text/` in the paper store.
+            level (int, optional): zlib compression level. Defaults to 6.
+        """
+        self.root = Path(root) if root else get_config().get_store_path() / "text"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_path = self.root / "pages.seg"
+        self.index_path = self.root / "pages.idx.jsonl"
+        self.segment_path.touch()
+        self.level = level
+        self.index: dict[str, dict] = {}
+        self._mmap = None
+        self.load_index()
+
+    def load_index(self):
+        """Load the index, the last entry of a DOI wins."""
+        self.index = {}
+        if self.index_path.is_file():
+            with open(self.index_path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.index[entry["doi"]] = entry
+
+    def _segment(self) -> mmap.mmap:
+        """The memory mapped segment, mapped again if it grew since"""
+        size = self.segment_path.stat().st_size
+        if self._mmap is None or len(self._mmap) < size:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.segment_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _read(self, offset: int, length: int) -> str:
+        segment = self._segment()
+        with memoryview(segment) as view:
+            return zlib.decompress(view[offset: offset + length]).decode("utf-8")
+
+    def has(self, doi: str) -> bool:
+        return normalize_doi(doi) in self.index
+
+    def add(self, doi: str, pages: Sequence[str], pdf_keywords: str = ""):
+        """
+        Append the pages of a paper to the segment.
+
+        Args:
+            doi (str): DOI of the paper.
+            pages (Sequence[str]): The text of each page.
+            pdf_keywords (str, optional): The keywords found in the PDF metadata. Defaults to "".
+        """
+        blobs = [zlib.compress(page.encode("utf-8"), self.level) for page in pages]
+        doi = normalize_doi(doi)
+
+        with open(self.segment_path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                offset = f.seek(0, 2)
+                spans = []
+                for blob in blobs:
+                    spans.append([offset, len(blob)])
+                    offset += len(blob)
+                f.write(b"".join(blobs))
+                f.flush()
+                entry = {"doi": doi, "pages": spans, "pdf_keywords": pdf_keywords}
+                with open(self.index_path, "a") as index_file:
+                    index_file.write(json.dumps(entry) + "\n")
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        self.index[doi] = entry
+
+    def pages(self, doi: str) -> StoredPages:
+        """Returns (StoredPages): The pages of the paper, read on access."""
+        return StoredPages(self, self.index[normalize_doi(doi)]["pages"])
+
+    def page(self, doi: str, number: int) -> str:
+        """Returns (str): A single page of the paper."""
+        return self._read(*self.index[normalize_doi(doi)]["pages"][number])
+
+    def pdf_keywords(self, doi: str) -> str:
+        return self.index[normalize_doi(doi)]["pdf_keywords"]
+
+    def iter_pages(self) -> Iterator[tuple[str, int, str]]:
+        """
+        Stream the whole corpus, decompressing one page at a time.
+
+        Yields (tuple[str, int, str]): The DOI, the page number and the text of the page.
+        """
+        for doi, entry in self.index.items():
+            for number, span in enumerate(entry["pages"]):
+                yield doi, number, self._read(*span)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from classifiers import acm
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+
+
+def test_parse_classification():
+    html = (RESOURCES_PATH / "10_1145-2680821_2680824.html").read_text()
+
+    classification = acm.parse_classification(html, parser="html.parser")
+
+    assert classification == [
+        "performance and fairness issues in big data transfers",
+        "networks",
+        "network performance evaluation",
+        "network protocols",
+    ]
+
+
+def test_parse_classification_without_chart():
+    html = "<html><body><ol class='rlist'><li><p>Networks</p></li></ol></body></html>"
+
+    assert acm.parse_classification(html, parser="html.parser") == []
+
+
+def test_parse_landing_page():
+    html = (RESOURCES_PATH / "10_1145-2680821_2680824.html").read_text()
+
+    data = acm.parse_landing_page(html, parser="html.parser")
+
+    assert data["classification"] == acm.parse_classification(html, parser="html.parser")
+    assert data["title"] == "Performance and Fairness Issues in Big Data Transfers"
+    assert data["author"] == ["Se-young Yu", "Nevil Brownlee", "Aniket Mahanti"]
+    assert data["doi"] == "10.1145/2680821.2680824"
+    assert (data["year"], data["month"]) == ("2014", "12")
+    assert data["abstract"].startswith("We present performance and fairness analysis")
+    assert data["keywords"] == ["big data transfer protocols", "fairness", "performance"]
+    assert data["pdf_url"] == "https://dl.acm.org/doi/pdf/10.1145/2680821.2680824"
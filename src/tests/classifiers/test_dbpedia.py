@@ -0,0 +1,66 @@
+import json
+import re
+import responses
+
+from urllib.parse import parse_qs
+
+from classifiers import dbpedia
+
+STUB_URL = "http://localhost:2222/rest/annotate"
+SURFACE_FORMS = ["fairness", "machine learning", "data transfer"]
+
+
+def spotlight_stub(request):
+    """Spots the `SURFACE_FORMS` in the posted text as Spotlight would do."""
+    text = parse_qs(request.body)["text"][0]
+    resources = [
+        {
+            "@URI": f"http://dbpedia.org/resource/{form}",
+            "@surfaceForm": form,
+            "@offset": str(match.start()),
+        }
+        for form in SURFACE_FORMS
+        for match in re.finditer(form, text)
+    ]
+    body = {"@text": text}
+    if resources:
+        body["Resources"] = resources
+    return (200, {}, json.dumps(body))
+
+
+def test_batched_classification_maps_offsets_back():
+    texts = [
+        "fairness in machine learning",
+        "nothing to see here",
+        "big data transfer and fairness",
+    ]
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add_callback(responses.POST, STUB_URL, callback=spotlight_stub)
+        results = dbpedia.get_classification_from_texts(texts, api_url=STUB_URL)
+        assert len(mocked_requests.calls) == 1
+
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        for resource in result["Resources"]:
+            offset = int(resource["@offset"])
+            assert text[offset:offset + len(resource["@surfaceForm"])] == resource["@surfaceForm"]
+    assert {r["@surfaceForm"] for r in results[0]["Resources"]} == {"fairness", "machine learning"}
+    assert results[1]["Resources"] == []
+    assert {r["@surfaceForm"] for r in results[2]["Resources"]} == {"data transfer", "fairness"}
+
+
+def test_batched_classification_splits_failed_batch():
+    texts = ["fairness", "machine learning"]
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(responses.POST, STUB_URL, status=500)
+        mocked_requests.add_callback(responses.POST, STUB_URL, callback=spotlight_stub)
+        results = dbpedia.get_classification_from_texts(texts, api_url=STUB_URL)
+        assert len(mocked_requests.calls) == 3
+
+    assert [r["Resources"][0]["@surfaceForm"] for r in results] == texts
+
+
+def test_batches_respect_size_budget():
+    texts = ["a" * 10, "b" * 10, "c" * 10]
+    batches = dbpedia._make_batches(texts, max_chars=2 * (10 + len(dbpedia.SEPARATOR)))
+    assert batches == [[0, 1], [2]]
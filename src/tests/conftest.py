@@ -0,0 +1,21 @@
+import pytest
+
+from config import get_config
+from utils import ratelimiter
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(tmp_path):
+    """Rate limits as configured, but with a state that is not shared with other runs"""
+    limiter = ratelimiter.get_limiter()
+    ratelimiter.set_limiter(
+        ratelimiter.RateLimiter(tmp_path / "ratelimit.json", limiter.limits, limiter.default_limits)
+    )
+    yield
+    ratelimiter.set_limiter(None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_ledger(tmp_path, monkeypatch):
+    """Failure ledgers in the temporary directory of the test"""
+    monkeypatch.setattr(get_config(), "get_ledger_path", lambda: tmp_path / "ledger")
@@ -0,0 +1,95 @@
+from reader import bibtex
+from reader.metadata import Metadata
+
+CROSSREF_RESPONSE = (
+    " @inproceedings{Yu_2014, title={Performance and Fairness Issues in {Big Data} Transfers}, "
+    "url={http://dx.doi.org/10.1145/2680821.2680824}, DOI={10.1145/2680821.2680824}, "
+    "booktitle={Proceedings of the 2014 CoNEXT on Student Workshop}, publisher={ACM}, "
+    "author={Yu, Se-young and Brownlee, Nevil and Mahanti, Aniket}, year={2014}, month=dec, pages={9--11} }\n"
+)
+
+
+def test_metadata_to_dict():
+    metadata = Metadata()._to_dict(CROSSREF_RESPONSE)
+
+    assert metadata["title"] == "Performance and Fairness Issues in Big Data Transfers"
+    assert metadata["doi"] == "10.1145/2680821.2680824"
+    assert metadata["author"] == ["Yu, Se-young", "Brownlee, Nevil", "Mahanti, Aniket"]
+    assert metadata["journal"] == "Proceedings of the 2014 CoNEXT on Student Workshop"
+    assert (metadata["year"], metadata["month"], metadata["pages"]) == ("2014", "dec", "9--11")
+    assert metadata["keywords"] == []
+
+
+def test_metadata_to_dict_not_bibtex():
+    metadata = Metadata()._to_dict("<html>Not found</html>")
+
+    assert metadata["title"] == ""
+    assert metadata["author"] == []
+
+
+def test_parse_entries():
+    text = (
+        '@string{acm = "Association for Computing Machinery"}\n'
+        "@comment{exported by the library}\n"
+        "@article{alexander2020,\n"
+        '  author = "Alexander Smith and {Barnes and Noble}",\n'
+        '  publisher = acm # ", New York",\n'
+        "  keywords = {Fairness; Machine Learning},\n"
+        "  year = 2020\n"
+        "}\n"
+    )
+
+    entries = bibtex.parse(text)
+
+    assert len(entries) == 1
+    assert entries[0]["ENTRYTYPE"] == "article"
+    assert entries[0]["ID"] == "alexander2020"
+    metadata = bibtex.to_metadata(entries[0])
+    assert metadata["author"] == ["Alexander Smith", "Barnes and Noble"]
+    assert metadata["publisher"] == "Association for Computing Machinery, New York"
+    assert metadata["keywords"] == ["fairness", "machine learning"]
+    assert metadata["year"] == "2020"
+
+
+def test_index_file(tmp_path):
+    bib_path = tmp_path / "venue.bib"
+    bib_path.write_text(
+        "@inproceedings{a, title={First}, doi={10.1145/1.1}}\n"
+        "@inproceedings{b,\n  title={Second},\n  doi={https://doi.org/10.1145/2.2}\n}\n"
+        "@inproceedings{c, title={Third}}\n"
+    )
+
+    assert set(bibtex.index_file(bib_path)) == {"10.1145/1.1", "10.1145/2.2"}
+    index = bibtex.index_file(bib_path, dois=["10.1145/2.2"])
+    assert list(index) == ["10.1145/2.2"]
+    assert index["10.1145/2.2"]["title"] == "Second"
+
+
+def test_index_file_skips_invalid_entries(tmp_path, capsys):
+    bib_path = tmp_path / "venue.bib"
+    bib_path.write_text(
+        "@inproceedings{a, title={First}, doi={10.1145/1.1},\n"
+        "  abstract={We mention\n"
+        "  @twitter handles in a value}\n"
+        "}\n"
+        "@inproceedings{bad, title == {Broken}, doi={10.1145/2.2}}\n"
+        "@inproceedings{c, title={Third}, doi={10.1145/3.3}}\n"
+    )
+
+    index = bibtex.index_file(bib_path)
+
+    assert set(index) == {"10.1145/1.1", "10.1145/3.3"}
+    assert "@twitter handles" in index["10.1145/1.1"]["abstract"]
+    assert "Skipped invalid entry" in capsys.readouterr().out
+
+
+def test_unclosed_brace_only_loses_its_entry(tmp_path, capsys):
+    bib_path = tmp_path / "venue.bib"
+    bib_path.write_text(
+        "@inproceedings{a, title={First,\n  doi={10.1145/1.1}\n"
+        "@inproceedings{b, title={Second}, doi={10.1145/2.2}}\n"
+        "@article{c,\n  title={Third},\n  doi={10.1145/3.3}\n}\n"
+    )
+
+    assert set(bibtex.index_file(bib_path)) == {"10.1145/2.2", "10.1145/3.3"}
+    assert capsys.readouterr().out.count("Skipped invalid entry") == 1
@@ -0,0 +1,64 @@
+import json
+import responses
+
+from reader.metadata import Metadata
+from reader.oag import OAGIndex
+
+RECORDS = [
+    {
+        "id": "1",
+        "title": "Performance and Fairness Issues in Big Data Transfers",
+        "authors": [{"id": "a1", "name": "Se-young Yu", "org": ""}, {"id": "a2", "name": "Nevil Brownlee"}],
+        "venue": {"id": "v1", "raw": "CoNEXT Student Workshop"},
+        "year": 2014,
+        "keywords": ["Fairness", "Performance"],
+        "page_start": "9",
+        "page_end": "11",
+        "doi": "10.1145/2680821.2680824",
+        "abstract": "We present performance and fairness analysis.",
+    },
+    {"id": "2", "title": "Without DOI", "year": 2015},
+    {"id": "3", "title": "Another paper", "doi": "https://doi.org/10.1145/3359061.3361084"},
+]
+
+
+def write_dump(path):
+    with open(path, "w") as f:
+        for record in RECORDS:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_oag_index_lookup(tmp_path):
+    dump_path = tmp_path / "oag.jsonl"
+    write_dump(dump_path)
+
+    index = OAGIndex(dump_path)
+
+    assert len(index) == 2
+    assert (tmp_path / "oag.jsonl.idx.npy").is_file()
+    assert index.get_record("10.1145/3359061.3361084")["id"] == "3"
+    assert index.get_metadata_from_doi("10.1145/0000000.0000000") is None
+
+    metadata = index.get_metadata_from_doi("10.1145/2680821.2680824")
+    assert metadata["author"] == ["Se-young Yu", "Nevil Brownlee"]
+    assert metadata["journal"] == "CoNEXT Student Workshop"
+    assert (metadata["year"], metadata["pages"]) == ("2014", "9--11")
+    assert metadata["keywords"] == ["fairness", "performance"]
+    assert metadata["abstract"] == "We present performance and fairness analysis."
+    index.close()
+
+
+def test_metadata_backend_falls_back_to_api(tmp_path):
+    dump_path = tmp_path / "oag.jsonl"
+    write_dump(dump_path)
+    source = Metadata(backend=OAGIndex(dump_path))
+
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(
+            method="GET",
+            url="http://dx.doi.org/10.1145/0000000.0000001",
+            body="@article{x, title={From the API}, DOI={10.1145/0000000.0000001}}",
+        )
+        assert source.get_metadata_from_doi("10.1145/2680821.2680824")["year"] == "2014"
+        assert source.get_metadata_from_doi("10.1145/0000000.0000001")["title"] == "From the API"
+        assert len(mocked_requests.calls) == 1
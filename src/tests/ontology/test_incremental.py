@@ -0,0 +1,108 @@
+import random
+
+from ontology.incremental import RELATIONS, KlinkState, write_delta
+
+random.seed(1)
+KEYWORDS = [f"keyword {i}" for i in range(30)]
+ROWS = {
+    f"10.1/{i}": {
+        "DE": ";".join(random.sample(KEYWORDS, 4)),
+        "TI": f"title {i}",
+        "AU": ";".join(random.sample(["ann", "bob", "eve", "joe"], 2)),
+        "SO": random.choice(["venue a", "venue b"]),
+        "SC": random.choice(["networks", "security"]),
+        "PY": random.choice(["2020", "2021"]),
+    }
+    for i in range(50)
+}
+
+
+def tables(state: KlinkState) -> dict:
+    """The co-occurrence tables by keyword name, independent of the order of the indexes."""
+    return {
+        (relation, state.keywords[keyword]): sorted((state.keywords[partner], value) for partner, value in table)
+        for relation in RELATIONS
+        for keyword, table in state.tables(relation).items()
+        if table
+    }
+
+
+def top_values(state: KlinkState) -> dict:
+    return {
+        (relation, state.keywords[keyword]): [value for _, value in table]
+        for relation in RELATIONS
+        for keyword, table in state.tables(relation).items()
+        if table
+    }
+
+
+def test_updates_match_a_full_rebuild():
+    keys = list(ROWS)
+    state = KlinkState(m=1000)
+    state.update({key: ROWS[key] for key in keys[:30]})
+    state.update({key: ROWS[key] for key in keys[30:]}, removed=keys[:10])
+    changed = {**ROWS[keys[20]], "DE": "keyword 0;keyword 1"}
+    delta = state.update({keys[20]: changed})
+
+    rebuilt = KlinkState(m=1000)
+    rebuilt.update({**{key: ROWS[key] for key in keys[10:]}, keys[20]: changed})
+    assert tables(state) == tables(rebuilt)
+    assert delta["links"] and all(op in (1, -1) for _, op, _, _ in delta["links"])
+    assert len(delta["cooccurrence"]) < sum(len(state.tables(relation)) for relation in RELATIONS)
+
+
+def test_truncated_tables_keep_the_highest_values(tmp_path):
+    keys = list(ROWS)
+    state = KlinkState(m=3)
+    state.update({key: ROWS[key] for key in keys[:25]})
+    state.save(tmp_path)
+    state = KlinkState.load(tmp_path)
+    state.update({key: ROWS[key] for key in keys[25:]}, removed=keys[:5])
+
+    state.save(tmp_path)
+
+    rebuilt = KlinkState(m=3)
+    rebuilt.update({key: ROWS[key] for key in keys[5:]})
+    assert top_values(KlinkState.load(tmp_path)) == top_values(rebuilt)
+
+
+def test_delta_files(tmp_path):
+    state = KlinkState()
+    delta = state.update({"10.1/a": {"DE": "x;y", "TI": "a\ttitle", "AU": "ann", "SO": "v", "SC": "s", "PY": 2020}})
+    write_delta(delta, tmp_path)
+
+    assert (tmp_path / "keywords.tsv").read_text() == "index\tkeyword\n0\tx\n1\ty\n"
+    assert "publication\t0\ta title\t2020" in (tmp_path / "entities.tsv").read_text()
+    lines = (tmp_path / "cooccurrence.tsv").read_text().splitlines()
+    assert lines[0] == "relation\tkeyword\trank\tpartner\tvalue"
+    assert "author\t0\t1\t1\t1" in lines
+
+
+def test_emptied_tables_stay_empty_after_saving(tmp_path):
+    row = {"DE": "a;b", "TI": "t", "AU": "ann", "SO": "v", "SC": "s", "PY": "2020"}
+    state = KlinkState()
+    state.update({"p1": row})
+    state.save(tmp_path)
+    state = KlinkState.load(tmp_path)
+    state.update({}, removed=["p1"])
+    state.save(tmp_path)
+
+    assert tables(KlinkState.load(tmp_path)) == {}
+
+
+def test_saving_between_updates_matches_a_full_rebuild(tmp_path):
+    keys = list(ROWS)
+    state = KlinkState(m=5)
+    present = set()
+    rng = random.Random(2)
+    for step in range(8):
+        removed = rng.sample(sorted(present), min(len(present), 6))
+        added = rng.sample([key for key in keys if key not in present or key in removed], 8)
+        state.update({key: ROWS[key] for key in added}, removed=[key for key in removed if key not in added])
+        present = (present - set(removed)) | set(added)
+        state.save(tmp_path)
+        state = KlinkState.load(tmp_path)
+
+    rebuilt = KlinkState(m=5)
+    rebuilt.update({key: ROWS[key] for key in present})
+    assert top_values(state) == top_values(rebuilt)
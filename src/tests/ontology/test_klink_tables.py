@@ -0,0 +1,55 @@
+import pandas as pd
+
+from ontology.klink_tables import build_klink_tables, read_klink_tables, write_klink_tables
+
+ROWS = pd.DataFrame(
+    [
+        {"DE": "Fairness; networks", "TI": "a", "AU": "ann;bob", "SO": "Venue", "SC": "Networks", "PY": "2020"},
+        {"DE": "networks;tcp;networks", "TI": "b", "AU": "bob", "SO": "venue", "SC": "networks;protocols", "PY": 2021},
+        {"DE": "", "TI": "c", "AU": "eve", "SO": "venue", "SC": "security", "PY": "2021"},
+        {"DE": "tcp", "TI": "b", "AU": "eve;eve", "SO": "venue", "SC": "networks", "PY": "2021"},
+    ]
+)
+
+
+def grouped(tables: dict, relation: str) -> dict[str, list[str]]:
+    entities = tables[f"{relation}_entities"]
+    groups: dict[str, list[str]] = {}
+    for keyword, entity in zip(tables[f"{relation}_keyword"], tables[f"{relation}_entity"]):
+        groups.setdefault(tables["keywords"][keyword], []).append(entities[entity])
+    return groups
+
+
+def test_tables_group_the_entities_by_keyword():
+    tables = build_klink_tables(ROWS)
+
+    # the papers are processed from the last one, as klink2/input.R:read_dataset does
+    assert tables["keywords"] == ["tcp", "networks", "fairness"]
+    assert grouped(tables, "author") == {
+        "tcp": ["bob_2021", "eve_2021"],
+        "networks": ["ann_2020", "bob_2020", "bob_2021"],
+        "fairness": ["ann_2020", "bob_2020"],
+    }
+    assert grouped(tables, "publication")["tcp"] == ["b_2021", "b_2021"]
+    assert grouped(tables, "venue")["networks"] == ["venue_2020", "venue_2021"]
+    assert grouped(tables, "area")["tcp"] == ["networks_2021", "protocols_2021"]
+
+    networks = tables["df_keyword"] == 1
+    names = [tables["df_names"][i] for i in tables["df_entity"][networks]]
+    assert names == ["b", "bob", "venue", "networks", "protocols", "a", "ann", "bob", "venue", "networks"]
+    assert tables["df_relation"][networks].tolist() == [1, 2, 3, 4, 4, 1, 2, 2, 3, 4]
+    assert tables["df_year"][networks].tolist() == [2021.0] * 5 + [2020.0] * 5
+
+    tcp = tables["df_keyword"] == 0
+    assert [tables["df_names"][i] for i in tables["df_entity"][tcp]][:3] == ["b", "eve", "eve"]
+
+
+def test_tables_file_round_trip(tmp_path):
+    tables = build_klink_tables(ROWS)
+    write_klink_tables(tables, tmp_path / "test.klink")
+
+    loaded = read_klink_tables(tmp_path / "test.klink")
+
+    assert list(loaded) == list(tables)
+    for name, values in tables.items():
+        assert list(loaded[name]) == list(values)
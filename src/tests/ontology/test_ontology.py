@@ -0,0 +1,41 @@
+from config import get_config
+from ontology import export_ontology
+
+TRIPLES = [
+    "machine learning;artificial intelligence;klink:broaderGeneric",
+    "neural networks;deep learning;klink:relatedEquivalent",
+    "gpu (hardware);deep learning;klink:contributesTo",
+]
+
+
+def export(tmp_path, lines: list[str], **kwargs) -> dict:
+    (tmp_path / "klink2" / "test").mkdir(parents=True, exist_ok=True)
+    (tmp_path / "klink2" / "test" / "test_triples.csv").write_text("\n".join(["kw1;kw2;predicate", *lines]) + "\n")
+    return export_ontology("test", **kwargs)
+
+
+def test_reexport_only_writes_the_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_config(), "get_data_path", lambda: tmp_path)
+    ontology_path = tmp_path / "ontology"
+
+    assert export(tmp_path, TRIPLES) == {"sequence": 1, "added": 3, "removed": 0}
+    ontology = (ontology_path / "test.ttl").read_text()
+    assert "rdfs:domain :gpu__hardware_ ;" in ontology and ":RE1 " not in ontology
+    (ontology_path / "test.ttl").unlink()
+
+    assert export(tmp_path, TRIPLES[::-1]) == {"sequence": 2, "added": 0, "removed": 0}
+    assert not (ontology_path / "test.ttl").exists()
+
+    assert export(tmp_path, [*TRIPLES[1:], "cnn;deep learning;klink:broaderGeneric"], full=True) == {
+        "sequence": 3,
+        "added": 1,
+        "removed": 1,
+    }
+    # the deltas of the previous exports are kept for the stores that didn't apply them yet
+    assert "rdfs:domain :machine_learning ." in (ontology_path / "test.delta-000001.added.ttl").read_text()
+    added = (ontology_path / "test.delta-000003.added.ttl").read_text()
+    removed = (ontology_path / "test.delta-000003.removed.ttl").read_text()
+    assert "rdfs:domain :cnn ." in added and "rdfs:domain :machine_learning ." in removed
+    assert sum(line.startswith(":RE_") for line in removed.splitlines()) == 4
+    relation = added.splitlines()[-1].split()[0]
+    assert (ontology_path / "test.ttl").read_text().count(relation) == 1
@@ -0,0 +1,62 @@
+import itertools
+import random
+
+from ontology.tuning import cooccurrence_statistics, suggest_params, write_param_file
+
+random.seed(0)
+KEYWORDS = [f"keyword {i}" for i in range(40)]
+ROWS = [
+    {
+        "DE": ";".join(random.sample(KEYWORDS, 4)),
+        "TI": f"title {i}",
+        "AU": ";".join(random.sample(["ann", "bob", "eve", "joe"], 2)),
+        "SO": random.choice(["venue a", "venue b"]),
+        "SC": "networks",
+        "PY": random.choice(["2020", "2021"]),
+    }
+    for i in range(60)
+]
+
+
+def brute_force_author_cooccurrence() -> dict:
+    entities = {}
+    for row in ROWS:
+        for author in row["AU"].split(";"):
+            entities.setdefault(f"{author}_{row['PY']}", set()).update(row["DE"].split(";"))
+    counts = {}
+    for keywords in entities.values():
+        for pair in itertools.combinations(sorted(keywords), 2):
+            counts[pair] = counts.get(pair, 0) + 1
+    return counts
+
+
+def test_full_sample_counts_the_distinct_shared_entities():
+    statistics = cooccurrence_statistics(ROWS)
+    author = statistics["relations"]["author"]
+
+    assert statistics["papers"] == 60
+    assert author["rate"] == 1
+    expected = brute_force_author_cooccurrence()
+    assert sorted(author["sample"]["cooccurrence"].tolist()) == sorted(expected.values())
+    assert max(expected.values()) == author["top"][0][2]
+
+
+def test_sampling_bounds_the_pairs_counted():
+    full = cooccurrence_statistics(ROWS)["relations"]["area"]
+    sampled = cooccurrence_statistics(ROWS, max_pairs=100)["relations"]["area"]
+
+    assert sampled["rate"] < 1
+    assert 0 < len(sampled["sample"]["cooccurrence"]) < len(full["sample"]["cooccurrence"])
+
+
+def test_suggested_params_are_written_as_r(tmp_path):
+    statistics = cooccurrence_statistics(ROWS)
+    params = suggest_params(statistics)
+
+    assert all(ambig == 2 * threshold for threshold, ambig in zip(params["relkeyT"], params["relkeyAmbig"]))
+    assert all(0 < value < 1 for value in params["tR"] + [params["tS"]])
+
+    write_param_file(params, tmp_path / "test_param.R", statistics)
+    lines = (tmp_path / "test_param.R").read_text().splitlines()
+    assert f"relkeyT <- c({', '.join(map(str, params['relkeyT']))})" in lines
+    assert f"tS <- {params['tS']}" in lines
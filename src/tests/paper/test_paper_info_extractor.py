@@ -1,4 +1,5 @@
 import pytest
+import responses
 from pathlib import Path
 
 from downloader import name_encode_decode
@@ -29,6 +30,25 @@ def test_paper_loader():
     assert abstract in paper.abstract
 
 
+def test_harvest_acm():
+    file_name = "10_1145-2680821_2680824.pdf"
+    doi = name_encode_decode.decode(file_name)
+    html = (RESOURCES_PATH / "10_1145-2680821_2680824.html").read_text()
+
+    paper = Paper(files_path=RESOURCES_PATH, file_name=file_name, filename_has_doi=True)
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(method="GET", url=f"https://dl.acm.org/doi/{doi}", body=html)
+        paper.harvest_acm()
+        assert len(mocked_requests.calls) == 1
+
+    assert paper.title == "Performance and Fairness Issues in Big Data Transfers"
+    assert paper.author == ["Se-young Yu", "Nevil Brownlee", "Aniket Mahanti"]
+    assert paper.keywords == ["big data transfer protocols", "fairness", "performance"]
+    assert paper.abstract.startswith("We present performance and fairness analysis")
+    assert paper.topics["acm"] == ["networks", "network performance evaluation", "network protocols"]
+    assert paper.pdf_url == f"https://dl.acm.org/doi/pdf/{doi}"
+
+
 @pytest.fixture(params=range(8))
 def scrambled_keywords(request):
     testing_text = {
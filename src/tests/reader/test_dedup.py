@@ -0,0 +1,49 @@
+import random
+
+from reader import Paper, Reader
+from reader.dedup import find_duplicates, minhash_signatures, similarity
+
+random.seed(0)
+WORDS = [f"word{i}" for i in range(5000)]
+TEXTS = [" ".join(random.choices(WORDS, k=400)) for _ in range(200)]
+
+
+def near_copy(text: str, changes: int) -> str:
+    words = text.split()
+    for i in random.sample(range(len(words)), changes):
+        words[i] = "changed"
+    return " ".join(words)
+
+
+def test_signatures_estimate_similarity():
+    signatures = minhash_signatures([TEXTS[0], near_copy(TEXTS[0], 4), TEXTS[1], ""])
+
+    assert similarity(signatures[0], signatures[1]) > 0.8
+    assert similarity(signatures[0], signatures[2]) < 0.1
+    assert similarity(signatures[3], signatures[3]) == 0
+
+
+def test_near_duplicates_are_clustered():
+    texts = TEXTS + [near_copy(TEXTS[3], 4), TEXTS[7], near_copy(TEXTS[3], 6), "", ""]
+
+    clusters = find_duplicates(texts, threshold=0.7)
+
+    assert sorted(clusters) == [[3, 200, 202], [7, 201]]
+
+
+def test_reader_flags_and_collapses_duplicates():
+    reader = Reader("test")
+    for i, text in enumerate([TEXTS[0], TEXTS[1], near_copy(TEXTS[0], 2)]):
+        paper = Paper("", f"10_1000-{i}.pdf")
+        paper.text = text
+        reader.paper_list.append(paper)
+    reader.paper_list[2].title = "Published version"
+
+    clusters = reader.find_duplicates(threshold=0.7)
+
+    assert [[paper.doi for paper in cluster] for cluster in clusters] == [["10.1000/2", "10.1000/0"]]
+    assert reader.paper_list[0].duplicate_of == "10.1000/2"
+    assert [row["duplicate_of"] for row in reader.metadata_collection()] == ["10.1000/2", "", ""]
+
+    reader.find_duplicates(threshold=0.7, collapse=True)
+    assert [paper.doi for paper in reader.paper_list] == ["10.1000/1", "10.1000/2"]
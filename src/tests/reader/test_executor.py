@@ -0,0 +1,84 @@
+import shutil
+from pathlib import Path
+
+from reader import ExtractionExecutor, Paper, Reader
+from store import TextStore
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+FILE_NAMES = ["10_1145-2680821_2680824.pdf", "10_1145-3359061_3361084.pdf"]
+
+
+def make_papers(path: Path) -> list[Paper]:
+    return [Paper(path, name, pattern_to_replace={"_": ".", "-": "/"}) for name in FILE_NAMES]
+
+
+def test_executor_loads_as_in_process():
+    executor = ExtractionExecutor(timeout=60, memory_limit=0, workers=2, max_tasks_per_worker=1)
+
+    loaded = list(executor.load(make_papers(RESOURCES_PATH)))
+
+    expected = make_papers(RESOURCES_PATH)
+    for paper in expected:
+        paper.load()
+    assert [paper.doi for paper in loaded] == [paper.doi for paper in expected]
+    for paper, expected_paper in zip(loaded, expected):
+        assert paper._raw_text == expected_paper._raw_text
+        assert paper.abstract == expected_paper.abstract
+        assert paper.keywords == expected_paper.keywords
+        assert paper.text == expected_paper.text
+    assert executor.quarantine == []
+
+
+def test_offenders_are_quarantined(tmp_path):
+    shutil.copy(RESOURCES_PATH / FILE_NAMES[0], tmp_path)
+    (tmp_path / FILE_NAMES[1]).write_bytes(b"%PDF-1.4 not really a pdf")
+    executor = ExtractionExecutor(timeout=60, memory_limit=0, workers=1)
+
+    loaded = list(executor.load(make_papers(tmp_path)))
+
+    assert [paper.doi for paper in loaded] == ["10.1145/2680821.2680824"]
+    assert [(paper["doi"], paper["reason"]) for paper in executor.quarantine] == [
+        ("10.1145/3359061.3361084", "error")
+    ]
+
+
+def test_timeout_kills_the_worker_and_continues():
+    executor = ExtractionExecutor(timeout=0.001, memory_limit=0, workers=1)
+
+    assert list(executor.load(make_papers(RESOURCES_PATH))) == []
+    assert [paper["reason"] for paper in executor.quarantine] == ["timeout", "timeout"]
+
+
+def test_reader_reports_the_quarantine(tmp_path):
+    (tmp_path / "papers" / "test").mkdir(parents=True)
+    (tmp_path / "cache").mkdir()
+    shutil.copy(RESOURCES_PATH / FILE_NAMES[0], tmp_path / "papers" / "test")
+    (tmp_path / "papers" / "test" / FILE_NAMES[1]).write_bytes(b"")
+    reader = Reader("test")
+    reader.files_path = tmp_path / "papers"
+    reader.cache_path = tmp_path / "cache"
+
+    reader.load(executor=ExtractionExecutor(timeout=60, memory_limit=0, workers=2))
+
+    assert [paper.doi for paper in reader.paper_list] == ["10.1145/2680821.2680824"]
+    assert (tmp_path / "cache" / "test.quarantine.json").is_file()
+
+
+def test_papers_of_the_text_store_are_extracted_by_the_workers(tmp_path):
+    text_store = TextStore(tmp_path / "text")
+    for paper in make_papers(RESOURCES_PATH):
+        paper.load(text_store)
+
+    executor = ExtractionExecutor(timeout=60, memory_limit=0, workers=2)
+    loaded = list(executor.load(make_papers(RESOURCES_PATH), text_store))
+
+    expected = make_papers(RESOURCES_PATH)
+    for paper in expected:
+        paper.load()
+    for paper, expected_paper in zip(loaded, expected):
+        assert list(paper._raw_text) == expected_paper._raw_text
+        assert (paper.abstract, paper.keywords) == (expected_paper.abstract, expected_paper.keywords)
+
+    executor = ExtractionExecutor(timeout=0.001, memory_limit=0, workers=1)
+    assert list(executor.load(make_papers(RESOURCES_PATH), text_store)) == []
+    assert [paper["reason"] for paper in executor.quarantine] == ["timeout", "timeout"]
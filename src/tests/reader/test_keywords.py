@@ -0,0 +1,72 @@
+from reader import Paper
+from reader.keywords import TOKEN_PATTERN, extract_keyphrases
+from reader.reader import Reader
+
+ABSTRACTS = [
+    "We study congestion control for big data transfers. Congestion control affects fairness.",
+    "A survey of congestion control algorithms in data center networks.",
+    "Graph neural networks for the classification of scientific papers.",
+    "",
+    "Scientific papers are classified with graph neural networks and topic models.",
+]
+
+
+def test_keyphrases_are_ranked_per_text():
+    keyphrases = extract_keyphrases(ABSTRACTS, top_k=2, min_df=2, max_df=0.5)
+
+    assert keyphrases[0][0] == "congestion control"
+    assert keyphrases[2][0] == "graph neural networks"
+    assert keyphrases[3] == []
+    assert all(len(phrases) <= 2 for phrases in keyphrases)
+
+
+def test_stopwords_and_numbers_split_phrases():
+    keyphrases = extract_keyphrases(["the 2030 networks of the future", "networks"], top_k=5, min_df=1, max_df=1)
+
+    assert "networks" in keyphrases[0]
+    assert not any("the" in phrase.split() or "2030" in phrase for phrase in keyphrases[0])
+
+
+def test_reader_fills_only_missing_keywords():
+    reader = Reader("test")
+    for i, abstract in enumerate(ABSTRACTS):
+        paper = Paper("", f"paper-{i}.pdf", filename_has_doi=False)
+        paper.abstract = abstract
+        reader.paper_list.append(paper)
+    reader.paper_list[1].keywords = ["congestion"]
+    reader.paper_list[1].keywords_source = "metadata"
+
+    assert reader.extract_missing_keywords(top_k=3) == 3
+
+    assert reader.paper_list[0].keywords_source == "tfidf"
+    assert "congestion control" in reader.paper_list[0].keywords
+    assert reader.paper_list[1].keywords == ["congestion"]
+    assert reader.paper_list[3].keywords == []
+    assert reader.metadata_collection()[0]["keywords_source"] == "tfidf"
+
+
+def test_words_with_accents_are_not_split():
+    assert TOKEN_PATTERN.findall("réseaux élève straße 5g-net, 2020 x") == [
+        "réseaux", "élève", "straße", "5g-net", ",", "2020", "x"
+    ]
+
+    keyphrases = extract_keyphrases(["Überwachung of networks", "überwachung"], top_k=5, min_df=1, max_df=1)
+    assert "überwachung" in keyphrases[0]
+    assert not any(len(phrase) < 3 for phrase in keyphrases[0])
+
+
+def test_words_starting_with_digits_are_kept_whole():
+    texts = ["5g networks and 3d printing in 2020", "5g networks", "3d printing"]
+    keyphrases = extract_keyphrases(texts, top_k=5, min_df=1, max_df=1)
+
+    assert "5g networks" in keyphrases[0] and "3d printing" in keyphrases[0]
+    assert not any(phrase.startswith(("g ", "d ")) or "2020" in phrase for phrase in keyphrases[0])
+
+
+def test_nul_characters_do_not_shift_the_texts():
+    texts = ["congestion\x00 control", *ABSTRACTS]
+
+    keyphrases = extract_keyphrases(texts, top_k=2, min_df=2, max_df=0.5)
+
+    assert keyphrases[1:] == extract_keyphrases(["congestion control", *ABSTRACTS], top_k=2, min_df=2, max_df=0.5)[1:]
+    assert len(keyphrases) == len(texts)
@@ -0,0 +1,63 @@
+import responses
+from pathlib import Path
+
+from config import get_config
+from reader import Reader
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+DOIS = ["10.1145/2680821.2680824", "10.1145/3359061.3361084"]
+
+
+def make_reader(tmp_path, monkeypatch) -> Reader:
+    (tmp_path / "data" / "lists").mkdir(parents=True)
+    (tmp_path / "data" / "lists" / "test.txt").write_text("\n".join(DOIS) + "\n")
+    (tmp_path / "cache").mkdir()
+    monkeypatch.setattr(get_config(), "get_data_path", lambda: tmp_path)
+    reader = Reader("test")
+    reader.files_path = tmp_path / "papers"
+    reader.cache_path = tmp_path / "cache"
+    return reader
+
+
+def test_pdfs_are_only_fetched_for_missing_fields(tmp_path, monkeypatch):
+    reader = make_reader(tmp_path, monkeypatch)
+    html = (RESOURCES_PATH / "10_1145-2680821_2680824.html").read_text()
+    pdf = (RESOURCES_PATH / "10_1145-3359061_3361084.pdf").read_bytes()
+
+    with responses.RequestsMock() as mocked_requests:
+        for doi in DOIS:
+            mocked_requests.add(
+                responses.GET, f"http://dx.doi.org/{doi}", body=f"@article{{x, title={{T}}, DOI={{{doi}}}}}"
+            )
+        mocked_requests.add(responses.GET, f"https://dl.acm.org/doi/{DOIS[0]}", body=html)
+        mocked_requests.add(responses.GET, f"https://dl.acm.org/doi/{DOIS[1]}", status=404)
+        mocked_requests.add(responses.GET, f"https://dl.acm.org/doi/pdf/{DOIS[1]}", body=pdf)
+        counts = reader.load_from_list()
+
+    assert counts == {"cache": 0, "metadata": 0, "acm": 1, "pdf": 1, "downloaded": 1, "incomplete": 0}
+    first, second = reader.paper_list
+    assert not first.has_pdf() and first.keywords and first.abstract
+    assert second.has_pdf() and second.keywords and second.text
+
+    reader.dump()
+    reader = Reader("test")
+    reader.files_path = tmp_path / "papers"
+    reader.cache_path = tmp_path / "cache"
+    with responses.RequestsMock():
+        counts = reader.load_from_list()
+    assert counts["cache"] == 2
+
+
+def test_metadata_only(tmp_path, monkeypatch):
+    reader = make_reader(tmp_path, monkeypatch)
+
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(
+            responses.GET, f"http://dx.doi.org/{DOIS[0]}", body="@article{x, keywords={fairness, networks}}"
+        )
+        mocked_requests.add(responses.GET, f"http://dx.doi.org/{DOIS[1]}", body="@article{x, title={T}}")
+        counts = reader.load_from_list(required=("keywords",), harvest_acm=False, fetch_pdf=False)
+
+    assert counts["metadata"] == 1 and counts["incomplete"] == 1
+    assert reader.paper_list[0].keywords == ["fairness", "networks"]
+    assert reader.paper_list[0].keywords_source == "metadata"
@@ -0,0 +1,58 @@
+import json
+import re
+import shutil
+import responses
+from pathlib import Path
+
+from reader import Reader
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+DOIS = ["10.1145/2680821.2680824", "10.1145/3359061.3361084"]
+TITLE = "Performance and Fairness Issues in Big Data Transfers"
+
+
+def make_reader(tmp_path) -> Reader:
+    (tmp_path / "papers" / "test").mkdir(parents=True)
+    (tmp_path / "cache").mkdir()
+    for pdf in RESOURCES_PATH.glob("*.pdf"):
+        shutil.copy(pdf, tmp_path / "papers" / "test")
+    reader = Reader("test")
+    reader.files_path = tmp_path / "papers"
+    reader.cache_path = tmp_path / "cache"
+    return reader
+
+
+def spotlight_stub(request):
+    body = {"Resources": [{"@surfaceForm": "fairness", "@offset": str(match.start())}
+                          for match in re.finditer("fairness", request.body)]}
+    return (200, {}, json.dumps(body))
+
+
+def test_pipeline_enriches_and_caches_papers(tmp_path):
+    reader = make_reader(tmp_path)
+    html = (RESOURCES_PATH / "10_1145-2680821_2680824.html").read_text()
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as mocked_requests:
+        for doi in DOIS:
+            mocked_requests.add(
+                responses.GET,
+                f"http://dx.doi.org/{doi}",
+                body=f"@inproceedings{{x, title={{{TITLE if doi == DOIS[0] else 'Other'}}}, DOI={{{doi}}}}}",
+            )
+        mocked_requests.add(responses.GET, f"https://dl.acm.org/doi/{DOIS[0]}", body=html)
+        mocked_requests.add(responses.GET, f"https://dl.acm.org/doi/{DOIS[1]}", status=404)
+        mocked_requests.add_callback(
+            responses.POST, "https://api.dbpedia-spotlight.org/en/annotate", callback=spotlight_stub
+        )
+        reader.run_pipeline("acm", "dbpedia", flush_after=0.1)
+
+    papers = {paper.doi: paper for paper in reader.paper_list}
+    assert set(papers) == set(DOIS)
+    assert papers[DOIS[0]].title == TITLE
+    assert papers[DOIS[0]].topics["acm"] == ["networks", "network performance evaluation", "network protocols"]
+    assert papers[DOIS[0]].topics["dbpedia"] == ["fairness"]
+    assert "acm" not in papers[DOIS[1]].topics
+
+    with open(tmp_path / "cache" / "test.json") as f:
+        cache = json.load(f)
+    assert cache[DOIS[0]]["topics"]["dbpedia"] == ["fairness"]
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from reader import Paper, Reader
+from reader.record import (
+    SCHEMA_VERSION,
+    PaperRecord,
+    decode_records,
+    decode_with_strings,
+    encode_records,
+    encode_with_strings,
+)
+from utils.errors import RecordError
+
+RECORD = PaperRecord(
+    doi="10.1145/3359061.3361084",
+    file_name="10_1145-3359061_3361084.pdf",
+    full_path="/papers/test/10_1145-3359061_3361084.pdf",
+    pattern_to_replace={"_": ".", "-": "/"},
+    title="Fairness in décisions",
+    author=["Ada Lovelace", "Alan Turing"],
+    year="2019",
+    keywords=["fairness", "machine learning"],
+    keywords_source="pdf",
+    topics={"acm": ["Computing methodologies"], "dbpedia": []},
+    extractor_version=1,
+    updated_at=12.5,
+)
+
+
+def test_binary_and_json_round_trips():
+    assert PaperRecord.from_bytes(RECORD.to_bytes()) == RECORD
+    assert PaperRecord.from_json(RECORD.to_json()) == RECORD
+    assert PaperRecord.from_dict(json.loads(json.dumps(RECORD.to_dict()))) == RECORD
+    assert decode_records(encode_records([RECORD, PaperRecord()])) == [RECORD, PaperRecord()]
+    assert len(RECORD.to_bytes()) < len(RECORD.to_json())
+
+    record, strings = decode_with_strings(encode_with_strings(RECORD, ["", "page 1", "pâge 2"]))
+    assert record == RECORD
+    assert strings == ["", "page 1", "pâge 2"]
+
+
+def test_invalid_records_are_rejected():
+    data = RECORD.to_dict()
+    with pytest.raises(RecordError, match="unknown_field"):
+        PaperRecord.from_dict({**data, "unknown_field": 1})
+    with pytest.raises(RecordError, match="author"):
+        PaperRecord.from_dict({**data, "author": "Ada Lovelace"})
+    with pytest.raises(RecordError, match="version"):
+        PaperRecord.from_dict({**data, "schema_version": SCHEMA_VERSION + 1})
+
+    encoded = RECORD.to_bytes()
+    for corrupted in [encoded[:-1], encoded + b"x", b"JUNK" + encoded[4:], b""]:
+        with pytest.raises(RecordError):
+            PaperRecord.from_bytes(corrupted)
+
+
+def test_legacy_records_are_migrated():
+    legacy = {key: value for key, value in RECORD.to_dict().items() if key not in ("schema_version", "duplicate_of")}
+    legacy["pdf_url"] = None
+
+    record = PaperRecord.from_dict(legacy)
+
+    assert record.duplicate_of == ""
+    assert record.pdf_url == ""
+    assert record.to_dict()["schema_version"] == SCHEMA_VERSION
+
+
+def test_baseline_cache_records_are_migrated(tmp_path):
+    # as exported before the schema, with the keywords of the metadata API as a string
+    baseline = {
+        "filename_has_doi": True,
+        "pattern_to_replace": {"_": ".", "-": "/"},
+        "silent": True,
+        "file_name": "10_1145-3359061_3361084.pdf",
+        "doi": "10.1145/3359061.3361084",
+        "full_path": "/papers/test/10_1145-3359061_3361084.pdf",
+        "title": "A title",
+        "author": "Ann Smith and Bob Jones",
+        "abstract": None,
+        "issn": "",
+        "url": "",
+        "number": "",
+        "journal": "",
+        "publisher": "ACM",
+        "year": 2019,
+        "month": "",
+        "pages": "",
+        "keywords": "fairness, machine learning",
+        "topics": {"acm": ["Computing methodologies"]},
+    }
+    record = PaperRecord.from_dict(baseline)
+    assert record.keywords == ["fairness", "machine learning"]
+    assert record.author == ["Ann Smith", "Bob Jones"]
+    assert (record.year, record.abstract) == ("2019", "")
+
+    reader = Reader("test")
+    reader.cache_path = tmp_path
+    (tmp_path / "test.json").write_text(json.dumps({baseline["doi"]: {**baseline, "keywords": ""}}))
+    reader.load_cache()
+    assert reader.cache[baseline["doi"]]["keywords"] == []
+
+
+def test_paper_round_trip_and_cache_validation(tmp_path):
+    paper = Paper("/papers/test", RECORD.file_name, pattern_to_replace={"_": ".", "-": "/"})
+    paper.import_from_dict(RECORD.to_dict())
+    assert paper.full_path.parent.as_posix() == "/papers/test"
+    assert paper.export_to_dict() == {**RECORD.to_dict(), "updated_at": 0.0}
+
+    reader = Reader("test")
+    reader.cache_path = tmp_path
+    (tmp_path / "test.json").write_text(json.dumps({RECORD.doi: {**RECORD.to_dict(), "year": 2019}}))
+    with pytest.raises(RecordError, match=RECORD.doi):
+        reader.load_cache()
@@ -0,0 +1,37 @@
+import requests
+import responses
+
+from config import get_config
+from reader import Reader
+from utils.ledger import FailureLedger
+
+DOIS = ["10.1145/2680821.2680824", "10.1145/3359061.3361084"]
+
+
+def test_only_the_failures_due_are_retried(tmp_path, monkeypatch):
+    (tmp_path / "data" / "lists").mkdir(parents=True)
+    (tmp_path / "data" / "lists" / "test.txt").write_text("\n".join(DOIS) + "\n")
+    (tmp_path / "cache").mkdir()
+    monkeypatch.setattr(get_config(), "get_data_path", lambda: tmp_path)
+    now = [0.0]
+    reader = Reader("test")
+    reader.cache_path = tmp_path / "cache"
+    reader.files_path = tmp_path / "papers"
+    reader.ledger = FailureLedger(tmp_path / "ledger.jsonl", base_backoff=60, clock=lambda: now[0])
+
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(responses.GET, f"http://dx.doi.org/{DOIS[0]}", body="@article{x, title={First}}")
+        mocked_requests.add(responses.GET, f"http://dx.doi.org/{DOIS[1]}", body=requests.ConnectionError("down"))
+        reader.load_from_list(required=("title",), harvest_acm=False, fetch_pdf=False)
+    assert [entry["doi"] for entry in reader.ledger.failures(stage="metadata")] == [DOIS[1]]
+
+    with responses.RequestsMock():
+        assert reader.retry_failed()["skipped"] == 1
+
+    now[0] = 60.0
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(responses.GET, f"http://dx.doi.org/{DOIS[1]}", body="@article{x, title={Second}}")
+        counts = reader.retry_failed("metadata")
+    assert counts == {"retried": 1, "fixed": 1, "failed": 0, "skipped": 0}
+    assert reader.paper_list[1].title == "Second"
+    assert not reader.ledger.failures()
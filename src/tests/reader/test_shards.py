@@ -0,0 +1,81 @@
+import json
+import shutil
+from pathlib import Path
+
+from reader import Reader
+from reader.shards import merge_records
+from utils.utils import shard_of
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+
+
+def make_reader(tmp_path, shard=None) -> Reader:
+    reader = Reader("test", shard=shard)
+    reader.files_path = tmp_path / "papers"
+    reader.cache_path = tmp_path / "cache"
+    return reader
+
+
+def test_shard_of_is_deterministic_and_normalized():
+    dois = [f"10.1145/{i}.{i * 7}" for i in range(1000)]
+    shards = [shard_of(doi, 4) for doi in dois]
+
+    assert shards == [shard_of(f"https://doi.org/{doi.upper()}", 4) for doi in dois]
+    assert set(shards) == {0, 1, 2, 3}
+    assert min(shards.count(shard) for shard in range(4)) > 200
+
+
+def test_merge_keeps_latest_version_then_latest_update():
+    old_version = {"title": "a", "extractor_version": 1, "updated_at": 30.0}
+    new_version = {"title": "b", "extractor_version": 2, "updated_at": 10.0}
+    recent = {"title": "c", "extractor_version": 2, "updated_at": 20.0}
+    legacy = {"title": "d"}
+
+    merged = merge_records(
+        {"10.1/a": new_version, "10.1/b": legacy},
+        {"10.1/a": old_version, "10.1/b": old_version},
+        {"10.1/A": recent},
+    )
+
+    assert merged == {"10.1/a": recent, "10.1/b": old_version}
+
+
+def test_shards_partition_the_list_and_merge(tmp_path):
+    (tmp_path / "papers" / "test").mkdir(parents=True)
+    (tmp_path / "cache").mkdir()
+    for pdf in RESOURCES_PATH.glob("*.pdf"):
+        shutil.copy(pdf, tmp_path / "papers" / "test")
+
+    dois = []
+    for index in range(2):
+        reader = make_reader(tmp_path, shard=(index, 2))
+        reader.load()
+        for paper in reader.paper_list:
+            assert shard_of(paper.doi, 2) == index
+            paper.title = paper.doi
+        reader.dump()
+        dois += [paper.doi for paper in reader.paper_list]
+        assert (tmp_path / "cache" / f"test.shard-{index}-of-2.json").is_file()
+
+    assert sorted(dois) == ["10.1145/2680821.2680824", "10.1145/3359061.3361084"]
+
+    reader = make_reader(tmp_path)
+    reader.merge_shards()
+    reader.load_from_cache()
+
+    with open(tmp_path / "cache" / "test.json") as f:
+        assert sorted(json.load(f)) == sorted(dois)
+    assert sorted(paper.title for paper in reader.paper_list) == sorted(dois)
+    assert reader.metadata_collection()[0]["file_name"].endswith(".pdf")
+
+
+def test_files_without_doi_are_sharded_by_name(tmp_path):
+    (tmp_path / "papers" / "test").mkdir(parents=True)
+    (tmp_path / "cache").mkdir()
+    for name in ["10_1145-2680821_2680824.pdf", "notes.pdf"]:
+        (tmp_path / "papers" / "test" / name).write_bytes(b"")
+
+    listed = [make_reader(tmp_path, shard=(index, 2))._list_papers() for index in range(2)]
+
+    assert sorted(listed[0] + listed[1]) == ["10_1145-2680821_2680824.pdf", "notes.pdf"]
+    assert "notes.pdf" in listed[shard_of("notes.pdf", 2)]
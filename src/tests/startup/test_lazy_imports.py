@@ -0,0 +1,32 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_PATH = Path(__file__).parent.parent.parent
+HEAVY_DEPENDENCIES = ["pandas", "numpy", "tqdm", "fitz", "pdfminer", "requests", "bs4"]
+
+
+def loaded_after_import(statement: str) -> list[str]:
+    script = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+    res = subprocess.run(
+        [sys.executable, "-c", script], cwd=SRC_PATH, capture_output=True, text=True, check=True
+    )
+    return res.stdout.split()
+
+
+def test_imports_do_not_load_heavy_dependencies():
+    modules = loaded_after_import(
+        "import reader, downloader, ontology, classifiers.acm, classifiers.dbpedia"
+    )
+
+    assert [dep for dep in HEAVY_DEPENDENCIES if dep in modules] == []
+
+
+def test_config_is_resolved_on_demand():
+    import config
+
+    config.get_config.cache_clear()
+    assert config.get_config.cache_info().currsize == 0
+
+    assert config.DATA_PATH == config.get_config().get_data_path()
+    assert config.get_config() is config.get_config()
@@ -0,0 +1,55 @@
+import shutil
+from pathlib import Path
+
+from reader import Reader
+from store import PaperStore
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+DOI = "10.1145/2680821.2680824"
+PDF_PATH = RESOURCES_PATH / "10_1145-2680821_2680824.pdf"
+
+
+def test_store_keeps_one_copy_per_content(tmp_path):
+    store = PaperStore(tmp_path)
+
+    first = store.add_pdf(PDF_PATH, DOI)
+    second = store.add_pdf(PDF_PATH.read_bytes(), "https://doi.org/" + DOI.upper())
+
+    assert first == second
+    assert len(list((tmp_path / "pdfs").rglob("*.pdf"))) == 1
+    assert store.pdf_path(DOI).read_bytes() == PDF_PATH.read_bytes()
+    assert PaperStore(tmp_path).resolve(DOI) == first
+
+
+def test_import_directory_writes_manifest(tmp_path):
+    papers_path = tmp_path / "papers"
+    papers_path.mkdir()
+    for pdf in RESOURCES_PATH.glob("*.pdf"):
+        shutil.copy(pdf, papers_path)
+    store = PaperStore(tmp_path / "store")
+
+    assert store.import_directory("fairness", papers_path) == 2
+    assert store.import_directory("networks", papers_path) == 2
+
+    assert store.manifest("fairness") == ["10.1145/2680821.2680824", "10.1145/3359061.3361084"]
+    assert store.manifest("networks") == store.manifest("fairness")
+    assert len(list((tmp_path / "store" / "pdfs").rglob("*.pdf"))) == 2
+
+
+def test_reader_shares_records_between_lists(tmp_path):
+    store = PaperStore(tmp_path)
+    store.add_pdf(PDF_PATH, DOI)
+    store.add_to_manifest("fairness", DOI)
+    store.add_to_manifest("networks", DOI)
+
+    reader = Reader("fairness", store=store)
+    reader.load()
+    assert reader.dois_not_cached == [DOI]
+    reader.paper_list[0].topics["acm"] = ["networks"]
+    reader.dump()
+
+    other_reader = Reader("networks", store=store)
+    other_reader.load()
+    assert other_reader.dois_not_cached == []
+    assert other_reader.paper_list[0].topics == {"acm": ["networks"]}
+    assert other_reader.paper_list[0].keywords == ["big data transfer protocols", "fairness", "performance"]
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from reader.paper import Paper
+from store import TextStore
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+DOI = "10.1145/2680821.2680824"
+
+
+def test_text_store_random_access_and_scan(tmp_path):
+    store = TextStore(tmp_path)
+    store.add("10.1145/1.1", ["first page", "second page"], pdf_keywords="a; b")
+    store.add("10.1145/2.2", ["única página"])
+    store.close()
+
+    store = TextStore(tmp_path)
+    assert store.page("10.1145/1.1", 1) == "second page"
+    assert store.pages("10.1145/1.1")[:1] == ["first page"]
+    assert len(store.pages("10.1145/1.1")) == 2
+    assert store.pdf_keywords("10.1145/1.1") == "a; b"
+    assert list(store.iter_pages()) == [
+        ("10.1145/1.1", 0, "first page"),
+        ("10.1145/1.1", 1, "second page"),
+        ("10.1145/2.2", 0, "única página"),
+    ]
+    store.close()
+
+
+def test_paper_loads_pages_from_text_store(tmp_path):
+    store = TextStore(tmp_path)
+    paper = Paper(RESOURCES_PATH, "10_1145-2680821_2680824.pdf")
+    paper.load(store)
+
+    stored_paper = Paper(tmp_path, "not_a_file.pdf", filename_has_doi=False)
+    stored_paper.doi = DOI
+    stored_paper.load(store)
+
+    assert list(stored_paper._raw_text) == paper._raw_text
+    assert stored_paper.keywords == paper.keywords
+    assert stored_paper.abstract == paper.abstract
+    assert stored_paper.text == paper.text
+    store.close()
@@ -0,0 +1,73 @@
+import requests
+
+from utils.errors import WrongPaperError
+from utils.ledger import FailureLedger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_backoff_and_persistence(tmp_path):
+    clock = Clock()
+    ledger = FailureLedger(tmp_path / "test.jsonl", base_backoff=10, max_backoff=25, clock=clock)
+    for _ in range(3):
+        ledger.record("10.1/a", "metadata", ConnectionError("down"))
+    ledger.record("10.1/b", "acm", WrongPaperError("other title"))
+    ledger.record("10.1/c", "download", TimeoutError())
+    ledger.record("10.1/c", "download")
+
+    ledger = FailureLedger(tmp_path / "test.jsonl", base_backoff=10, max_backoff=25, clock=clock)
+    entry = ledger.entries[("10.1/a", "metadata")]
+    assert (entry["error"], entry["attempts"], entry["next_retry"]) == ("ConnectionError", 3, 1025.0)
+    assert ledger.entries[("10.1/b", "acm")]["permanent"]
+    assert ("10.1/c", "download") not in ledger.entries
+
+    assert ledger.failures(due=True) == []
+    clock.now = 1025.0
+    assert ledger.failures(due=True) == [entry]
+    assert len(ledger.failures()) == 2
+
+    ledger.compact()
+    assert len((tmp_path / "test.jsonl").read_text().splitlines()) == 2
+
+
+def test_compact_keeps_the_failures_of_other_processes(tmp_path):
+    ledger = FailureLedger(tmp_path / "test.jsonl")
+    ledger.record("10.1/a", "metadata", ConnectionError("down"))
+    other = FailureLedger(tmp_path / "test.jsonl")
+    other.record("10.1/b", "download", TimeoutError())
+    other.record("10.1/a", "metadata")
+    ledger.record("10.1/c", "acm", ConnectionError("down"))
+
+    ledger.compact()
+
+    assert sorted(FailureLedger(tmp_path / "test.jsonl").entries) == [("10.1/b", "download"), ("10.1/c", "acm")]
+    assert sorted(ledger.entries) == [("10.1/b", "download"), ("10.1/c", "acm")]
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def test_client_errors_are_permanent(tmp_path):
+    ledger = FailureLedger(tmp_path / "test.jsonl")
+    for doi, err in [
+        ("10.1/404", http_error(404)),
+        ("10.1/408", http_error(408)),
+        ("10.1/429", http_error(429)),
+        ("10.1/503", http_error(503)),
+        ("10.1/down", requests.ConnectionError("down")),
+    ]:
+        ledger.record(doi, "metadata", err)
+
+    entries = FailureLedger(tmp_path / "test.jsonl").entries
+    assert {doi for (doi, _), entry in entries.items() if entry["permanent"]} == {"10.1/404"}
+    assert entries[("10.1/404", "metadata")]["status"] == 404
+    assert entries[("10.1/down", "metadata")]["status"] is None
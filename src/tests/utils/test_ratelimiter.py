@@ -0,0 +1,75 @@
+import responses
+
+from utils import http, ratelimiter
+from utils.ratelimiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(state_path, clock, limits="10/60, 1/2"):
+    return RateLimiter(
+        state_path,
+        {"dl.acm.org": ratelimiter.parse_limits(limits), "localhost": []},
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+
+def test_limiters_share_the_budget(tmp_path):
+    clock = FakeClock()
+    first = make_limiter(tmp_path / "state.json", clock)
+    second = make_limiter(tmp_path / "state.json", clock)
+
+    assert first.acquire("dl.acm.org") == 0
+    assert second.acquire("dl.acm.org") == 2
+    assert first.acquire("localhost") == 0
+    assert second.metrics["dl.acm.org"] == {"requests": 1, "waits": 1, "wait_time": 2, "throttled": 0}
+
+
+def test_burst_is_bounded_by_the_slowest_bucket(tmp_path):
+    clock = FakeClock()
+    limiter = make_limiter(tmp_path / "state.json", clock, limits="3/60")
+
+    waits = [limiter.acquire("dl.acm.org") for _ in range(4)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == 20
+
+
+def test_retry_after_blocks_and_slows_down(tmp_path):
+    clock = FakeClock()
+    limiter = make_limiter(tmp_path / "state.json", clock)
+
+    limiter.acquire("dl.acm.org")
+    limiter.feedback("dl.acm.org", 429, retry_after="30")
+
+    assert limiter.acquire("dl.acm.org") >= 30
+    assert limiter.metrics["dl.acm.org"]["throttled"] == 1
+    clock.now += 3600
+    # the refill rate is halved after being throttled: 1 token every 4 seconds
+    limiter.acquire("dl.acm.org")
+    assert limiter.acquire("dl.acm.org") == 4
+
+
+def test_request_retries_throttled_responses(tmp_path):
+    clock = FakeClock()
+    ratelimiter.set_limiter(make_limiter(tmp_path / "state.json", clock))
+
+    with responses.RequestsMock() as mocked_requests:
+        mocked_requests.add(responses.GET, "https://dl.acm.org/doi/x", status=503, headers={"Retry-After": "5"})
+        mocked_requests.add(responses.GET, "https://dl.acm.org/doi/x", body="ok")
+        res = http.get("https://dl.acm.org/doi/x")
+
+    assert res.text == "ok"
+    assert sum(clock.slept) >= 5
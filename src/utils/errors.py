@@ -12,3 +12,7 @@ class MissingDOIError(Exception):
 
 class WrongPaperError(Exception):
     """Raised when there is an error validating the paper content against another source"""
+
+
+class RecordError(Exception):
+    """Raised when a paper record doesn't match the record schema"""
@@ -0,0 +1,51 @@
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from utils.ratelimiter import get_limiter
+
+if TYPE_CHECKING:
+    import requests
+
+
+def request(method: str, url: str, **kwargs) -> "requests.Response":
+    """
+    Every outbound request goes through here, so all the processes share the
+    rate budget of each host, see `utils.ratelimiter.RateLimiter`.
+    Responses with status 429 or 503 are retried after the limiter's wait,
+    up to `max_retries` times as set in the config file.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The url of the request.
+        **kwargs: Passed to `requests.request`.
+
+    Returns (requests.Response): The response.
+    """
+    import requests
+    from config import get_config
+
+    host = urlparse(url).hostname or ""
+    limiter = get_limiter()
+    retries = get_config().get_ratelimit_max_retries()
+
+    while True:
+        limiter.acquire(host)
+        try:
+            res = requests.request(method, url, **kwargs)
+        except requests.RequestException:
+            limiter.feedback(host, None)
+            raise
+        limiter.feedback(host, res.status_code, res.headers.get("Retry-After"))
+        if res.status_code not in (429, 503) or retries <= 0:
+            return res
+        retries -= 1
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    """`GET` method, see `request`"""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    """`POST` method, see `request`"""
+    return request("POST", url, **kwargs)
@@ -0,0 +1,175 @@
+"""
+Ledger of the failed enrichment stages of each paper, to retry only those
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Errors that retrying doesn't fix, by class name
+PERMANENT_ERRORS = ("WrongPaperError", "NotPDFContentError")
+# HTTP client errors that may succeed later, the other 4xx responses are permanent
+TRANSIENT_CLIENT_ERRORS = (408, 429)
+
+
+def http_status(err: Exception) -> int | None:
+    """Returns (int | None): The status code of the response of an HTTP error, e.g. a `requests.HTTPError`."""
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_permanent(err: Exception) -> bool:
+    """Returns (bool): Whether retrying can't fix the error: a permanent error or an HTTP 4xx response
+    other than 408 and 429. The 5xx responses, 408, 429 and connection errors are transient."""
+    status = http_status(err)
+    return type(err).__name__ in PERMANENT_ERRORS or (
+        status is not None and 400 <= status < 500 and status not in TRANSIENT_CLIENT_ERRORS
+    )
+
+
+class FailureLedger:
+    """The last failure of each (DOI, stage), e.g. ("10.1145/3359061.3361084", "metadata").
+
+    The outcomes are appended to a json lines file, so that the processes working on the same list
+    can share it, and the last line of a (DOI, stage) wins. A success removes its failure.
+    The file is only written under an exclusive lock.
+    A failed stage is due for a retry after an exponential back off, doubled on each attempt,
+    unless the error is permanent, see `is_permanent`.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        base_backoff: float = 300.0,
+        max_backoff: float = 86400.0,
+        clock=time.time,
+    ) -> None:
+        """
+        Args:
+            path (str | Path): The json lines file of the ledger.
+            base_backoff (float, optional): Seconds before retrying a stage that failed once. Defaults to 300.
+            max_backoff (float, optional): Maximum seconds before a retry. Defaults to 86400.
+            clock (optional): Function returning the current time in seconds. Defaults to `time.time`.
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.entries: dict[tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_list(cls, named_list: str) -> "FailureLedger":
+        """Returns (FailureLedger): The ledger of a named list, as set in the config file."""
+        from config import get_config
+
+        config = get_config()
+        return cls(
+            config.get_ledger_path() / f"{named_list}.jsonl",
+            config.get_ledger_base_backoff(),
+            config.get_ledger_max_backoff(),
+        )
+
+    def load(self):
+        """Read the outcomes of the file, ignoring an incomplete last line."""
+        self.entries = self._read()
+
+    def _read(self) -> dict[tuple[str, str], dict]:
+        entries: dict[tuple[str, str], dict] = {}
+        if not self.path.is_file():
+            return entries
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                key = (entry["doi"], entry["stage"])
+                if entry.get("error") is None:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = entry
+        return entries
+
+    def _locked(self, write):
+        """Call `write` under an exclusive lock of the file, shared with the other processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                write()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, entry: dict):
+        def write():
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+        self._locked(write)
+
+    def record(self, doi: str, stage: str, err: Exception | None = None):
+        """
+        Record the outcome of a stage.
+
+        Args:
+            doi (str): DOI of the paper.
+            stage (str): Name of the stage, e.g. "metadata", "acm", "dbpedia" or "download".
+            err (Exception | None, optional): The error raised by the stage. Defaults to None, a success.
+        """
+        key = (doi, stage)
+        with self._lock:
+            if err is None:
+                if self.entries.pop(key, None) is not None:
+                    self._append({"doi": doi, "stage": stage, "error": None})
+                return
+            now = self.clock()
+            attempts = self.entries.get(key, {}).get("attempts", 0) + 1
+            permanent = is_permanent(err)
+            entry = {
+                "doi": doi,
+                "stage": stage,
+                "error": type(err).__name__,
+                "status": http_status(err),
+                "message": str(err),
+                "attempts": attempts,
+                "permanent": permanent,
+                "time": now,
+                "next_retry": None
+                if permanent
+                else now + min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1)),
+            }
+            self.entries[key] = entry
+            self._append(entry)
+
+    def is_due(self, entry: dict) -> bool:
+        """Returns (bool): Whether a failure is to retry now, i.e. not permanent and past its back off."""
+        return not entry["permanent"] and entry["next_retry"] <= self.clock()
+
+    def failures(self, stage: str | None = None, due: bool = False) -> list[dict]:
+        """Returns (list[dict]): The failures, of a stage if set, and only the ones due if `due` is set."""
+        return [
+            entry
+            for (_, entry_stage), entry in self.entries.items()
+            if (stage is None or entry_stage == stage) and (not due or self.is_due(entry))
+        ]
+
+    def compact(self):
+        """Rewrite the file with the current failures only, including the ones recorded by
+        other processes since it was loaded."""
+
+        def write():
+            self.entries = self._read()
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
+
+        with self._lock:
+            self._locked(write)
@@ -0,0 +1,217 @@
+"""
+Rate limiter shared by all the processes making requests to the same hosts
+"""
+
+import fcntl
+import json
+import os
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+# Back off applied after a 429/503 response without `Retry-After`, doubled each time.
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 600.0
+# Fraction of the configured rate used after a 429/503 response and recovered per success.
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY = 0.05
+
+
+def parse_limits(value: str) -> list[tuple[int, float]]:
+    """Parse limits such as "10/60, 1/2", i.e. 10 calls per 60 seconds and 1 call per 2 seconds"""
+    limits = []
+    for limit in value.split(","):
+        if limit.strip():
+            calls, period = limit.split("/")
+            limits.append((int(calls), float(period)))
+    return limits
+
+
+def parse_retry_after(value: str | None, now: float) -> float | None:
+    """Returns (float | None): Seconds to wait from a `Retry-After` header, in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token buckets per host, persisted in a local file that every process consults.
+
+    Each host has one bucket per limit, e.g. "10/60, 1/2" are two buckets: 10 tokens refilled
+    at 10 per minute and 1 token refilled every 2 seconds. A request takes a token from each.
+    The state file is only accessed under an exclusive lock, never while sleeping.
+
+    After a 429 or 503 response, the host is blocked for the `Retry-After` time (or an
+    exponential back off) and its refill rate is reduced, then recovered on each success.
+    """
+
+    def __init__(
+        self,
+        state_path: str | Path,
+        limits: dict[str, list[tuple[int, float]]],
+        default_limits: list[tuple[int, float]] | None = None,
+        clock=time.time,
+        sleep=time.sleep,
+    ) -> None:
+        """
+        Args:
+            state_path (str | Path): The json file of the shared state.
+            limits (dict[str, list[tuple[int, float]]]): (calls, period in seconds) of each host.
+                An empty list means the host is not limited.
+            default_limits (list[tuple[int, float]], optional): Limits of the hosts not in `limits`.
+                Defaults to no limit.
+            clock (optional): Function returning the current time in seconds. Defaults to `time.time`.
+            sleep (optional): Function to wait a number of seconds. Defaults to `time.sleep`.
+        """
+        self.state_path = Path(state_path)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.state_path.with_name(self.state_path.name + ".lock")
+        self.limits = limits
+        self.default_limits = default_limits or []
+        self.clock = clock
+        self.sleep = sleep
+        self.metrics: dict[str, dict] = {}
+
+    def _host_limits(self, host: str) -> list[tuple[int, float]]:
+        return self.limits.get(host, self.default_limits)
+
+    def _update_state(self, update) -> object:
+        """Read, update and write the shared state under an exclusive lock.
+        `update` receives the state dictionary and returns the value passed through."""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = {}
+                if self.state_path.is_file() and self.state_path.stat().st_size:
+                    with open(self.state_path, "r") as f:
+                        state = json.load(f)
+                result = update(state)
+                tmp_path = self.state_path.with_name(f".{self.state_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return result
+
+    def _host_state(self, state: dict, host: str, now: float) -> dict:
+        limits = self._host_limits(host)
+        host_state = state.setdefault(
+            host, {"tokens": [], "updated": now, "blocked_until": 0.0, "rate_factor": 1.0, "backoffs": 0}
+        )
+        if len(host_state["tokens"]) != len(limits):
+            host_state["tokens"] = [float(calls) for calls, _ in limits]
+        # refill
+        elapsed = max(0.0, now - host_state["updated"])
+        host_state["tokens"] = [
+            min(float(calls), tokens + elapsed * calls / period * host_state["rate_factor"])
+            for tokens, (calls, period) in zip(host_state["tokens"], limits)
+        ]
+        host_state["updated"] = now
+        return host_state
+
+    def _try_acquire(self, state: dict, host: str) -> float:
+        """Take a token from each bucket of the host if possible.
+        Returns (float): 0 if acquired, otherwise the time to wait before trying again."""
+        now = self.clock()
+        host_state = self._host_state(state, host, now)
+        wait = host_state["blocked_until"] - now
+        for tokens, (calls, period) in zip(host_state["tokens"], self._host_limits(host)):
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) * period / (calls * host_state["rate_factor"]))
+        if wait > 0:
+            return wait
+        host_state["tokens"] = [tokens - 1 for tokens in host_state["tokens"]]
+        return 0.0
+
+    def _host_metrics(self, host: str) -> dict:
+        return self.metrics.setdefault(
+            host, {"requests": 0, "waits": 0, "wait_time": 0.0, "throttled": 0}
+        )
+
+    def acquire(self, host: str) -> float:
+        """
+        Wait until a request to the host is allowed.
+
+        Returns (float): The time waited in seconds.
+        """
+        metrics = self._host_metrics(host)
+        metrics["requests"] += 1
+        if not self._host_limits(host):
+            return 0.0
+
+        waited = 0.0
+        while True:
+            wait = self._update_state(lambda state: self._try_acquire(state, host))
+            if wait <= 0:
+                break
+            self.sleep(wait)
+            waited += wait
+
+        if waited:
+            metrics["waits"] += 1
+            metrics["wait_time"] += waited
+        return waited
+
+    def feedback(self, host: str, status_code: int | None, retry_after: str | None = None):
+        """
+        Adapt the rate of the host to the response of a request.
+
+        Args:
+            host (str): The host of the request.
+            status_code (int | None): Status code of the response. None if there was no response.
+            retry_after (str, optional): The `Retry-After` header of the response. Defaults to None.
+        """
+        if not self._host_limits(host) or status_code is None:
+            return
+        throttled = status_code in (429, 503)
+        if throttled:
+            self._host_metrics(host)["throttled"] += 1
+
+        def update(state: dict):
+            now = self.clock()
+            host_state = self._host_state(state, host, now)
+            if throttled:
+                wait = parse_retry_after(retry_after, now)
+                if wait is None:
+                    wait = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** host_state["backoffs"])
+                host_state["backoffs"] += 1
+                host_state["blocked_until"] = max(host_state["blocked_until"], now + wait)
+                host_state["rate_factor"] = max(MIN_RATE_FACTOR, host_state["rate_factor"] / 2)
+                host_state["tokens"] = [0.0 for _ in host_state["tokens"]]
+            else:
+                host_state["backoffs"] = 0
+                host_state["rate_factor"] = min(1.0, host_state["rate_factor"] + RATE_RECOVERY)
+
+        self._update_state(update)
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_limiter() -> RateLimiter:
+    """Returns the limiter configured in the config file, created on the first call"""
+    global _limiter
+    if _limiter is None:
+        from config import get_config
+
+        config = get_config()
+        _limiter = RateLimiter(
+            config.get_ratelimit_state_path(),
+            {host: parse_limits(value) for host, value in config.get_ratelimit_hosts().items()},
+            parse_limits(config.get_ratelimit_default()),
+        )
+    return _limiter
+
+
+def set_limiter(limiter: RateLimiter | None):
+    """Replace the shared limiter, e.g. to use another state file. None resets it to the config."""
+    global _limiter
+    _limiter = limiter
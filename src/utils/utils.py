@@ -1,3 +1,4 @@
+import hashlib
 import re
 
 
@@ -10,6 +11,41 @@ def extract_doi_from_str(string: str) -> list:
     return doi_list
 
 
+def normalize_doi(doi: str) -> str:
+    """Normalize a DOI to be used as a key, removing resolver prefixes and lower casing it"""
+    doi = doi.strip().lower()
+    doi = re.sub(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", "", doi)
+    return doi
+
+
+def doi_hash(doi: str, digest_size: int = 8, byteorder: str = "big") -> int:
+    """
+    Hash of the normalized DOI, stable across machines and python processes.
+
+    Args:
+        doi (str): The DOI. Any other string, e.g. a file name, is accepted.
+        digest_size (int, optional): Size of the hash in bytes. Defaults to 8.
+        byteorder (str, optional): Byte order of the digest read as an integer. Defaults to "big".
+
+    Returns (int): The hash, between 0 and `2 ** (8 * digest_size) - 1`.
+    """
+    digest = hashlib.blake2b(normalize_doi(doi).encode("utf-8"), digest_size=digest_size).digest()
+    return int.from_bytes(digest, byteorder)
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """
+    Deterministic shard of a DOI, the same on every machine and python process.
+
+    Args:
+        key (str): The DOI, normalized before hashing. Any other string, e.g. a file name, is accepted.
+        num_shards (int): Number of shards.
+
+    Returns (int): The shard index, between 0 and `num_shards - 1`.
+    """
+    return doi_hash(key) % num_shards
+
+
 # Microsoft Academic Graph schema
 venue_schema = {"id": str, "raw": str}
 